@@ -81,6 +81,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so request timings cover the whole stack
+    "polls.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,7 +96,8 @@ ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # The Django backend, plus per-request render timing for /metrics/
+        "BACKEND": "polls.services.request_metrics.TimedDjangoTemplates",
         # DIRS: Project-level templates (e.g., base.html shared across apps)
         "DIRS": [BASE_DIR / "templates"],
         # APP_DIRS: Look for templates in each app's 'templates' subdir
@@ -120,13 +123,58 @@ WSGI_APPLICATION = "config.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # SQLite for simplicity - works great for your minimal records/day volume
+#
+# PRAGMAs run on every new connection. WAL lets gunicorn readers keep
+# reading while scrape_odds writes; busy_timeout makes a second writer
+# wait instead of failing with "database is locked". Each can be
+# overridden with an SQLITE_* environment variable.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"),  # ms
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),  # Safe with WAL
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),  # bytes
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-65536"),  # Negative = KiB
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+SQLITE_PATH = BASE_DIR / "db.sqlite3"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "NAME": SQLITE_PATH,
+        "OPTIONS": {
+            "init_command": ";".join(
+                f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()
+            ),
+            # Take the write lock when a transaction starts, so busy_timeout
+            # applies instead of a read lock failing to upgrade mid-transaction
+            "transaction_mode": "IMMEDIATE",
+            "timeout": int(SQLITE_PRAGMAS["busy_timeout"]) / 1000,  # seconds
+        },
+    },
 }
 
+# Read-only connection for dashboard/API reads (see polls/routers.py). The
+# same SQLite file opened with mode=ro can never take a write lock, so web
+# workers don't contend with scrape_odds. Journal PRAGMAs are left to the
+# writer; a read-only connection can't change them.
+if os.environ.get("DJANGO_DB_REPLICA", "True").lower() == "true":
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{SQLITE_PATH}?mode=ro",
+        "OPTIONS": {
+            "init_command": ";".join(
+                f"PRAGMA {name}={SQLITE_PRAGMAS[name]}"
+                for name in ("busy_timeout", "mmap_size", "cache_size", "temp_store")
+            ),
+            "timeout": int(SQLITE_PRAGMAS["busy_timeout"]) / 1000,
+        },
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["polls.routers.PrimaryReplicaRouter"]
+
 # =============================================================================
 # PASSWORD VALIDATION
 # =============================================================================
@@ -167,6 +215,23 @@ USE_TZ = True
 
 
 
+# =============================================================================
+# CACHE
+# =============================================================================
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# File-based so gunicorn workers and the scrape_odds cron job share one
+# cache - scrape_odds bumps the data version here and every worker sees it.
+CACHES = {
+    "default": {
+        # FileBasedCache that also counts hits/misses for /metrics/
+        "BACKEND": "polls.services.request_metrics.MeteredFileBasedCache",
+        "LOCATION": os.environ.get("DJANGO_CACHE_DIR", BASE_DIR / ".cache"),
+        "TIMEOUT": 60 * 60 * 24,  # Entries are keyed by data version anyway
+    }
+}
+
+
 # =============================================================================
 # STATIC FILES (CSS, JavaScript, Images)
 # =============================================================================
@@ -185,6 +250,28 @@ STATICFILES_DIRS = [
 # nginx will serve files from this directory
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# SNAPSHOT_DIR: Where scrape_odds/export_snapshot write pre-compressed JSON
+# snapshots of the dashboard data, served by nginx as /static/data/*.json
+SNAPSHOT_DIR = STATIC_ROOT / "data"
+
+# SCRAPE_METRICS_TEXTFILE: If set, scrape_odds/scrape_scheduler write each
+# run's timings here in the Prometheus text format, for node_exporter's
+# textfile collector (e.g. /var/lib/node_exporter/textfile/betpoll.prom).
+# Every run is also stored as a ScrapeRun row either way.
+SCRAPE_METRICS_TEXTFILE = os.environ.get("SCRAPE_METRICS_TEXTFILE") or None
+
+
+# =============================================================================
+# REQUEST METRICS
+# =============================================================================
+
+# /metrics/ (Prometheus format) is served to staff users, or to requests
+# with "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Requests slower than this (seconds) are logged with their SQL
+SLOW_REQUEST_THRESHOLD = float(os.environ.get("DJANGO_SLOW_REQUEST_MS", "500")) / 1000
+
 # Why the nested `polls/static/polls/` convention exists: 
 # It's namespacing. 
 # If you had multiple apps (`polls`, `blog`, `shop`) each with their own `style.css`, 
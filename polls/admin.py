@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Bookmaker, Party, OddsReading, MarketConsensus
+from .models import (
+    Bookmaker, Party, OddsReading, IntradayOddsReading, MarketConsensus, ScrapeRun, CircuitBreaker,
+)
 
 
 @admin.register(Bookmaker)
@@ -22,8 +24,30 @@ class OddsReadingAdmin(admin.ModelAdmin):
     date_hierarchy = "date"
 
 
+@admin.register(IntradayOddsReading)
+class IntradayOddsReadingAdmin(admin.ModelAdmin):
+    list_display = ["timestamp", "bookmaker", "party", "odds"]
+    list_filter = ["bookmaker", "party"]
+    search_fields = ["bookmaker__name", "party__name", "party__code"]
+    date_hierarchy = "timestamp"
+
+
 @admin.register(MarketConsensus)
 class MarketConsensusAdmin(admin.ModelAdmin):
     list_display = ["timestamp", "party", "fair_probability", "averaged_odds", "bookmaker_count"]
     list_filter = ["party", "timestamp"]
     search_fields = ["party__code", "party__name"]
+
+
+@admin.register(ScrapeRun)
+class ScrapeRunAdmin(admin.ModelAdmin):
+    list_display = ["started_at", "command", "duration", "succeeded", "failed", "rows_written"]
+    list_filter = ["command", "started_at"]
+    date_hierarchy = "started_at"
+
+
+@admin.register(CircuitBreaker)
+class CircuitBreakerAdmin(admin.ModelAdmin):
+    list_display = ["bookmaker", "state", "failures", "opened_at", "retry_at"]
+    list_filter = ["state"]
+    readonly_fields = ["last_error"]
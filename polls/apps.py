@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class PollsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "polls"
+    
+    def ready(self):
+        from polls.services.request_metrics import install_query_recorder
+        
+        # Time every query made while serving a request (see PerformanceMiddleware)
+        connection_created.connect(install_query_recorder, dispatch_uid="polls.query_recorder")
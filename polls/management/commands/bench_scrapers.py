@@ -0,0 +1,190 @@
+"""
+Management command to benchmark the scrapers offline, against the
+synthetic bookmaker page fixtures (polls/scrapers/fixtures).
+
+Measures the scrapers' own per-phase overhead with the network taken out;
+see polls.scrapers.replay for what a replay can and can't tell you.
+
+Usage:
+    python manage.py bench_scrapers
+    python manage.py bench_scrapers --bookmaker pointsbet --runs 20
+    python manage.py bench_scrapers --warm
+    python manage.py bench_scrapers --wait-strategy networkidle
+    python manage.py bench_scrapers --json > bench.json
+"""
+
+import asyncio
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.scrapers import BaseScraper, BrowserPool, get_scrapers
+from polls.scrapers.base import WAIT_STRATEGIES
+from polls.scrapers.replay import replay_scraper
+from polls.scrapers.timing import PHASES
+
+
+class Command(BaseCommand):
+    help = "Benchmark scraper overhead against synthetic HTML fixtures (no network)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bookmaker",
+            type=str,
+            help="Benchmark only a specific bookmaker (e.g., betr, pointsbet, ladbrokes)",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Number of timed runs per bookmaker (default: 5)",
+        )
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Share one already-launched browser across runs, as scrape_scheduler does",
+        )
+        parser.add_argument(
+            "--wait-strategy",
+            choices=WAIT_STRATEGIES,
+            help="Readiness strategy to use for every scraper (default: each scraper's WAIT_STRATEGY)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON instead of a table",
+        )
+    
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        if runs < 1:
+            raise CommandError("--runs must be at least 1")
+        
+        try:
+            scrapers = get_scrapers(options.get("bookmaker"))
+        except ValueError as e:
+            raise CommandError(str(e))
+        report = asyncio.run(
+            self._bench(scrapers, runs, options["warm"], options["wait_strategy"])
+        )
+        
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+        
+        failed = [r["bookmaker"] for r in report["results"] if r["failures"]]
+        if failed:
+            raise CommandError(f"Benchmark runs failed for: {', '.join(failed)}")
+    
+    async def _bench(
+        self,
+        scraper_classes: list[type[BaseScraper]],
+        runs: int,
+        warm: bool,
+        wait_strategy: str | None = None,
+    ) -> dict:
+        """
+        Run every scraper `runs` times and summarise its phase timings.
+        
+        Cold runs give each scrape its own browser, so "launch" is part
+        of every run. Warm runs share a pool that is started before the
+        first timed run, so only per-scrape work is measured.
+        """
+        pool = None
+        if warm:
+            pool = BrowserPool(max_contexts=1, headless=BaseScraper.HEADLESS)
+            await pool.start()
+        
+        try:
+            results = []
+            for scraper_class in scraper_classes:
+                results.append(
+                    await self._bench_one(scraper_class, runs, pool, wait_strategy)
+                )
+        finally:
+            if pool:
+                await pool.close()
+        
+        return {"runs": runs, "warm": warm, "wait_strategy": wait_strategy, "results": results}
+    
+    async def _bench_one(
+        self,
+        scraper_class: type[BaseScraper],
+        runs: int,
+        pool: BrowserPool | None,
+        wait_strategy: str | None = None,
+    ) -> dict:
+        """Time `runs` replayed scrapes of one bookmaker."""
+        replay_class = replay_scraper(scraper_class)
+        samples: dict[str, list[float]] = {}
+        failures = []
+        outcomes = 0
+        
+        for run in range(runs):
+            scraper = replay_class(pool=pool, wait_strategy=wait_strategy)
+            started = time.perf_counter()
+            try:
+                async with scraper:
+                    data = await scraper.scrape()
+            except Exception as e:
+                failures.append(f"run {run + 1}: {e}")
+                continue
+            wall = time.perf_counter() - started
+            
+            outcomes = len(data)
+            for phase, seconds in scraper.timings.durations.items():
+                samples.setdefault(phase, []).append(seconds)
+            samples.setdefault("total", []).append(wall)
+        
+        ordered = [p for p in PHASES if p in samples] + sorted(
+            p for p in samples if p not in PHASES and p != "total"
+        )
+        if "total" in samples:
+            ordered.append("total")
+        
+        return {
+            "bookmaker": scraper_class.name,
+            "wait_strategy": wait_strategy or scraper_class.WAIT_STRATEGY,
+            "outcomes": outcomes,
+            "failures": failures,
+            "phases": {phase: _describe(samples[phase]) for phase in ordered},
+        }
+    
+    def _print_report(self, report: dict) -> None:
+        """Print a per-bookmaker table of phase timings in milliseconds."""
+        mode = "warm browser" if report["warm"] else "cold browser"
+        self.stdout.write(self.style.NOTICE(
+            f"Scraper benchmark: {report['runs']} runs per bookmaker, {mode}"
+        ))
+        
+        header = f"  {'phase':<10}{'mean':>10}{'median':>10}{'min':>10}{'max':>10}"
+        for result in report["results"]:
+            self.stdout.write("")
+            self.stdout.write(self.style.NOTICE(
+                f"{result['bookmaker']} ({result['outcomes']} outcomes, "
+                f"{result['wait_strategy']} wait)"
+            ))
+            if result["phases"]:
+                self.stdout.write(header)
+            for phase, stats in result["phases"].items():
+                self.stdout.write(
+                    f"  {phase:<10}{stats['mean']:>10.1f}{stats['median']:>10.1f}"
+                    f"{stats['min']:>10.1f}{stats['max']:>10.1f}"
+                )
+            for failure in result["failures"]:
+                self.stdout.write(self.style.ERROR(f"  FAILED {failure}"))
+
+
+def _describe(seconds: list[float]) -> dict[str, float]:
+    """Mean/median/min/max of a sample, in milliseconds."""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "mean": statistics.fmean(ms),
+        "median": statistics.median(ms),
+        "min": min(ms),
+        "max": max(ms),
+    }
@@ -0,0 +1,31 @@
+"""
+Management command to export dashboard data as static JSON files.
+
+Usage:
+    python manage.py export_snapshot
+    python manage.py export_snapshot --output /var/www/betpoll/data
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from polls.services.snapshots import export_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = "Write latest odds, consensus and chart series as pre-compressed static JSON"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help=f"Output directory (default: {snapshot_dir()})",
+        )
+    
+    def handle(self, *args, **options):
+        written = export_snapshot(options.get("output"))
+        
+        for path in written:
+            self.stdout.write(f"  {path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Exported {len(written)} snapshot files"))
@@ -0,0 +1,59 @@
+"""
+Management command to recompute MarketConsensus over the stored history.
+
+Usage:
+    python manage.py rebuild_consensus
+    python manage.py rebuild_consensus --method shin
+    python manage.py rebuild_consensus --start 2026-01-01 --end 2026-03-31
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.routers import pin_primary
+from polls.services.cache import bump_data_version
+from polls.services.consensus import rebuild_market_consensus
+from polls.services.odds_batch import DEVIG_METHODS
+
+
+class Command(BaseCommand):
+    help = "Recompute market consensus for all stored odds readings"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=DEVIG_METHODS,
+            default="proportional",
+            help="How to remove bookmaker margin (default: proportional)",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First date to rebuild (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Last date to rebuild (YYYY-MM-DD)",
+        )
+    
+    def execute(self, *args, **options):
+        # Reads must see this command's own writes - keep them off the replica
+        with pin_primary():
+            return super().execute(*args, **options)
+    
+    def handle(self, *args, **options):
+        start, end = options.get("start"), options.get("end")
+        if start and end and start > end:
+            raise CommandError("--start must not be after --end")
+        
+        started = time.perf_counter()
+        count = rebuild_market_consensus(options["method"], start, end)
+        elapsed = time.perf_counter() - started
+        bump_data_version()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {count} consensus rows ({options['method']}) in {elapsed:.2f}s"
+        ))
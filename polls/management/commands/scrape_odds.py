@@ -5,17 +5,29 @@ Usage:
     python manage.py scrape_odds
     python manage.py scrape_odds --bookmaker sportsbet
     python manage.py scrape_odds --dry-run
+    python manage.py scrape_odds --concurrency 3
+    python manage.py scrape_odds --no-snapshot
+    python manage.py scrape_odds --verify-consensus
+    python manage.py scrape_odds --retries 0 --ignore-circuit-breaker
 """
 
 import asyncio
 import logging
-from datetime import date
 
 from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
 
-from polls.models import Bookmaker, Party, OddsReading
-from polls.scrapers import ALL_SCRAPERS, BaseScraper
+from polls.routers import pin_primary
+from polls.scrapers import BaseScraper, BrowserPool, get_scrapers
+from polls.scrapers.scheduler import retry_delay
+from polls.services import circuit_breaker
+from polls.services.cache import bump_data_version
+from polls.services.consensus import ConsensusAggregator
+from polls.services.odds_batch import DEVIG_METHODS
 from polls.services.notifications import send_scrape_failure_alert
+from polls.services.odds_writer import LastPriceCache, save_intraday_readings
+from polls.services.run_metrics import RunRecorder, write_textfile
+from polls.services.snapshots import export_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -39,32 +51,104 @@ class Command(BaseCommand):
             action="store_true",
             help="Don't send email notifications on failure",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Maximum number of scrapers to run at the same time (default: 1)",
+        )
+        parser.add_argument(
+            "--no-block-resources",
+            action="store_true",
+            help="Load images, fonts, media and trackers instead of blocking them",
+        )
+        parser.add_argument(
+            "--devig-method",
+            choices=DEVIG_METHODS,
+            default="proportional",
+            help="How to remove bookmaker margin when computing consensus",
+        )
+        parser.add_argument(
+            "--no-snapshot",
+            action="store_true",
+            help="Don't export static JSON snapshots after saving",
+        )
+        parser.add_argument(
+            "--verify-consensus",
+            action="store_true",
+            help="Check the incrementally updated consensus against a full recompute",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=2,
+            help="Times to retry a failed scraper, with jittered backoff (default: 2)",
+        )
+        parser.add_argument(
+            "--ignore-circuit-breaker",
+            action="store_true",
+            help="Scrape bookmakers even if their circuit is open, and don't update it",
+        )
+    
+    def execute(self, *args, **options):
+        # Reads must see this command's own writes - keep them off the replica
+        with pin_primary():
+            return super().execute(*args, **options)
     
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE("Starting odds scrape..."))
         
         # Filter scrapers if specific bookmaker requested
         scrapers = self._get_scrapers(options.get("bookmaker"))
+        self._aggregator = ConsensusAggregator(options["devig_method"])
+        self._recorder = RunRecorder("scrape_odds")
         
         if not scrapers:
             raise CommandError("No scrapers available")
         
+        concurrency = options.get("concurrency") or 1
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["retries"] < 0:
+            raise CommandError("--retries must not be negative")
+        
+        # Skip bookmakers whose circuit is open; half-open ones get one probe
+        use_breaker = not options.get("dry_run") and not options.get("ignore_circuit_breaker")
+        probes = set()
+        if use_breaker:
+            skipped, probes = self._check_circuits([s.name for s in scrapers])
+            scrapers = [s for s in scrapers if s.name not in skipped]
+        
         # Run the async scraping
-        results = asyncio.run(self._run_scrapers(scrapers))
+        block_resources = False if options.get("no_block_resources") else None
+        results = asyncio.run(
+            self._run_scrapers(
+                scrapers, concurrency, block_resources, options["retries"], probes
+            )
+        )
         
         # Process results
         successes = results["success"]
         failures = results["failed"]
+        if use_breaker:
+            self._update_circuits(results)
         
         # Save successful results (unless dry-run)
+        rows_written = 0
         if not options.get("dry_run"):
-            for result in successes:
-                self._save_odds(result["name"], result["data"])
+            if successes:
+                rows_written = self._save_odds(successes)
+                if rows_written:
+                    self._publish(options)
+                else:
+                    self.stdout.write("    No price changes - consensus not recomputed")
         else:
             self.stdout.write(self.style.WARNING("Dry run - not saving to database"))
         
         # Report summary
         self._report_summary(successes, failures)
+        if not options.get("dry_run"):
+            self._record_run(rows_written)
         
         # Send failure notification if needed
         if failures and not options.get("no_notify"):
@@ -76,91 +160,209 @@ class Command(BaseCommand):
     
     def _get_scrapers(self, bookmaker_filter: str | None) -> list[type[BaseScraper]]:
         """Get list of scraper classes to run."""
-        if not bookmaker_filter:
-            return ALL_SCRAPERS
-        
-        filter_lower = bookmaker_filter.lower()
-        filtered = [
-            s for s in ALL_SCRAPERS
-            if filter_lower in s.name.lower()
-        ]
-        
-        if not filtered:
-            available = ", ".join(s.name for s in ALL_SCRAPERS)
-            raise CommandError(
-                f"Unknown bookmaker: {bookmaker_filter}. Available: {available}"
-            )
-        
-        return filtered
+        try:
+            return get_scrapers(bookmaker_filter)
+        except ValueError as e:
+            raise CommandError(str(e))
     
-    async def _run_scrapers(self, scraper_classes: list[type[BaseScraper]]) -> dict:
-        """Run all scrapers and collect results."""
+    async def _run_scrapers(
+        self,
+        scraper_classes: list[type[BaseScraper]],
+        concurrency: int = 1,
+        block_resources: bool | None = None,
+        retries: int = 0,
+        probes: set[str] = frozenset(),
+    ) -> dict:
+        """
+        Run all scrapers and collect results.
+        
+        Up to `concurrency` scrapers run at once, sharing a single Chromium
+        from a BrowserPool. Each scraper's failure is caught individually,
+        so one broken bookmaker never aborts the others. A failed scraper
+        is retried up to `retries` times, except circuit breaker probes
+        (`probes`), which get a single attempt.
+        """
         results = {
             "success": [],
             "failed": [],
         }
+        semaphore = asyncio.Semaphore(concurrency)
         
-        for scraper_class in scraper_classes:
-            scraper = scraper_class()
-            self.stdout.write(f"  Scraping {scraper.name}...")
-            
-            try:
-                async with scraper:
-                    data = await scraper.scrape()
-                
-                results["success"].append({
-                    "name": scraper.name,
-                    "data": data,
-                })
-                self.stdout.write(
-                    self.style.SUCCESS(f"    {scraper.name}: {len(data)} results")
-                )
-                
-            except Exception as e:
-                error_msg = str(e)
-                results["failed"].append({
-                    "name": scraper.name,
-                    "error": error_msg,
-                })
-                self.stdout.write(
-                    self.style.ERROR(f"    {scraper.name}: FAILED - {error_msg}")
+        async with BrowserPool(
+            max_contexts=concurrency,
+            headless=BaseScraper.HEADLESS,
+        ) as pool:
+            async def run_one(scraper_class: type[BaseScraper]) -> None:
+                attempts = 1 if scraper_class.name in probes else retries + 1
+                await self._run_scraper(
+                    scraper_class, pool, results, block_resources, attempts, semaphore
                 )
-                logger.exception(f"Scraper {scraper.name} failed")
+            
+            await asyncio.gather(*(run_one(cls) for cls in scraper_classes))
+        
+        # Keep the summary order stable regardless of completion order
+        order = {cls.name: i for i, cls in enumerate(scraper_classes)}
+        for key in ("success", "failed"):
+            results[key].sort(key=lambda r: order.get(r["name"], len(order)))
         
         return results
     
-    def _save_odds(self, bookmaker_name: str, odds_data: list[dict]) -> None:
-        """Save scraped odds to database."""
-        today = date.today()
+    async def _run_scraper(
+        self,
+        scraper_class: type[BaseScraper],
+        pool: BrowserPool,
+        results: dict,
+        block_resources: bool | None = None,
+        attempts: int = 1,
+        slots: asyncio.Semaphore | None = None,
+    ) -> None:
+        """
+        Run a single scraper, recording the outcome in `results`.
         
-        # Get or create bookmaker
-        bookmaker, _ = Bookmaker.objects.get_or_create(name=bookmaker_name)
+        Failed attempts are retried after retry_delay() until `attempts`
+        have been made. Each attempt holds one of `slots` (the concurrency
+        limit) only while it scrapes, not while it waits to retry.
+        """
+        slots = slots or asyncio.Semaphore(1)
         
-        saved_count = 0
-        for item in odds_data:
-            party_code = item["party"]
-            odds_value = item["odds"]
+        for attempt in range(1, attempts + 1):
+            scraper = scraper_class(pool=pool, block_resources=block_resources)
+            retry = f" (attempt {attempt}/{attempts})" if attempt > 1 else ""
             
-            # Get party (must already exist in DB)
-            try:
-                party = Party.objects.get(code=party_code)
-            except Party.DoesNotExist:
-                logger.warning(f"Party not found: {party_code} - skipping")
-                continue
+            async with slots:
+                self.stdout.write(f"  Scraping {scraper.name}...{retry}")
+                try:
+                    async with scraper:
+                        data = await scraper.scrape()
+                except Exception as e:
+                    error_msg = str(e)
+                    logger.exception(f"Scraper {scraper.name} failed (attempt {attempt}/{attempts})")
+                else:
+                    results["success"].append({
+                        "name": scraper.name,
+                        "data": data,
+                    })
+                    self.stdout.write(
+                        self.style.SUCCESS(f"    {scraper.name}: {len(data)} results")
+                    )
+                    self.stdout.write(f"      {scraper.request_stats.summary()}")
+                    self.stdout.write(f"      {scraper.timings.summary()}")
+                    self._recorder.add_bookmaker(scraper.name, scraper.timings, attempts=attempt)
+                    return
             
-            # Update or create the odds reading for today
-            _, created = OddsReading.objects.update_or_create(
-                date=today,
-                bookmaker=bookmaker,
-                party=party,
-                defaults={"odds": odds_value},
+            if attempt < attempts:
+                delay = retry_delay(attempt)
+                self.stdout.write(self.style.WARNING(
+                    f"    {scraper.name}: FAILED - {error_msg} (retrying in {delay:.1f}s)"
+                ))
+                await asyncio.sleep(delay)
+        
+        results["failed"].append({
+            "name": scraper.name,
+            "error": error_msg,
+        })
+        self._recorder.add_bookmaker(
+            scraper.name, scraper.timings, error=error_msg, attempts=attempts
+        )
+        self.stdout.write(
+            self.style.ERROR(f"    {scraper.name}: FAILED - {error_msg}")
+        )
+    
+    def _check_circuits(self, names: list[str]) -> tuple[dict, set[str]]:
+        """
+        Look up circuit breakers, reporting (and recording) skipped bookmakers.
+        
+        Returns:
+            ({name: retry_at} to skip, {names to probe})
+        """
+        skipped, probes = circuit_breaker.check_circuits(names)
+        for name, retry_at in skipped.items():
+            reason = f"circuit open until {timezone.localtime(retry_at):%Y-%m-%d %H:%M}"
+            self._recorder.add_skipped(name, reason)
+            self.stdout.write(self.style.WARNING(f"  Skipping {name}: {reason}"))
+        for name in probes:
+            self.stdout.write(f"  Probing {name} (circuit half-open)")
+        return skipped, probes
+    
+    def _update_circuits(self, results: dict) -> None:
+        """Close circuits of bookmakers that succeeded, count failures on the rest."""
+        for success in results["success"]:
+            circuit_breaker.record_success(success["name"])
+        for failure in results["failed"]:
+            retry_at = circuit_breaker.record_failure(failure["name"], failure["error"])
+            if retry_at:
+                self.stdout.write(self.style.WARNING(
+                    f"    {failure['name']}: circuit opened, next probe at "
+                    f"{timezone.localtime(retry_at):%Y-%m-%d %H:%M}"
+                ))
+    
+    def _save_odds(
+        self,
+        successes: list[dict],
+        price_cache: LastPriceCache | None = None,
+    ) -> int:
+        """
+        Save the scraped odds that changed, in a single transaction.
+        
+        Returns:
+            Number of daily readings written (0 if no price moved).
+        """
+        with self._recorder.timings.phase("save"):
+            saved = save_intraday_readings(
+                successes, price_cache=price_cache, aggregator=self._aggregator
             )
-            
-            action = "Created" if created else "Updated"
-            logger.debug(f"{action} {bookmaker_name}/{party_code}: {odds_value}")
-            saved_count += 1
         
-        self.stdout.write(f"    Saved {saved_count} records for {bookmaker_name}")
+        for bookmaker_name, saved_count in saved.items():
+            self.stdout.write(f"    Saved {saved_count} changed records for {bookmaker_name}")
+        return sum(saved.values())
+    
+    def _publish(self, options: dict) -> None:
+        """Refresh consensus, response caches and snapshots after a change."""
+        self._update_consensus(verify=options.get("verify_consensus", False))
+        bump_data_version()
+        if not options.get("no_snapshot"):
+            self._export_snapshot()
+    
+    def _update_consensus(self, verify: bool = False) -> None:
+        """Write the MarketConsensus rows the saved readings changed."""
+        with self._recorder.timings.phase("consensus"):
+            count = self._aggregator.flush()
+        self.stdout.write(f"    Updated market consensus for {count} parties")
+        
+        if verify:
+            mismatches = self._aggregator.verify()
+            if mismatches:
+                self.stdout.write(self.style.WARNING(
+                    f"    Consensus verification found {len(mismatches)} mismatches"
+                ))
+            else:
+                self.stdout.write("    Consensus verified against full recompute")
+    
+    def _export_snapshot(self) -> None:
+        """Write static JSON snapshots; a failure here doesn't fail the scrape."""
+        try:
+            with self._recorder.timings.phase("snapshot"):
+                written = export_snapshot()
+        except Exception as e:
+            logger.exception("Snapshot export failed")
+            self.stdout.write(self.style.WARNING(f"    Snapshot export failed: {e}"))
+            return
+        self.stdout.write(f"    Exported {len(written)} snapshot files")
+    
+    def _record_run(self, rows_written: int, bookmakers: dict | None = None) -> None:
+        """
+        Store the run's timings as a ScrapeRun and export them to the
+        Prometheus textfile (if configured). Failure here doesn't fail the
+        scrape.
+        """
+        try:
+            run = self._recorder.finish(rows_written)
+            write_textfile(run, bookmakers=bookmakers)
+        except Exception as e:
+            logger.exception("Recording scrape run failed")
+            self.stdout.write(self.style.WARNING(f"    Recording run timings failed: {e}"))
+            return
+        self.stdout.write(f"  Run {run.duration * 1000:.0f}ms: {self._recorder.timings.summary()}")
     
     def _report_summary(self, successes: list, failures: list) -> None:
         """Print summary of scrape results."""
@@ -186,4 +388,3 @@ class Command(BaseCommand):
                 self.stdout.write(f"    - {f['name']}: {f['error']}")
         
         self.stdout.write(self.style.NOTICE("=" * 50))
-
@@ -0,0 +1,169 @@
+"""
+Long-running intraday scraper: keeps one warm browser and scrapes each
+bookmaker on its own adaptive interval (see polls.scrapers.scheduler).
+
+Usage:
+    python manage.py scrape_scheduler
+    python manage.py scrape_scheduler --bookmaker pointsbet --interval 120
+    python manage.py scrape_scheduler --max-interval 1800 --backoff 1.5
+
+Stop with Ctrl+C or SIGTERM; the scrapes in flight finish first.
+"""
+
+import asyncio
+import logging
+import signal
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from polls.scrapers import BaseScraper, BrowserPool, ScrapeSchedule
+from polls.services.consensus import ConsensusAggregator
+from polls.services.notifications import send_scrape_failure_alert
+from polls.services.odds_writer import LastPriceCache
+from polls.services.run_metrics import RunRecorder
+
+from .scrape_odds import Command as ScrapeOddsCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(ScrapeOddsCommand):
+    help = "Continuously scrape bookmakers on adaptive per-bookmaker intervals"
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Base seconds between scrapes for every bookmaker "
+                 "(default: each scraper's SCRAPE_INTERVAL)",
+        )
+        parser.add_argument(
+            "--max-interval",
+            type=float,
+            default=3600,
+            help="Longest back-off interval in seconds (default: 3600)",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=2.0,
+            help="Interval multiplier when prices are unchanged or a scrape fails "
+                 "(default: 2.0)",
+        )
+    
+    def handle(self, *args, **options):
+        scrapers = self._get_scrapers(options.get("bookmaker"))
+        self._price_cache = LastPriceCache()
+        self._price_cache.warm()
+        # Reloads touched days before each flush: scrape_odds or
+        # rebuild_consensus may have written since the last cycle
+        self._aggregator = ConsensusAggregator(options["devig_method"], reload=True)
+        self._latest_bookmakers: dict[str, dict] = {}  # For the metrics textfile
+        
+        concurrency = options.get("concurrency") or 1
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options["backoff"] < 1:
+            raise CommandError("--backoff must be at least 1")
+        if options["retries"] < 0:
+            raise CommandError("--retries must not be negative")
+        
+        self.stdout.write(self.style.NOTICE(
+            f"Starting scrape scheduler for {', '.join(s.name for s in scrapers)}..."
+        ))
+        asyncio.run(self._run_forever(scrapers, concurrency, options))
+        self.stdout.write(self.style.NOTICE("Scrape scheduler stopped"))
+    
+    async def _run_forever(
+        self,
+        scraper_classes: list[type[BaseScraper]],
+        concurrency: int,
+        options: dict,
+    ) -> None:
+        """Scrape due bookmakers, save, then sleep until the next is due."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        
+        by_name = {cls.name: cls for cls in scraper_classes}
+        schedule = ScrapeSchedule(
+            {
+                cls.name: options.get("interval") or cls.SCRAPE_INTERVAL
+                for cls in scraper_classes
+            },
+            backoff=options["backoff"],
+            max_interval=options["max_interval"],
+        )
+        block_resources = False if options.get("no_block_resources") else None
+        use_breaker = not options.get("dry_run") and not options.get("ignore_circuit_breaker")
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async with BrowserPool(
+            max_contexts=concurrency,
+            headless=BaseScraper.HEADLESS,
+        ) as pool:
+            async def run_one(scraper_class: type[BaseScraper], results: dict, probes: set[str]) -> None:
+                attempts = 1 if scraper_class.name in probes else options["retries"] + 1
+                await self._run_scraper(
+                    scraper_class, pool, results, block_resources, attempts, semaphore
+                )
+            
+            while not stop.is_set():
+                due = schedule.due()
+                if due:
+                    self._recorder = RunRecorder("scrape_scheduler")
+                    probes = set()
+                    if use_breaker:
+                        skipped, probes = await sync_to_async(self._check_circuits)(due)
+                        for name, retry_at in skipped.items():
+                            schedule.defer(name, (retry_at - timezone.now()).total_seconds())
+                        due = [name for name in due if name not in skipped]
+                    
+                    results = {"success": [], "failed": []}
+                    await asyncio.gather(*(run_one(by_name[name], results, probes) for name in due))
+                    await sync_to_async(self._process_results)(results, schedule, options)
+                
+                try:
+                    await asyncio.wait_for(stop.wait(), schedule.seconds_until_due())
+                except asyncio.TimeoutError:
+                    pass
+    
+    def _process_results(self, results: dict, schedule: ScrapeSchedule, options: dict) -> None:
+        """Reschedule each bookmaker, then save and publish what was scraped."""
+        for success in results["success"]:
+            schedule.record_success(success["name"], success["data"])
+        
+        new_failures = [
+            failure for failure in results["failed"]
+            if schedule.record_failure(failure["name"]) == 1
+        ]
+        
+        for result in results["success"] + results["failed"]:
+            interval = schedule.bookmakers[result["name"]].interval
+            self.stdout.write(f"    {result['name']}: next run in {interval:.0f}s")
+        
+        if not options.get("dry_run") and not options.get("ignore_circuit_breaker"):
+            self._update_circuits(results)
+        
+        rows_written = 0
+        if results["success"] and not options.get("dry_run"):
+            try:
+                rows_written = self._save_odds(results["success"], self._price_cache)
+                if rows_written:
+                    self._publish(options)
+            except Exception:
+                # Keep the daemon alive; the next run retries the write
+                logger.exception("Saving intraday odds failed")
+        
+        # Each cycle only scrapes the due bookmakers; export the latest of all
+        self._latest_bookmakers.update(self._recorder.bookmakers)
+        if not options.get("dry_run"):
+            self._record_run(rows_written, bookmakers=self._latest_bookmakers)
+        
+        # Alert once per failure streak, not on every retry
+        if new_failures and not options.get("no_notify"):
+            send_scrape_failure_alert(new_failures)
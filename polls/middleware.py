@@ -0,0 +1,104 @@
+"""
+Request timing middleware.
+
+PerformanceMiddleware times every request end to end and attributes the
+time to the database, templates and the rest, so a slow dashboard can be
+pinned on the ORM, rendering or something upstream:
+    
+    - totals per view feed the /metrics/ endpoint
+      (polls.services.request_metrics),
+    - each response carries a Server-Timing header (visible in browser
+      dev tools),
+    - requests slower than SLOW_REQUEST_THRESHOLD are logged with their SQL.
+"""
+
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from polls.services.request_metrics import (
+    RequestStats,
+    collect_request_stats,
+    request_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_VIEW = "<unresolved>"  # 404s and requests rejected before routing
+
+
+class PerformanceMiddleware:
+    """
+    Record latency, query, template and cache figures for each request.
+    
+    Put it first in MIDDLEWARE so the latency covers the rest of the
+    stack. Works under WSGI and ASGI; for streaming responses (the SSE
+    stream) the latency is the time to the response headers.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        started = time.perf_counter()
+        with collect_request_stats() as stats:
+            response = self.get_response(request)
+        self._finish(request, response, time.perf_counter() - started, stats)
+        request_metrics.flush()
+        return response
+    
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect_request_stats() as stats:
+            response = await self.get_response(request)
+        self._finish(request, response, time.perf_counter() - started, stats)
+        # The flush is file I/O; keep it off the event loop, and only pay
+        # for the thread hop when one is due
+        if request_metrics.flush_due():
+            await sync_to_async(request_metrics.flush, thread_sensitive=False)()
+        return response
+    
+    def _finish(self, request, response, seconds: float, stats: RequestStats) -> None:
+        """Record the request, tag the response and log it if slow."""
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED_VIEW
+        
+        request_metrics.record(view, response.status_code, seconds, stats)
+        
+        response["Server-Timing"] = (
+            f'db;dur={stats.query_seconds * 1000:.1f};desc="{stats.queries} queries", '
+            f"tpl;dur={stats.template_seconds * 1000:.1f}, "
+            f"total;dur={seconds * 1000:.1f}"
+        )
+        
+        slow_threshold = getattr(settings, "SLOW_REQUEST_THRESHOLD", None)
+        if slow_threshold is not None and seconds >= slow_threshold:
+            self._log_slow(request, view, seconds, stats)
+    
+    def _log_slow(self, request, view: str, seconds: float, stats: RequestStats) -> None:
+        """Log a slow request with the SQL it ran, slowest statement first."""
+        statements = "\n".join(
+            f"    {query_seconds * 1000:8.1f}ms  {sql}"
+            for sql, query_seconds in sorted(stats.captured, key=lambda q: q[1], reverse=True)
+        )
+        if stats.queries > len(stats.captured):
+            statements += f"\n    ... {stats.queries - len(stats.captured)} more"
+        
+        logger.warning(
+            f"Slow request {request.method} {request.get_full_path()} ({view}): "
+            f"{seconds * 1000:.0f}ms total, "
+            f"{stats.queries} queries in {stats.query_seconds * 1000:.0f}ms, "
+            f"templates {stats.template_seconds * 1000:.0f}ms, "
+            f"cache {stats.cache_hits} hits / {stats.cache_misses} misses"
+            + (f"\n{statements}" if statements else "")
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_marketconsensus'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='marketconsensus',
+            options={'ordering': ['-timestamp'], 'verbose_name_plural': 'Market consensus'},
+        ),
+        migrations.CreateModel(
+            name='IntradayOddsReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('odds', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('bookmaker', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='polls.bookmaker')),
+                ('party', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='polls.party')),
+            ],
+            options={
+                'ordering': ['-timestamp', 'party', 'bookmaker'],
+                'indexes': [models.Index(fields=['timestamp'], name='idx_intraday_timestamp'), models.Index(fields=['bookmaker', 'party', 'timestamp'], name='idx_intraday_series')],
+            },
+        ),
+    ]
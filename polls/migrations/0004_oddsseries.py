@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:24
+
+from datetime import date
+from itertools import groupby
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+
+def populate_odds_series(apps, schema_editor):
+    """Pack existing daily readings into one OddsSeries row per bookmaker/party."""
+    OddsReading = apps.get_model('polls', 'OddsReading')
+    OddsSeries = apps.get_model('polls', 'OddsSeries')
+    epoch = date(1970, 1, 1)
+
+    readings = OddsReading.objects.order_by('bookmaker_id', 'party_id', 'date').values_list(
+        'bookmaker_id', 'party_id', 'date', 'odds'
+    )
+    rows = []
+    for (bookmaker_id, party_id), points in groupby(readings, key=lambda r: r[:2]):
+        points = list(points)
+        rows.append(OddsSeries(
+            bookmaker_id=bookmaker_id,
+            party_id=party_id,
+            days=np.array([(p[2] - epoch).days for p in points], dtype='<i4').tobytes(),
+            odds=np.array([int(p[3] * 100) for p in points], dtype='<i4').tobytes(),
+        ))
+    OddsSeries.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_intradayoddsreading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OddsSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.BinaryField(default=bytes)),
+                ('odds', models.BinaryField(default=bytes)),
+                ('bookmaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.bookmaker')),
+                ('party', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.party')),
+            ],
+            options={
+                'verbose_name_plural': 'odds series',
+                'constraints': [models.UniqueConstraint(fields=('bookmaker', 'party'), name='unique_odds_series')],
+            },
+        ),
+        migrations.RunPython(populate_odds_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_oddsseries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='marketconsensus',
+            name='polls_marke_timesta_92fe67_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='oddsreading',
+            name='idx_odds_date',
+        ),
+        migrations.RemoveIndex(
+            model_name='oddsreading',
+            name='idx_odds_date_party',
+        ),
+        migrations.AddIndex(
+            model_name='marketconsensus',
+            index=models.Index(fields=['party', 'timestamp', 'fair_probability', 'averaged_odds', 'bookmaker_count'], name='idx_consensus_series'),
+        ),
+        migrations.AddIndex(
+            model_name='oddsreading',
+            index=models.Index(fields=['date', 'bookmaker', 'party', 'odds'], name='idx_odds_day'),
+        ),
+        migrations.AddIndex(
+            model_name='oddsreading',
+            index=models.Index(fields=['bookmaker', 'party', 'date', 'odds'], name='idx_odds_latest'),
+        ),
+    ]
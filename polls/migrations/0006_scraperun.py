@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('command', models.CharField(max_length=50)),
+                ('duration', models.FloatField()),
+                ('succeeded', models.PositiveSmallIntegerField(default=0)),
+                ('failed', models.PositiveSmallIntegerField(default=0)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('phases', models.JSONField(default=dict)),
+                ('bookmakers', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['started_at'], name='idx_scraperun_started')],
+            },
+        ),
+    ]
@@ -32,9 +32,18 @@ class OddsReading(models.Model):
                 name='unique_daily_reading'
             ),
         ]
+        # Both indexes carry odds so the hot reads never touch the table:
+        # a day's readings (consensus), and the newest reading per
+        # bookmaker/party (price cache warmup, see LastPriceCache.warm)
         indexes = [
-            models.Index(fields=['date'], name='idx_odds_date'),
-            models.Index(fields=['date', 'party'], name='idx_odds_date_party'),
+            models.Index(
+                fields=['date', 'bookmaker', 'party', 'odds'],
+                name='idx_odds_day',
+            ),
+            models.Index(
+                fields=['bookmaker', 'party', 'date', 'odds'],
+                name='idx_odds_latest',
+            ),
         ]
         ordering = ['-date', 'party', 'bookmaker']
 
@@ -47,6 +56,61 @@ class OddsReading(models.Model):
         return 1.0 / float(self.odds) if self.odds else None
 
 
+class OddsSeries(models.Model):
+    """
+    One bookmaker/party's full daily odds history, packed column-wise.
+    
+    `days` holds little-endian int32 day offsets from 1970-01-01 and `odds`
+    the matching int32 prices in hundredths, both in date order (see
+    polls.services.series_store). A chart read is one row and two
+    np.frombuffer() calls instead of a row per day. Maintained from
+    OddsReading by the write path; `rebuild_odds_series` regenerates it.
+    """
+    bookmaker = models.ForeignKey(Bookmaker, on_delete=models.CASCADE)
+    party = models.ForeignKey(Party, on_delete=models.CASCADE)
+    days = models.BinaryField(default=bytes)
+    odds = models.BinaryField(default=bytes)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bookmaker", "party"],
+                name="unique_odds_series",
+            ),
+        ]
+        verbose_name_plural = "odds series"
+    
+    def __str__(self):
+        return f"{self.bookmaker} | {self.party}: {len(self.days) // 4} days"
+
+
+class IntradayOddsReading(models.Model):
+    """
+    Price change events: one row each time a bookmaker's odds for a party
+    move, stamped with the scrape time. Written by both scrape_scheduler
+    and scrape_odds (via save_intraday_readings); unchanged prices add no
+    rows. OddsReading keeps one row per day as the daily rollup (last
+    price of the day); this table keeps the movement within the day.
+    """
+    timestamp = models.DateTimeField()
+    bookmaker = models.ForeignKey(Bookmaker, on_delete=models.PROTECT)
+    party = models.ForeignKey(Party, on_delete=models.PROTECT)
+    odds = models.DecimalField(max_digits=6, decimal_places=2)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=["timestamp"], name="idx_intraday_timestamp"),
+            models.Index(
+                fields=["bookmaker", "party", "timestamp"],
+                name="idx_intraday_series",
+            ),
+        ]
+        ordering = ["-timestamp", "party", "bookmaker"]
+    
+    def __str__(self):
+        return f"{self.timestamp} | {self.bookmaker} | {self.party}: {self.odds}"
+
+
 # In polls/models.py - add this new model
 
 class MarketConsensus(models.Model):
@@ -66,8 +130,13 @@ class MarketConsensus(models.Model):
     
     class Meta:
         ordering = ["-timestamp"]
+        # Covering index for chart series (party over a time range); the
+        # unique constraint already serves lookups by timestamp
         indexes = [
-            models.Index(fields=["timestamp", "party"]),
+            models.Index(
+                fields=["party", "timestamp", "fair_probability", "averaged_odds", "bookmaker_count"],
+                name="idx_consensus_series",
+            ),
         ]
         # One consensus entry per party per timestamp
         unique_together = ["timestamp", "party"]
@@ -75,3 +144,59 @@ class MarketConsensus(models.Model):
     
     def __str__(self):
         return f"{self.party.code} - {self.fair_probability:.1%} @ {self.timestamp}"
+
+
+class ScrapeRun(models.Model):
+    """
+    Timing record of one scrape_odds run (or one scrape_scheduler cycle).
+    
+    `bookmakers` holds each scraper's outcome and phase timings (see
+    polls.scrapers.timing); `phases` holds the run-level steps that follow
+    the scrape - save, consensus, snapshot. Durations are in seconds.
+    Written by polls.services.run_metrics.RunRecorder.
+    """
+    started_at = models.DateTimeField()
+    command = models.CharField(max_length=50)
+    duration = models.FloatField()
+    succeeded = models.PositiveSmallIntegerField(default=0)
+    failed = models.PositiveSmallIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    phases = models.JSONField(default=dict)
+    bookmakers = models.JSONField(default=dict)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=["started_at"], name="idx_scraperun_started"),
+        ]
+        ordering = ["-started_at"]
+    
+    def __str__(self):
+        return f"{self.started_at} | {self.command}: {self.succeeded} ok, {self.failed} failed"
+
+
+class CircuitBreaker(models.Model):
+    """
+    Per-bookmaker circuit breaker state, shared by scrape_odds runs and
+    the scrape_scheduler daemon (see polls.services.circuit_breaker).
+    
+    closed: scrape normally. open: skip until `retry_at`. half_open: the
+    next scrape is a single-attempt probe that closes or re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATES = [
+        (CLOSED, "Closed"),
+        (OPEN, "Open"),
+        (HALF_OPEN, "Half open"),
+    ]
+    
+    bookmaker = models.OneToOneField(Bookmaker, on_delete=models.CASCADE, related_name="circuit")
+    state = models.CharField(max_length=10, choices=STATES, default=CLOSED)
+    failures = models.PositiveSmallIntegerField(default=0)  # Consecutive failed runs
+    opened_at = models.DateTimeField(null=True, blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"{self.bookmaker}: {self.state} ({self.failures} failures)"
@@ -0,0 +1,67 @@
+"""
+Database routing: dashboard reads go to the read-only "replica" alias,
+writes (and anything that must see them) go to "default".
+
+With SQLite the replica is the same file opened with mode=ro, so web
+workers never take a write lock; with Postgres it would be a standby.
+If no "replica" alias is configured, everything stays on "default".
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+_pinned = ContextVar("pin_primary", default=False)
+
+
+@contextmanager
+def pin_primary():
+    """
+    Send every read in this context to the primary.
+    
+    Used by the scrape commands, whose reads (party lookups, last-price
+    warmup, consensus totals) must see their own writes. The flag is a
+    ContextVar, so it follows asyncio tasks and sync_to_async threads.
+    
+    Example:
+        >>> with pin_primary():
+        ...     LastPriceCache().warm()
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the replica unless pinned or inside a write transaction."""
+    
+    def db_for_read(self, model, **hints):
+        if REPLICA_DB_ALIAS not in settings.DATABASES or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        # A test MIRROR is the primary's own database; a second connection
+        # to it couldn't see the primary's open test transaction
+        if (
+            connections[REPLICA_DB_ALIAS].settings_dict["NAME"]
+            == connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+        ):
+            return DEFAULT_DB_ALIAS
+        # Reads inside an atomic block on the primary must see its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+    
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -5,6 +5,8 @@ Each scraper uses Playwright to handle JavaScript-rendered SPAs.
 """
 
 from .base import BaseScraper, OddsResult
+from .browser_pool import BrowserPool
+from .scheduler import ScrapeSchedule
 from .betr import BetrScraper
 from .pointsbet import PointsBetScraper
 from .ladbrokes import LadbrokesScraper
@@ -16,11 +18,40 @@ ALL_SCRAPERS = [
     LadbrokesScraper,
 ]
 
+
+def get_scrapers(bookmaker_filter: str | None = None) -> list[type[BaseScraper]]:
+    """
+    Scraper classes whose name contains `bookmaker_filter` (case-insensitive).
+    
+    Args:
+        bookmaker_filter: Part of a bookmaker name, e.g. "betr". All
+            scrapers if empty.
+    
+    Returns:
+        Matching scraper classes, in ALL_SCRAPERS order.
+    
+    Raises:
+        ValueError: If no scraper matches.
+    """
+    if not bookmaker_filter:
+        return ALL_SCRAPERS
+    
+    filter_lower = bookmaker_filter.lower()
+    filtered = [s for s in ALL_SCRAPERS if filter_lower in s.name.lower()]
+    if not filtered:
+        available = ", ".join(s.name for s in ALL_SCRAPERS)
+        raise ValueError(f"Unknown bookmaker: {bookmaker_filter}. Available: {available}")
+    return filtered
+
+
 __all__ = [
     "BaseScraper",
     "OddsResult",
+    "BrowserPool",
+    "ScrapeSchedule",
     "BetrScraper",
     "PointsBetScraper",
     "LadbrokesScraper",
     "ALL_SCRAPERS",
+    "get_scrapers",
 ]
@@ -4,14 +4,41 @@ All bookmaker scrapers inherit from this class.
 """
 
 import logging
-from abc import ABC, abstractmethod
+import re
+from abc import ABC
+from collections import Counter
 from decimal import Decimal
 from typing import TypedDict
+from urllib.parse import urlsplit
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import BrowserContext, Page, Response, Route
+
+from .browser_pool import BrowserPool
+from .timing import PhaseTimer
 
 logger = logging.getLogger(__name__)
 
+# How a scraper decides the odds have rendered (see BaseScraper.wait_for_odds)
+WAIT_STRATEGIES = ("stable", "selector", "networkidle")
+
+# In-page check for the "stable" strategy: true once the outcomes exist and
+# their count and text haven't changed for `window_ms`. State is kept on
+# window, keyed by selector, between polls.
+STABLE_OUTCOMES_JS = """([selector, attribute, window_ms]) => {
+    const outcomes = Array.from(document.querySelectorAll(selector));
+    const signature = outcomes.length + "|" + outcomes.map((el) =>
+        attribute ? el.getAttribute(attribute) : el.innerText
+    ).join("|");
+    
+    const state = (window.__betpollStable = window.__betpollStable || {});
+    const now = performance.now();
+    if (!outcomes.length || !state[selector] || state[selector].signature !== signature) {
+        state[selector] = {signature, since: now};
+        return false;
+    }
+    return now - state[selector].since >= window_ms;
+}"""
+
 
 class OddsResult(TypedDict):
     """Structure for scraped odds data."""
@@ -19,12 +46,41 @@ class OddsResult(TypedDict):
     odds: Decimal
 
 
+class RequestStats:
+    """Counters for the requests a scraper's page made or had blocked."""
+    
+    def __init__(self):
+        self.blocked: Counter[str] = Counter()  # Keyed by block reason
+        self.allowed = 0
+        self.bytes_received = 0  # Sum of Content-Length of allowed responses
+    
+    @property
+    def blocked_total(self) -> int:
+        return sum(self.blocked.values())
+    
+    def summary(self) -> str:
+        """One-line human readable summary, e.g. for command output."""
+        kb = self.bytes_received / 1024
+        if not self.blocked:
+            return f"{self.allowed} requests, {kb:.0f} KB downloaded"
+        reasons = ", ".join(f"{k}: {v}" for k, v in self.blocked.most_common())
+        return (
+            f"{self.allowed} requests, {kb:.0f} KB downloaded, "
+            f"blocked {self.blocked_total} ({reasons})"
+        )
+
+
 class BaseScraper(ABC):
     """
     Abstract base class for bookmaker scrapers.
     
-    Handles Playwright browser lifecycle and provides common configuration.
-    Subclasses must implement the `scrape()` method.
+    Handles Playwright browser lifecycle and implements the scrape itself.
+    Subclasses set the URL and selectors, and override the parse hooks
+    (parse_api_payload, split_outcome_attribute, map_party_name) where
+    the bookmaker needs them.
+    
+    Pass a shared `BrowserPool` to reuse one Chromium across scrapers;
+    without one, the scraper launches (and closes) its own browser.
     """
     
     # Override in subclasses
@@ -34,60 +90,410 @@ class BaseScraper(ABC):
     # Browser configuration
     HEADLESS = True
     TIMEOUT = 30000  # 30 seconds
+    SCRAPE_INTERVAL = 300  # Seconds between runs under scrape_scheduler
     USER_AGENT = (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/120.0.0.0 Safari/537.36"
     )
     
-    def __init__(self):
-        self._playwright = None
-        self._browser: Browser | None = None
+    # Request blocking - we only parse the DOM/JSON, so anything purely
+    # visual or analytical is aborted before it hits the network.
+    # Subclasses can extend these, e.g.
+    #   BLOCKED_HOSTS = BaseScraper.BLOCKED_HOSTS + ("cdn.example.com",)
+    BLOCK_RESOURCES = True
+    BLOCKED_RESOURCE_TYPES: frozenset[str] = frozenset({"image", "media", "font"})
+    BLOCKED_HOSTS: tuple[str, ...] = (
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "facebook.net",
+        "facebook.com",
+        "connect.facebook.net",
+        "hotjar.com",
+        "clarity.ms",
+        "bat.bing.com",
+        "analytics.tiktok.com",
+        "segment.io",
+        "segment.com",
+        "mixpanel.com",
+        "amplitude.com",
+        "newrelic.com",
+        "nr-data.net",
+        "datadoghq.com",
+        "sentry.io",
+        "optimizely.com",
+        "branch.io",
+        "onetrust.com",
+        "cookielaw.org",
+        "livechatinc.com",
+        "intercom.io",
+    )
+    # Hosts that must never be blocked, whatever the rules above say
+    ALLOWED_HOSTS: tuple[str, ...] = ()
     
-    async def __aenter__(self):
-        """Set up Playwright browser on context entry."""
-        self._playwright = await async_playwright().start()
-        self._browser = await self._playwright.chromium.launch(
-            headless=self.HEADLESS
+    # Network capture - regex matched against response URLs. When set, odds
+    # are parsed from the SPA's own JSON API response (see parse_api_payload)
+    # and the rendered DOM is only used as a fallback.
+    API_URL_PATTERN: str | None = None
+    API_CAPTURE_TIMEOUT = 15000  # 15 seconds
+    
+    # Readiness (see wait_for_odds). "stable" navigates to DOMContentLoaded
+    # and returns once the outcomes' count and text have held still for
+    # STABLE_WINDOW ms; "selector" returns as soon as CONTAINER_SELECTOR
+    # exists; "networkidle" is the old behaviour - wait for the network to
+    # go quiet, then for the selector.
+    WAIT_STRATEGY = "stable"
+    STABLE_WINDOW = 500  # ms
+    STABLE_POLL_INTERVAL = 100  # ms
+    CONTAINER_SELECTOR: str | None = None  # Defaults to OUTCOME_SELECTOR
+    
+    # DOM extraction (see extract_outcomes) - override in subclasses.
+    # NAME/ODDS selectors are relative to each outcome element. If
+    # OUTCOME_ATTRIBUTE is set, that attribute is read from the outcome
+    # element instead and split by split_outcome_attribute().
+    OUTCOME_SELECTOR: str = ""
+    NAME_SELECTOR: str | None = None
+    ODDS_SELECTOR: str | None = None
+    OUTCOME_ATTRIBUTE: str | None = None
+    
+    def __init__(
+        self,
+        pool: BrowserPool | None = None,
+        block_resources: bool | None = None,
+        wait_strategy: str | None = None,
+    ):
+        self.wait_strategy = wait_strategy or self.WAIT_STRATEGY
+        if self.wait_strategy not in WAIT_STRATEGIES:
+            raise ValueError(
+                f"Unknown wait strategy {self.wait_strategy!r} "
+                f"(expected one of {', '.join(WAIT_STRATEGIES)})"
+            )
+        
+        self._pool = pool
+        self._owns_pool = pool is None
+        self._contexts: list[BrowserContext] = []
+        self.block_resources = (
+            self.BLOCK_RESOURCES if block_resources is None else block_resources
         )
-        logger.info(f"[{self.name}] Browser launched")
+        self.request_stats = RequestStats()
+        self.timings = PhaseTimer()
+    
+    async def __aenter__(self):
+        """
+        Set up the browser on context entry.
+        
+        Uses the shared pool if one was passed in, otherwise launches a
+        private single-use pool for this scraper.
+        """
+        if self._owns_pool:
+            self._pool = BrowserPool(max_contexts=1, headless=self.HEADLESS)
+            with self.timings.phase("launch"):
+                await self._pool.start()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Clean up browser resources on context exit."""
-        if self._browser:
-            await self._browser.close()
-        if self._playwright:
-            await self._playwright.stop()
-        logger.info(f"[{self.name}] Browser closed")
+        """Return borrowed browser contexts and close any private browser."""
+        for context in self._contexts:
+            await self._pool.release(context)
+        self._contexts.clear()
+        
+        if self.block_resources:
+            logger.info(f"[{self.name}] Requests: {self.request_stats.summary()}")
+        
+        if self._owns_pool and self._pool:
+            await self._pool.close()
+            self._pool = None
+        logger.info(f"[{self.name}] Browser resources released")
         return False  # Don't suppress exceptions
     
     async def get_page(self) -> Page:
-        """Create a new page with configured settings."""
-        if not self._browser:
+        """Create a new page in an isolated context with configured settings."""
+        if not self._pool:
             raise RuntimeError("Browser not initialized. Use 'async with' context.")
         
-        context = await self._browser.new_context(
-            user_agent=self.USER_AGENT,
-            viewport={"width": 1920, "height": 1080},
-        )
-        page = await context.new_page()
-        page.set_default_timeout(self.TIMEOUT)
+        if not self._pool.running:
+            # Shared pools launch lazily - charge the launch to this scrape
+            with self.timings.phase("launch"):
+                await self._pool.ensure_started()
+        
+        with self.timings.phase("context"):
+            context = await self._pool.acquire(
+                user_agent=self.USER_AGENT,
+                viewport={"width": 1920, "height": 1080},
+            )
+            self._contexts.append(context)
+            if self.block_resources:
+                await context.route("**/*", self._route_request)
+            
+            page = await context.new_page()
+            page.set_default_timeout(self.TIMEOUT)
+        page.on("response", self._record_response)
         return page
     
-    @abstractmethod
+    def block_reason(self, url: str, resource_type: str) -> str | None:
+        """
+        Decide whether a request should be aborted.
+        
+        Args:
+            url: Full request URL.
+            resource_type: Playwright resource type (image, font, xhr, ...).
+        
+        Returns:
+            The reason to block ("tracker" or the resource type),
+            or None if the request should go through.
+        """
+        host = (urlsplit(url).hostname or "").lower()
+        
+        if self._host_matches(host, self.ALLOWED_HOSTS):
+            return None
+        if self._host_matches(host, self.BLOCKED_HOSTS):
+            return "tracker"
+        if resource_type in self.BLOCKED_RESOURCE_TYPES:
+            return resource_type
+        return None
+    
+    @staticmethod
+    def _host_matches(host: str, patterns: tuple[str, ...]) -> bool:
+        """True if host is one of patterns or a subdomain of one."""
+        return any(host == p or host.endswith("." + p) for p in patterns)
+    
+    async def _route_request(self, route: Route) -> None:
+        """Route handler: abort blocked requests, let the rest through."""
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        
+        if reason:
+            self.request_stats.blocked[reason] += 1
+            await route.abort()
+        else:
+            self.request_stats.allowed += 1
+            await route.continue_()
+    
+    def _record_response(self, response: Response) -> None:
+        """Tally downloaded bytes from the response's Content-Length."""
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.request_stats.bytes_received += int(length)
+    
+    async def navigate(self, page: Page) -> list[OddsResult] | None:
+        """
+        Load the market page, capturing odds from the network if possible.
+        
+        With API_URL_PATTERN set, navigation only waits for the matching
+        JSON response and returns the parsed odds as soon as it arrives.
+        Otherwise - or if capture times out or the payload can't be
+        parsed - None is returned and the caller continues with
+        wait_for_odds() and DOM extraction. Only the "networkidle" wait
+        strategy waits for the network to go quiet here.
+        
+        Returns:
+            Parsed OddsResult list from the API payload, or None.
+        """
+        logger.info(f"[{self.name}] Navigating to {self.url}")
+        
+        if not self.API_URL_PATTERN:
+            with self.timings.phase("navigate"):
+                await page.goto(self.url, wait_until=self._goto_wait_until())
+            return None
+        
+        pattern = re.compile(self.API_URL_PATTERN)
+        try:
+            with self.timings.phase("navigate"):
+                async with page.expect_response(
+                    lambda r: r.ok and pattern.search(r.url) is not None,
+                    timeout=self.API_CAPTURE_TIMEOUT,
+                ) as response_info:
+                    await page.goto(self.url, wait_until="commit")
+                response = await response_info.value
+                payload = await response.json()
+            with self.timings.phase("parse"):
+                results = self.parse_api_payload(payload)
+        except Exception as e:
+            logger.warning(
+                f"[{self.name}] Network capture failed, falling back to DOM: {e}"
+            )
+            with self.timings.phase("navigate"):
+                await page.wait_for_load_state(self._goto_wait_until())
+            return None
+        
+        if not results:
+            logger.warning(
+                f"[{self.name}] API payload had no odds, falling back to DOM"
+            )
+            with self.timings.phase("navigate"):
+                await page.wait_for_load_state(self._goto_wait_until())
+            return None
+        
+        logger.info(f"[{self.name}] Captured {len(results)} results from API")
+        return results
+    
+    def _goto_wait_until(self) -> str:
+        """Load state navigation waits for under the current wait strategy."""
+        return "networkidle" if self.wait_strategy == "networkidle" else "domcontentloaded"
+    
+    async def wait_for_odds(self, page: Page) -> None:
+        """
+        Wait until the odds have rendered, per the scraper's wait strategy.
+        
+        Raises:
+            playwright TimeoutError: If the odds don't appear (or never
+                settle) within TIMEOUT.
+        """
+        with self.timings.phase("wait"):
+            if self.wait_strategy == "stable":
+                await page.wait_for_function(
+                    STABLE_OUTCOMES_JS,
+                    arg=[self.OUTCOME_SELECTOR, self.OUTCOME_ATTRIBUTE, self.STABLE_WINDOW],
+                    polling=self.STABLE_POLL_INTERVAL,
+                    timeout=self.TIMEOUT,
+                )
+            else:
+                await page.wait_for_selector(
+                    self.CONTAINER_SELECTOR or self.OUTCOME_SELECTOR,
+                    timeout=self.TIMEOUT,
+                )
+    
+    async def _scrape_dom(self, page: Page) -> list[OddsResult]:
+        """Extract odds from the rendered DOM (when network capture is unavailable)."""
+        try:
+            await self.wait_for_odds(page)
+        except Exception as e:
+            logger.error(f"[{self.name}] Odds didn't render ({self.wait_strategy} wait): {e}")
+            raise
+        
+        pairs = await self.extract_outcomes(page)
+        return self.parse_outcomes(pairs)
+    
+    async def extract_outcomes(self, page: Page) -> list[tuple[str, str]]:
+        """
+        Pull every (name, odds text) pair off the page in one round-trip.
+        
+        Runs a single in-page evaluation over OUTCOME_SELECTOR instead of
+        awaiting query_selector/inner_text for each outcome.
+        
+        Returns:
+            List of (party name, odds text) tuples as displayed. Outcomes
+            missing a name or odds are dropped.
+        """
+        with self.timings.phase("extract"):
+            raw = await page.eval_on_selector_all(
+                self.OUTCOME_SELECTOR,
+                """(outcomes, [nameSelector, oddsSelector, attribute]) =>
+                    outcomes.map((el) => {
+                        if (attribute) {
+                            return [el.getAttribute(attribute), null];
+                        }
+                        const name = el.querySelector(nameSelector);
+                        const odds = el.querySelector(oddsSelector);
+                        return [
+                            name ? name.innerText : null,
+                            odds ? odds.innerText : null,
+                        ];
+                    })""",
+                [self.NAME_SELECTOR, self.ODDS_SELECTOR, self.OUTCOME_ATTRIBUTE],
+            )
+        logger.info(f"[{self.name}] Found {len(raw)} outcomes")
+        
+        pairs = []
+        for name, odds_text in raw:
+            if self.OUTCOME_ATTRIBUTE:
+                if not name:
+                    continue
+                pair = self.split_outcome_attribute(name)
+                if pair is None:
+                    continue
+                name, odds_text = pair
+            if name and odds_text:
+                pairs.append((name, odds_text))
+        return pairs
+    
+    def split_outcome_attribute(self, value: str) -> tuple[str, str] | None:
+        """
+        Split an OUTCOME_ATTRIBUTE value into (party name, odds text).
+        
+        Override in subclasses that set OUTCOME_ATTRIBUTE.
+        
+        Returns:
+            (name, odds text), or None if the value can't be parsed.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} sets OUTCOME_ATTRIBUTE but doesn't split it"
+        )
+    
+    def parse_outcomes(self, pairs: list[tuple[str, str]]) -> list[OddsResult]:
+        """
+        Convert (name, odds text) pairs into OddsResults.
+        
+        Odds text may include a leading "$" (e.g. "$1.85"). Pairs that
+        fail to parse are logged and skipped.
+        """
+        results: list[OddsResult] = []
+        
+        with self.timings.phase("parse"):
+            for party_name, odds_text in pairs:
+                try:
+                    odds_value = Decimal(odds_text.replace("$", "").strip())
+                    party_code = self.map_party_name(party_name)
+                except Exception as e:
+                    logger.warning(f"[{self.name}] Failed to parse outcome: {e}")
+                    continue
+                
+                results.append({
+                    "party": party_code,
+                    "odds": odds_value,
+                })
+                logger.debug(
+                    f"[{self.name}] Parsed: {party_name} -> {party_code} @ {odds_value}"
+                )
+        
+        return results
+    
+    def parse_api_payload(self, payload) -> list[OddsResult]:
+        """
+        Parse odds from a captured JSON API response.
+        
+        Override in subclasses that set API_URL_PATTERN.
+        
+        Args:
+            payload: Decoded JSON body of the matching response.
+        
+        Returns:
+            List of OddsResult dicts with party codes and decimal odds.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} sets API_URL_PATTERN but doesn't parse payloads"
+        )
+    
     async def scrape(self) -> list[OddsResult]:
         """
         Scrape odds from the bookmaker's website.
         
+        Captures the odds from the SPA's API response if API_URL_PATTERN
+        is set (see navigate()); otherwise, or if capture fails, waits for
+        the odds per the wait strategy and extracts them from the DOM.
+        Subclasses configure this through the class attributes and the
+        parse hooks rather than overriding it.
+        
         Returns:
             List of OddsResult dicts with party codes and decimal odds.
             Party codes should be: ALP, LNP, or OTH
         
         Raises:
-            Exception: If scraping fails for any reason.
+            ValueError: If the page had no odds.
+            Exception: If scraping fails for any other reason.
         """
-        pass
+        async with await self.get_page() as page:
+            results = await self.navigate(page)
+            if results is None:
+                results = await self._scrape_dom(page)
+        
+        if not results:
+            raise ValueError(f"[{self.name}] No odds data scraped")
+        
+        logger.info(f"[{self.name}] Scraped {len(results)} results")
+        return results
     
     def map_party_name(self, bookmaker_name: str) -> str:
         """
@@ -116,4 +522,3 @@ class BaseScraper(ABC):
         
         # Everything else (Greens, independents, etc.)
         return "OTH"
-
@@ -0,0 +1,155 @@
+"""
+Shared Playwright browser pool.
+
+Launching Chromium is the most expensive part of a scrape, so a single
+browser is started per run (or kept warm by a long-running process) and
+each scraper borrows an isolated browser context from it.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    Owns one Chromium instance and hands out isolated browser contexts.
+    
+    - At most `max_contexts` contexts are live at once; further requests
+      wait until a context is released.
+    - Chromium is launched lazily by the first `acquire()`, so a launch
+      failure surfaces in the scraper that asked for a page.
+    - After `recycle_after` contexts have been served, the browser is
+      relaunched the next time it is idle, so a long-lived pool doesn't
+      accumulate Chromium memory.
+    
+    Usage:
+        async with BrowserPool(max_contexts=2) as pool:
+            async with BetrScraper(pool=pool) as scraper:
+                data = await scraper.scrape()
+    """
+    
+    def __init__(
+        self,
+        max_contexts: int = 3,
+        headless: bool = True,
+        recycle_after: int = 50,
+    ):
+        if max_contexts < 1:
+            raise ValueError("max_contexts must be at least 1")
+        
+        self.max_contexts = max_contexts
+        self.headless = headless
+        self.recycle_after = recycle_after
+        
+        self._playwright = None
+        self._browser: Browser | None = None
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._live: set[BrowserContext] = set()
+        self._served = 0
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False  # Don't suppress exceptions
+    
+    @property
+    def live_contexts(self) -> int:
+        """Number of contexts currently handed out."""
+        return len(self._live)
+    
+    @property
+    def running(self) -> bool:
+        """True if Chromium is launched and connected."""
+        return self._browser is not None and self._browser.is_connected()
+    
+    async def ensure_started(self) -> None:
+        """start(), serialised with acquire() so only one launch happens."""
+        async with self._lock:
+            await self.start()
+    
+    async def start(self) -> None:
+        """Start Playwright and launch Chromium if not already running."""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        
+        if self._browser is None or not self._browser.is_connected():
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless
+            )
+            self._served = 0
+            logger.info("[pool] Browser launched")
+    
+    async def close(self) -> None:
+        """Close all live contexts, the browser and Playwright."""
+        for context in list(self._live):
+            await self.release(context)
+        
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        logger.info("[pool] Browser closed")
+    
+    async def acquire(self, **context_options) -> BrowserContext:
+        """
+        Borrow a fresh browser context, waiting if the pool is at capacity.
+        
+        Args:
+            **context_options: Passed through to `Browser.new_context()`.
+        
+        Returns:
+            A new, isolated BrowserContext. Return it with `release()`.
+        """
+        await self._slots.acquire()
+        try:
+            async with self._lock:
+                if self._served >= self.recycle_after and not self._live:
+                    await self._recycle()
+                await self.start()
+                context = await self._browser.new_context(**context_options)
+        except BaseException:
+            self._slots.release()
+            raise
+        
+        self._live.add(context)
+        self._served += 1
+        return context
+    
+    async def release(self, context: BrowserContext) -> None:
+        """Close a borrowed context and free its slot."""
+        if context not in self._live:
+            return
+        
+        self._live.discard(context)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"[pool] Failed to close browser context: {e}")
+        finally:
+            self._slots.release()
+    
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Async context manager wrapper around `acquire()`/`release()`."""
+        context = await self.acquire(**context_options)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+    
+    async def _recycle(self) -> None:
+        """Relaunch the browser to shed memory held by old renderers."""
+        logger.info(f"[pool] Recycling browser after {self._served} contexts")
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
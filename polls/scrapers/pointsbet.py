@@ -23,68 +23,68 @@ class PointsBetScraper(BaseScraper):
     # CSS Selectors for PointsBet
     CONTAINER_SELECTOR = 'button[data-label^="oddsButton"]'  # Wait for buttons
     OUTCOME_SELECTOR = 'button[data-label^="oddsButton"]'    # Each betting button
-    # NAME and ODDS parsed from data-value attribute
+    OUTCOME_ATTRIBUTE = 'data-value'  # NAME and ODDS parsed from this attribute
     
-    async def scrape(self) -> list[OddsResult]:
+    # JSON event API the SPA loads its markets from (network capture)
+    API_URL_PATTERN = r"/api/mes/v\d+/events/2306240\b"
+    
+    # The event also lists side markets (seat counts, leaders...); only
+    # this one's outcomes are parties. Matched case-insensitively anywhere
+    # in the market name, so "Next Federal Government - Winner" still counts.
+    MARKET_NAME = "Next Federal Government"
+    
+    def is_party_market(self, market_name: str | None) -> bool:
+        """True if `market_name` is the market whose outcomes are parties."""
+        return bool(market_name) and self.MARKET_NAME.casefold() in market_name.casefold()
+    
+    def parse_api_payload(self, payload) -> list[OddsResult]:
         """
-        Scrape odds from PointsBet.
+        Parse the PointsBet event payload.
         
-        Returns:
-            List of OddsResult dicts with party codes and decimal odds.
+        Expected shape: {"fixedOddsMarkets": [{"eventName": "Next Federal
+        Government", "outcomes": [{"name": "Labor", "price": 1.3}, ...]},
+        ...]}. Only the MARKET_NAME market is collected.
         """
         results: list[OddsResult] = []
+        markets = payload.get("fixedOddsMarkets") or []
         
-        async with await self.get_page() as page:
-            logger.info(f"[{self.name}] Navigating to {self.url}")
-            await page.goto(self.url, wait_until="networkidle")
-            
-            # Wait for odds to load (SPA needs time to render)
-            try:
-                await page.wait_for_selector(
-                    self.OUTCOME_SELECTOR,
-                    timeout=self.TIMEOUT
-                )
-            except Exception as e:
-                logger.error(f"[{self.name}] Failed to find market container: {e}")
-                raise
-            
-            # Find all outcome elements
-            outcomes = await page.query_selector_all(self.OUTCOME_SELECTOR)
-            logger.info(f"[{self.name}] Found {len(outcomes)} outcomes")
-            
-            for outcome in outcomes:
-                try:
-                    # Parse data-value attribute: "... - Labor - 1.3"
-                    data_value = await outcome.get_attribute('data-value')
-                    if not data_value:
-                        continue
-                    
-                    # Split from right to get name and odds
-                    parts = data_value.rsplit(' - ', 2)
-                    if len(parts) < 3:
-                        logger.warning(f"[{self.name}] Unexpected data-value format: {data_value}")
-                        continue
-                    
-                    party_name = parts[-2]  # Second to last part
-                    odds_text = parts[-1]   # Last part
-                    
-                    odds_value = Decimal(odds_text.strip())
-                    party_code = self.map_party_name(party_name)
-                    
-                    results.append({
-                        "party": party_code,
-                        "odds": odds_value,
-                    })
-                    logger.debug(
-                        f"[{self.name}] Parsed: {party_name} -> {party_code} @ {odds_value}"
-                    )
-                    
-                except Exception as e:
-                    logger.warning(f"[{self.name}] Failed to parse outcome: {e}")
-                    continue
+        party_markets = [m for m in markets if self.is_party_market(m.get("eventName"))]
+        if markets and not party_markets:
+            names = [m.get("eventName") for m in markets]
+            logger.warning(f"[{self.name}] No '{self.MARKET_NAME}' market in payload: {names}")
         
-        if not results:
-            raise ValueError(f"[{self.name}] No odds data scraped")
+        for market in party_markets:
+            for outcome in market.get("outcomes") or []:
+                party_name = outcome.get("name")
+                price = outcome.get("price")
+                if not party_name or price is None:
+                    continue
+                
+                odds_value = Decimal(str(price))
+                party_code = self.map_party_name(party_name)
+                
+                results.append({
+                    "party": party_code,
+                    "odds": odds_value,
+                })
+                logger.debug(
+                    f"[{self.name}] Parsed (API): {party_name} -> {party_code} @ {odds_value}"
+                )
         
-        logger.info(f"[{self.name}] Scraped {len(results)} results")
         return results
+    
+    def split_outcome_attribute(self, value: str) -> tuple[str, str] | None:
+        """
+        Split a data-value attribute like "Next Federal Government - Labor - 1.3"
+        into (name, odds). Buttons for other markets are skipped.
+        """
+        # Split from right to get market, name and odds
+        parts = value.rsplit(' - ', 2)
+        if len(parts) < 3:
+            logger.warning(f"[{self.name}] Unexpected data-value format: {value}")
+            return None
+        
+        market, name, odds_text = parts
+        if not self.is_party_market(market):
+            return None
+        return name, odds_text
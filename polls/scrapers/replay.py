@@ -0,0 +1,93 @@
+"""
+Offline replay of the synthetic bookmaker page fixtures.
+
+`replay_scraper(BetrScraper)` returns a subclass whose browser never
+touches the network: the market page is fulfilled from
+fixtures/<name>.html, a request matching API_URL_PATTERN from
+fixtures/<name>_api.json (if present) and anything else is aborted.
+Everything after routing - navigation, selector waits, extraction and
+parsing - runs exactly as it does live.
+
+The fixtures are hand-written to the scrapers' selectors, not recorded,
+and load no subresources, so a replay measures the scraper's own
+overhead (context setup, navigation, the wait strategy's polling,
+extraction, parsing). It can't show the effect of resource blocking,
+network latency or a real SPA's render time: comparing wait strategies
+here shows each one's fixed cost (e.g. STABLE_WINDOW), not how early it
+fires on a live page. ScrapeRun rows from live scrape_odds runs carry
+those numbers.
+"""
+
+import re
+from pathlib import Path
+
+from playwright.async_api import Route
+
+from .base import BaseScraper
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+
+def fixture_paths(scraper_class: type[BaseScraper]) -> tuple[Path, Path]:
+    """(page fixture, API payload fixture) for a scraper class."""
+    stem = scraper_class.name.lower()
+    return FIXTURE_DIR / f"{stem}.html", FIXTURE_DIR / f"{stem}_api.json"
+
+
+def replay_scraper(scraper_class: type[BaseScraper]) -> type[BaseScraper]:
+    """
+    Build a subclass of `scraper_class` that is served from fixtures.
+    
+    Args:
+        scraper_class: A BaseScraper subclass with a page fixture.
+    
+    Returns:
+        The replaying subclass. It takes the same constructor arguments,
+        but always installs its route handler (block_resources is forced).
+    
+    Raises:
+        FileNotFoundError: If no page fixture exists for the scraper.
+    
+    Example:
+        >>> async with replay_scraper(BetrScraper)() as scraper:
+        ...     data = await scraper.scrape()
+    """
+    page_path, api_path = fixture_paths(scraper_class)
+    if not page_path.exists():
+        raise FileNotFoundError(f"No fixture for {scraper_class.name}: {page_path}")
+    
+    page_body = page_path.read_bytes()
+    api_body = api_path.read_bytes() if api_path.exists() else None
+    api_pattern = (
+        re.compile(scraper_class.API_URL_PATTERN) if scraper_class.API_URL_PATTERN else None
+    )
+    
+    class ReplayScraper(scraper_class):
+        def __init__(self, pool=None, block_resources=None, wait_strategy=None):
+            # The route handler is what serves the fixtures
+            super().__init__(pool=pool, block_resources=True, wait_strategy=wait_strategy)
+        
+        async def _route_request(self, route: Route) -> None:
+            """Fulfil the page and API from fixtures; abort everything else."""
+            url = route.request.url.split("#")[0]
+            
+            if url == self.url:
+                self.request_stats.allowed += 1
+                await route.fulfill(
+                    status=200,
+                    content_type="text/html; charset=utf-8",
+                    body=page_body,
+                )
+            elif api_body is not None and api_pattern and api_pattern.search(url):
+                self.request_stats.allowed += 1
+                await route.fulfill(
+                    status=200,
+                    content_type="application/json",
+                    body=api_body,
+                )
+            else:
+                self.request_stats.blocked["offline"] += 1
+                await route.abort()
+    
+    ReplayScraper.__name__ = ReplayScraper.__qualname__ = f"Replay{scraper_class.__name__}"
+    return ReplayScraper
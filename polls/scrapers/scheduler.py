@@ -0,0 +1,142 @@
+"""
+Adaptive per-bookmaker scheduling for the intraday scraper daemon.
+
+Each bookmaker runs on its own interval (BaseScraper.SCRAPE_INTERVAL).
+When a scrape returns exactly the same prices as the previous one, or
+fails, that bookmaker's interval is multiplied by `backoff` up to
+`max_interval`; as soon as its prices move it drops back to the base
+interval. Quiet markets are therefore polled rarely and busy ones often.
+
+retry_delay() is the (much shorter) pause between retries of a failed
+scrape within one run.
+"""
+
+import random
+import time
+from decimal import Decimal
+
+from .base import OddsResult
+
+# Retries within a run: the first waits about RETRY_BASE_DELAY seconds,
+# each one after roughly doubles, up to RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 30.0
+
+
+def retry_delay(
+    attempt: int,
+    base: float = RETRY_BASE_DELAY,
+    cap: float = RETRY_MAX_DELAY,
+    rng: random.Random = random,
+) -> float:
+    """
+    Seconds to wait before retrying after failed attempt number `attempt`.
+    
+    Exponential backoff with "equal jitter": half the backoff is fixed and
+    half random, so concurrent retries spread out without any of them
+    retrying immediately.
+    
+    Example:
+        >>> 1.0 <= retry_delay(1) <= 2.0
+        True
+        >>> 2.0 <= retry_delay(2) <= 4.0
+        True
+    """
+    backoff = min(cap, base * 2 ** (attempt - 1))
+    return backoff / 2 + rng.uniform(0, backoff / 2)
+
+
+class BookmakerSchedule:
+    """Timing state for one bookmaker."""
+    
+    def __init__(self, name: str, interval: float, next_run: float):
+        self.name = name
+        self.base_interval = interval
+        self.interval = interval
+        self.next_run = next_run
+        self.last_prices: dict[str, Decimal] | None = None
+        self.failures = 0  # Consecutive failures
+
+
+class ScrapeSchedule:
+    """
+    Decide which bookmakers are due, and when to look again.
+    
+    Times are time.monotonic() values. Every bookmaker is due immediately
+    after construction.
+    
+    Example:
+        >>> schedule = ScrapeSchedule({"Betr": 300}, backoff=2, max_interval=1800)
+        >>> schedule.due()
+        ['Betr']
+        >>> schedule.record_success("Betr", [{"party": "ALP", "odds": Decimal("1.85")}])
+        True
+    """
+    
+    def __init__(
+        self,
+        intervals: dict[str, float],
+        backoff: float = 2.0,
+        max_interval: float = 3600,
+        clock=time.monotonic,
+    ):
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.clock = clock
+        
+        now = clock()
+        self.bookmakers = {
+            name: BookmakerSchedule(name, interval, now)
+            for name, interval in intervals.items()
+        }
+    
+    def due(self) -> list[str]:
+        """Names of bookmakers whose next run time has passed."""
+        now = self.clock()
+        return [b.name for b in self.bookmakers.values() if b.next_run <= now]
+    
+    def seconds_until_due(self) -> float:
+        """How long until the next bookmaker is due (0 if one already is)."""
+        next_run = min(b.next_run for b in self.bookmakers.values())
+        return max(0.0, next_run - self.clock())
+    
+    def record_success(self, name: str, data: list[OddsResult]) -> bool:
+        """
+        Reschedule after a successful scrape.
+        
+        Returns:
+            True if the prices differ from the previous scrape (always True
+            for the first one).
+        """
+        bookmaker = self.bookmakers[name]
+        prices = {item["party"]: item["odds"] for item in data}
+        changed = prices != bookmaker.last_prices
+        
+        bookmaker.last_prices = prices
+        bookmaker.failures = 0
+        if changed:
+            bookmaker.interval = bookmaker.base_interval
+        else:
+            self._back_off(bookmaker)
+        bookmaker.next_run = self.clock() + bookmaker.interval
+        return changed
+    
+    def record_failure(self, name: str) -> int:
+        """
+        Reschedule after a failed scrape.
+        
+        Returns:
+            The number of consecutive failures, including this one.
+        """
+        bookmaker = self.bookmakers[name]
+        bookmaker.failures += 1
+        self._back_off(bookmaker)
+        bookmaker.next_run = self.clock() + bookmaker.interval
+        return bookmaker.failures
+    
+    def defer(self, name: str, seconds: float) -> None:
+        """Push a bookmaker's next run back, e.g. while its circuit is open."""
+        self.bookmakers[name].next_run = self.clock() + max(0.0, seconds)
+    
+    def _back_off(self, bookmaker: BookmakerSchedule) -> None:
+        bookmaker.interval = min(bookmaker.interval * self.backoff, self.max_interval)
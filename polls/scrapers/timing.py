@@ -0,0 +1,49 @@
+"""
+Per-phase wall-clock timing for scrapes.
+
+Each scraper carries a PhaseTimer (`scraper.timings`) and wraps the
+expensive steps of a scrape in `with self.timings.phase(...)`:
+    
+    launch    starting Chromium (only when this scrape had to)
+    context   creating the browser context and page
+    navigate  page.goto / network capture
+    wait      waiting for the odds elements to render
+    extract   reading outcomes from the DOM
+    parse     turning text or JSON into OddsResults
+"""
+
+import time
+from contextlib import contextmanager
+
+PHASES = ("launch", "context", "navigate", "wait", "extract", "parse")
+
+
+class PhaseTimer:
+    """Accumulate elapsed seconds per named phase."""
+    
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+    
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block; repeated phases add up."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+    
+    @property
+    def total(self) -> float:
+        return sum(self.durations.values())
+    
+    def summary(self) -> str:
+        """e.g. "launch 812ms, context 41ms, navigate 1530ms (total 2383ms)"."""
+        if not self.durations:
+            return "no phases timed"
+        
+        phases = ", ".join(
+            f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.durations.items()
+        )
+        return f"{phases} (total {self.total * 1000:.0f}ms)"
@@ -8,14 +8,25 @@ from .odds_calculator import (
     odds_to_fair_probability,
     calculate_overround,
 )
+from .odds_batch import batch_odds_to_probabilities, batch_consensus
 from .notifications import send_scrape_failure_alert, ScraperFailure
+from .odds_writer import LastPriceCache, save_odds_readings, save_intraday_readings
+from .consensus import calculate_consensus, update_market_consensus, ConsensusAggregator
 
 __all__ = [
     "decimal_to_probability",
     "normalize_probabilities",
     "odds_to_fair_probability",
     "calculate_overround",
+    "batch_odds_to_probabilities",
+    "batch_consensus",
     "send_scrape_failure_alert",
     "ScraperFailure",
+    "save_odds_readings",
+    "save_intraday_readings",
+    "LastPriceCache",
+    "calculate_consensus",
+    "update_market_consensus",
+    "ConsensusAggregator",
 ]
 
@@ -0,0 +1,127 @@
+"""
+In-process broadcaster for the live odds Server-Sent Events stream.
+
+One poller per ASGI process watches the data version (bumped by
+scrape_odds) and, when it changes, loads the new figures once and fans
+them out to every connected client's queue. An idle dashboard tab costs
+one suspended coroutine, not a poll request.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+
+from .cache import get_data_version
+from .series import latest_market
+
+logger = logging.getLogger(__name__)
+
+
+class OddsBroadcaster:
+    """
+    Fan out odds updates to subscribed SSE connections.
+    
+    Events:
+        consensus: Rendered partials/consensus_table.html, ready to swap
+            into the dashboard.
+        odds: JSON {bookmaker: {party: odds}} of readings that changed
+            since the previous update (all readings for a new subscriber).
+    
+    The poll task starts with the first subscriber and stops when the last
+    one leaves. Each subscriber queue is bounded; a client that falls
+    behind drops its oldest pending event rather than growing memory.
+    """
+    
+    def __init__(self, poll_interval: float = 5.0, queue_size: int = 8):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._version: int | None = None
+        self._odds: dict = {}
+        self._current: list[tuple[str, str]] = []  # Latest full state
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client; it receives the current state, then deltas."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for event in self._current:
+            queue.put_nowait(event)
+        self._subscribers.add(queue)
+        
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+    
+    def publish(self, event: str, data: str) -> None:
+        """Queue an event for every subscriber without blocking."""
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # Drop the stalest event
+            queue.put_nowait((event, data))
+    
+    async def _run(self) -> None:
+        """Poll the data version while anyone is listening."""
+        logger.info("Odds broadcaster started")
+        try:
+            while self._subscribers:
+                try:
+                    version = await sync_to_async(get_data_version)()
+                    if version != self._version:
+                        events = await sync_to_async(self._load_events)()
+                        self._version = version
+                        for event, data in events:
+                            self.publish(event, data)
+                except Exception:
+                    logger.exception("Odds broadcaster poll failed")
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            logger.info("Odds broadcaster stopped")
+    
+    def _load_events(self) -> list[tuple[str, str]]:
+        """Query the latest figures and work out what changed."""
+        market = latest_market()
+        
+        changed = {
+            bookmaker: {
+                party: odds
+                for party, odds in parties.items()
+                if self._odds.get(bookmaker, {}).get(party) != odds
+            }
+            for bookmaker, parties in market["odds"].items()
+        }
+        changed = {bookmaker: parties for bookmaker, parties in changed.items() if parties}
+        self._odds = market["odds"]
+        
+        consensus_html = render_to_string(
+            "partials/consensus_table.html", {"market": market}
+        ).strip()
+        self._current = [
+            ("consensus", consensus_html),
+            ("odds", json.dumps(market["odds"], cls=DjangoJSONEncoder)),
+        ]
+        
+        events = [("consensus", consensus_html)]
+        if changed:
+            events.append(("odds", json.dumps(changed, cls=DjangoJSONEncoder)))
+        return events
+
+
+def format_sse(event: str, data: str) -> str:
+    """Encode one Server-Sent Event (multi-line data is split per the spec)."""
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+# One broadcaster per process, shared by every stream connection
+broadcaster = OddsBroadcaster()
@@ -0,0 +1,205 @@
+"""
+Response caching keyed on a "data version".
+
+Odds data only changes when scrape_odds writes, so rendered pages and JSON
+payloads are cached until the next scrape. scrape_odds calls
+bump_data_version() after a successful save; every cache key and ETag
+includes the version, so old entries are simply never read again.
+"""
+
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "betpoll:data-version"
+
+# Dogpile guard: how long one builder holds the rebuild lock, how long a
+# request without a stale copy waits for it before building for itself,
+# and how often it checks. Waiting sleeps the request's thread (under
+# ASGI, the thread sync views share), so it is kept short.
+BUILD_LOCK_TIMEOUT = 30  # seconds
+BUILD_WAIT_TIMEOUT = 1.0  # seconds
+BUILD_POLL_INTERVAL = 0.05  # seconds
+
+
+def get_data_version() -> int:
+    """
+    Current data version (nanoseconds since the epoch of the last bump).
+    
+    If the cache has been cleared, a fresh version is created so cached
+    responses are rebuilt rather than served stale.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version() -> int:
+    """Mark stored odds as changed. Called after scrape_odds saves."""
+    version = time.time_ns()
+    cache.set(DATA_VERSION_KEY, version, None)
+    logger.info(f"Data version bumped to {version}")
+    return version
+
+
+def get_or_build(
+    key: str,
+    builder,
+    timeout: int | None = None,
+    stale_key: str | None = None,
+    cacheable=None,
+):
+    """
+    Return the cached value for `key`, building it at most once on a miss.
+    
+    The first request to miss takes a short-lived lock (cache.add) and
+    builds. Concurrent requests don't pile onto the database behind it:
+    they return the last value stored under `stale_key` if there is one,
+    otherwise wait up to BUILD_WAIT_TIMEOUT for the builder (less if it
+    gives up the lock) and then build for themselves.
+    
+    The lock is best-effort with file-based caches (add() isn't atomic
+    across processes), which narrows a stampede to a few builders
+    rather than N.
+    
+    Args:
+        key: Cache key.
+        builder: Zero-argument callable producing the value.
+        timeout: Cache timeout; defaults to the cache's TIMEOUT.
+        stale_key: Key that also receives every stored value, served to
+            requests that arrive while a rebuild is in progress.
+        cacheable: Predicate on a built value; values it rejects (e.g.
+            error responses) are returned but not stored.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, BUILD_LOCK_TIMEOUT):
+        value = _wait_for_build(key, lock_key, stale_key)
+        if value is not None:
+            return value
+        return _build(key, builder, timeout, stale_key, cacheable)
+    
+    try:
+        return _build(key, builder, timeout, stale_key, cacheable)
+    finally:
+        cache.delete(lock_key)
+
+
+def _wait_for_build(key: str, lock_key: str, stale_key: str | None):
+    """The stale value, or the fresh one if it lands within BUILD_WAIT_TIMEOUT."""
+    if stale_key:
+        value = cache.get(stale_key)
+        if value is not None:
+            return value
+    
+    deadline = time.monotonic() + BUILD_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None or cache.get(lock_key) is None:
+            return value
+    
+    logger.warning(f"Timed out waiting for cache rebuild of {key}")
+    return None
+
+
+def _build(key: str, builder, timeout: int | None, stale_key: str | None, cacheable):
+    value = builder()
+    if cacheable is not None and not cacheable(value):
+        return value
+    
+    values = {key: value, stale_key: value} if stale_key else {key: value}
+    if timeout is None:
+        cache.set_many(values)
+    else:
+        cache.set_many(values, timeout)
+    return value
+
+
+def versioned_cache(view_func):
+    """
+    Cache a GET view's response until the next data version.
+    
+    - Sends ETag (the data version) and Last-Modified (the bump time),
+      and answers matching conditional requests with 304 before touching
+      the cache or the view.
+    - Caches the rendered body per full path (including query string).
+      Only 200 responses are cached and tagged; errors (e.g. a 400 for a
+      bad query param) are passed through as the view returned them.
+    - While a new version is being rendered, other requests for the path
+      get the previous version's response (with its own ETag).
+    - Sets Cache-Control so browsers and the CDN revalidate each time,
+      which is cheap because revalidation ends in a 304.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view_func(request, *args, **kwargs)
+        
+        version = get_data_version()
+        not_modified = get_conditional_response(
+            request, etag=_etag(version), last_modified=_last_modified(version)
+        )
+        if not_modified is not None:
+            return not_modified
+        
+        uncached = []
+        
+        def build() -> dict:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200:
+                uncached.append(response)
+                return {"status": response.status_code}
+            
+            if hasattr(response, "render"):
+                response.render()
+            return {
+                "version": version,
+                "content": response.content,
+                "status": response.status_code,
+                "content_type": response["Content-Type"],
+            }
+        
+        path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        cached = get_or_build(
+            f"betpoll:view:{version}:{path_hash}",
+            build,
+            stale_key=f"betpoll:view:latest:{path_hash}",
+            cacheable=lambda value: value["status"] == 200,
+        )
+        if uncached:
+            return uncached[0]
+        
+        response = HttpResponse(
+            cached["content"],
+            status=cached["status"],
+            content_type=cached["content_type"],
+        )
+        response["ETag"] = _etag(cached["version"])
+        response["Last-Modified"] = http_date(_last_modified(cached["version"]))
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+    
+    return wrapper
+
+
+def _etag(version: int) -> str:
+    return quote_etag(str(version))
+
+
+def _last_modified(version: int) -> int:
+    """The version's bump time, in whole seconds since the epoch."""
+    return int(version // 1_000_000_000)
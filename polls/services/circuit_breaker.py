@@ -0,0 +1,112 @@
+"""
+Per-bookmaker circuit breaker for the scrape commands.
+
+A bookmaker whose scrape fails (after retries) on FAILURE_THRESHOLD
+consecutive runs is skipped until its cooldown passes, instead of burning
+a browser timeout on every run. It is then probed once: success closes
+the circuit, failure re-opens it with the cooldown doubled (up to
+MAX_OPEN_SECONDS).
+
+State lives in the CircuitBreaker table, so the cron job and the daemon
+see the same circuits.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from polls.models import CircuitBreaker
+from .odds_writer import get_bookmakers
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 30 * 60
+MAX_OPEN_SECONDS = 24 * 60 * 60
+
+
+def check_circuits(
+    names: list[str],
+    now: datetime | None = None,
+) -> tuple[dict[str, datetime], set[str]]:
+    """
+    Decide which bookmakers may be scraped.
+    
+    Open circuits whose cooldown has passed move to half-open here; their
+    next scrape is the probe.
+    
+    Args:
+        names: Bookmaker names about to be scraped.
+    
+    Returns:
+        ({name: retry_at} to skip, {names whose scrape is a probe})
+    """
+    now = now or timezone.now()
+    circuits = CircuitBreaker.objects.filter(bookmaker__name__in=names).exclude(
+        state=CircuitBreaker.CLOSED
+    ).select_related("bookmaker")
+    
+    skip, probes = {}, set()
+    for circuit in circuits:
+        name = circuit.bookmaker.name
+        if circuit.state == CircuitBreaker.OPEN and circuit.retry_at > now:
+            skip[name] = circuit.retry_at
+            continue
+        
+        if circuit.state == CircuitBreaker.OPEN:
+            circuit.state = CircuitBreaker.HALF_OPEN
+            circuit.save(update_fields=["state"])
+            logger.info(f"Circuit for {name} half-open - probing")
+        probes.add(name)
+    return skip, probes
+
+
+def record_success(name: str) -> None:
+    """Close the bookmaker's circuit (if it wasn't already)."""
+    updated = CircuitBreaker.objects.filter(bookmaker__name=name).exclude(
+        state=CircuitBreaker.CLOSED, failures=0
+    ).update(state=CircuitBreaker.CLOSED, failures=0, opened_at=None, retry_at=None, last_error="")
+    if updated:
+        logger.info(f"Circuit for {name} closed")
+
+
+def record_failure(name: str, error: str, now: datetime | None = None) -> datetime | None:
+    """
+    Count a failed run for the bookmaker, opening its circuit at the threshold.
+    
+    Returns:
+        When the circuit was (re)opened, the time it will next be probed;
+        otherwise None.
+    """
+    now = now or timezone.now()
+    bookmaker = get_bookmakers([name])[name]
+    circuit, _ = CircuitBreaker.objects.get_or_create(bookmaker=bookmaker)
+    
+    circuit.failures += 1
+    circuit.last_error = error
+    
+    retry_at = None
+    if circuit.state == CircuitBreaker.HALF_OPEN or circuit.failures >= FAILURE_THRESHOLD:
+        retry_at = now + timedelta(seconds=cooldown(circuit.failures))
+        circuit.state = CircuitBreaker.OPEN
+        circuit.opened_at = circuit.opened_at or now
+        circuit.retry_at = retry_at
+        logger.warning(
+            f"Circuit for {name} open after {circuit.failures} failures - "
+            f"next probe at {timezone.localtime(retry_at):%Y-%m-%d %H:%M}"
+        )
+    circuit.save()
+    return retry_at
+
+
+def cooldown(failures: int) -> float:
+    """
+    Seconds to stay open after `failures` consecutive failures.
+    
+    Example:
+        >>> [cooldown(n) / 60 for n in (3, 4, 5)]
+        [30.0, 60.0, 120.0]
+    """
+    doublings = max(0, failures - FAILURE_THRESHOLD)
+    return min(MAX_OPEN_SECONDS, OPEN_SECONDS * 2 ** doublings)
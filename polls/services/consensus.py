@@ -0,0 +1,432 @@
+"""
+Market consensus: combine every bookmaker's odds into one fair probability
+per party, stored in MarketConsensus after each scrape run.
+
+update_market_consensus() recomputes a whole day from its readings;
+ConsensusAggregator keeps running sums instead, so a scrape that moves one
+bookmaker's prices only recomputes that bookmaker's market and rewrites
+the parties it touches.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Hashable, Iterable, TypedDict
+
+from django.db import transaction
+from django.utils import timezone
+
+from polls.models import MarketConsensus, OddsReading
+from .odds_batch import batch_consensus, build_odds_matrix, to_decimals
+from .odds_calculator import odds_to_fair_probability
+
+logger = logging.getLogger(__name__)
+
+FOUR_PLACES = Decimal("0.0001")
+
+
+class ConsensusResult(TypedDict):
+    """Consensus figures for one party."""
+    fair_probability: Decimal
+    averaged_odds: Decimal
+    bookmaker_count: int
+
+
+def calculate_consensus(
+    odds_by_bookmaker: dict[Hashable, dict[Hashable, Decimal]],
+    method: str = "proportional",
+) -> dict[Hashable, ConsensusResult]:
+    """
+    Average vig-removed probabilities across bookmakers.
+    
+    Each bookmaker's market is normalised on its own (so one bookmaker's
+    margin never leaks into another's prices), then the fair probabilities
+    and raw odds for each party are averaged over the bookmakers pricing it.
+    Bookmakers pricing fewer than two parties are skipped, since a single
+    outcome can't be de-vigged.
+    
+    Args:
+        odds_by_bookmaker: {bookmaker: {party: decimal odds}}
+        method: De-vig method (see odds_batch.DEVIG_METHODS).
+    
+    Returns:
+        {party: ConsensusResult}
+    
+    Example:
+        >>> calculate_consensus({
+        ...     "Betr": {"ALP": Decimal("1.85"), "LNP": Decimal("2.10")},
+        ...     "Ladbrokes": {"ALP": Decimal("1.80"), "LNP": Decimal("2.15")},
+        ... })["ALP"]
+        {'fair_probability': Decimal('0.5380'), 'averaged_odds': Decimal('1.8250'), 'bookmaker_count': 2}
+    """
+    fair_sums: dict[Hashable, Decimal] = defaultdict(Decimal)
+    odds_sums: dict[Hashable, Decimal] = defaultdict(Decimal)
+    counts: dict[Hashable, int] = defaultdict(int)
+    
+    for bookmaker, party_odds in odds_by_bookmaker.items():
+        for party, fair in _fair_probabilities(bookmaker, party_odds, method).items():
+            fair_sums[party] += fair
+            odds_sums[party] += party_odds[party]
+            counts[party] += 1
+    
+    return {
+        party: _average(fair_sums[party], odds_sums[party], count)
+        for party, count in counts.items()
+    }
+
+
+def _fair_probabilities(
+    bookmaker: Hashable,
+    party_odds: dict[Hashable, Decimal],
+    method: str,
+) -> dict[Hashable, Decimal]:
+    """One bookmaker's de-vigged market ({} if it prices under two parties)."""
+    if len(party_odds) < 2:
+        logger.debug(f"Skipping {bookmaker}: only {len(party_odds)} party priced")
+        return {}
+    
+    parties = list(party_odds)
+    fair_list = odds_to_fair_probability([party_odds[party] for party in parties], method)
+    return dict(zip(parties, fair_list))
+
+
+def _average(fair_sum: Decimal, odds_sum: Decimal, count: int) -> ConsensusResult:
+    return {
+        "fair_probability": (fair_sum / count).quantize(FOUR_PLACES, rounding=ROUND_HALF_UP),
+        "averaged_odds": (odds_sum / count).quantize(FOUR_PLACES, rounding=ROUND_HALF_UP),
+        "bookmaker_count": count,
+    }
+
+
+def consensus_timestamp(reading_date: date) -> datetime:
+    """Timestamp consensus rows are stored under for a day's readings."""
+    return timezone.make_aware(datetime.combine(reading_date, time.min))
+
+
+def update_market_consensus(
+    reading_date: date | None = None,
+    method: str = "proportional",
+) -> int:
+    """
+    Recompute and store MarketConsensus for one day's OddsReadings.
+    
+    Reads the day's readings in one query and writes every party's row
+    with a single upsert on (timestamp, party), so re-running a scrape on
+    the same day replaces that day's consensus.
+    
+    Args:
+        reading_date: Day to compute. Defaults to today in local time
+            (TIME_ZONE), the day save_intraday_readings() stores under.
+        method: De-vig method (see odds_batch.DEVIG_METHODS).
+    
+    Returns:
+        Number of MarketConsensus rows written.
+    """
+    reading_date = reading_date or timezone.localdate()
+    
+    consensus = calculate_consensus(_day_odds(reading_date), method)
+    if not consensus:
+        logger.info(f"No readings to build consensus for {reading_date}")
+        return 0
+    
+    timestamp = consensus_timestamp(reading_date)
+    rows = [
+        MarketConsensus(timestamp=timestamp, party_id=party_id, **result)
+        for party_id, result in consensus.items()
+    ]
+    
+    _upsert_consensus(rows)
+    
+    logger.info(f"Stored consensus for {len(rows)} parties at {timestamp}")
+    return len(rows)
+
+
+def rebuild_market_consensus(
+    method: str = "proportional",
+    start: date | None = None,
+    end: date | None = None,
+) -> int:
+    """
+    Recompute MarketConsensus for every day in a range in one batch.
+    
+    Loads the readings once, runs the vectorised batch_consensus() over
+    the whole (dates x bookmakers x parties) matrix and upserts the
+    results. Produces the same values as update_market_consensus() day
+    by day, but fast enough to re-run the full history with any method.
+    
+    Args:
+        method: De-vig method (see odds_batch.DEVIG_METHODS).
+        start: First day to rebuild (inclusive). Defaults to the earliest.
+        end: Last day to rebuild (inclusive). Defaults to the latest.
+    
+    Returns:
+        Number of MarketConsensus rows written.
+    """
+    readings = OddsReading.objects.order_by()
+    if start:
+        readings = readings.filter(date__gte=start)
+    if end:
+        readings = readings.filter(date__lte=end)
+    
+    matrix = build_odds_matrix(
+        readings.values_list("date", "bookmaker_id", "party_id", "odds")
+    )
+    consensus = batch_consensus(matrix["odds"], method=method)
+    
+    rows = []
+    for i, reading_date in enumerate(matrix["dates"]):
+        timestamp = consensus_timestamp(reading_date)
+        fair = to_decimals(consensus["fair_probability"][i])
+        odds = to_decimals(consensus["averaged_odds"][i])
+        counts = consensus["bookmaker_count"][i]
+        
+        for j, party_id in enumerate(matrix["parties"]):
+            if not counts[j]:
+                continue
+            rows.append(MarketConsensus(
+                timestamp=timestamp,
+                party_id=party_id,
+                fair_probability=fair[j],
+                averaged_odds=odds[j],
+                bookmaker_count=int(counts[j]),
+            ))
+    
+    _upsert_consensus(rows)
+    
+    logger.info(
+        f"Rebuilt {len(rows)} consensus rows over {len(matrix['dates'])} days ({method})"
+    )
+    return len(rows)
+
+
+class _DayTotals:
+    """Running consensus state for one day's readings."""
+    
+    def __init__(self):
+        self.markets: dict[int, dict[int, Decimal]] = defaultdict(dict)  # Odds
+        self.contributions: dict[int, dict[int, Decimal]] = {}  # Fair probabilities
+        self.fair_sums: dict[int, Decimal] = defaultdict(Decimal)
+        self.odds_sums: dict[int, Decimal] = defaultdict(Decimal)
+        self.counts: dict[int, int] = defaultdict(int)
+
+
+class ConsensusAggregator:
+    """
+    Keep MarketConsensus up to date from changed readings only.
+    
+    For each day it holds every bookmaker's market, that bookmaker's
+    fair-probability contribution per party, and per-party running sums
+    and counts. apply() swaps out the contributions of the bookmakers whose
+    readings changed; flush() writes just the parties they touched.
+    
+    A day is loaded from the database the first time it is touched, so the
+    first scrape of a process costs one full read; after that the cost is
+    O(changed readings). Only the `max_days` most recently loaded days
+    are kept in memory.
+    
+    The running sums only see readings passed to apply(). A long-lived
+    aggregator that other processes may write behind (scrape_scheduler,
+    alongside the scrape_odds cron job and rebuild_consensus) should pass
+    reload=True, so each flush first rebuilds the touched days from the
+    stored readings - one indexed read per day - instead of overwriting
+    correct rows with stale totals.
+    
+    Example:
+        >>> aggregator = ConsensusAggregator("proportional")
+        >>> aggregator.apply(timezone.localdate(), [(betr.pk, alp.pk, Decimal("1.80"))])
+        {1, 2}
+        >>> aggregator.flush()
+        2
+    """
+    
+    def __init__(self, method: str = "proportional", max_days: int = 2, reload: bool = False):
+        self.method = method
+        self.max_days = max_days
+        self.reload = reload
+        self._days: dict[date, _DayTotals] = {}
+        self._dirty: dict[date, set[int]] = defaultdict(set)
+        self._flushed: set[date] = set()  # Days written by flush(), for verify()
+    
+    def load(self, reading_date: date) -> None:
+        """(Re)build a day's totals from its stored readings."""
+        totals = _DayTotals()
+        for bookmaker_id, party_odds in _day_odds(reading_date).items():
+            totals.markets[bookmaker_id] = party_odds
+            self._add(totals, bookmaker_id)
+        
+        self._days.pop(reading_date, None)
+        self._days[reading_date] = totals
+        # Forget the oldest days, but never ones with unflushed changes
+        evictable = [
+            day for day in self._days
+            if day not in self._dirty and day != reading_date
+        ]
+        for day in evictable[:max(0, len(self._days) - self.max_days)]:
+            del self._days[day]
+    
+    def apply(
+        self,
+        reading_date: date,
+        readings: Iterable[tuple[int, int, Decimal]],
+    ) -> set[int]:
+        """
+        Fold new or changed readings into a day's totals.
+        
+        Args:
+            reading_date: Day the readings are stored under.
+            readings: (bookmaker_id, party_id, odds) as written to OddsReading.
+        
+        Returns:
+            Party ids whose consensus needs rewriting.
+        """
+        if reading_date not in self._days:
+            self.load(reading_date)
+        totals = self._days[reading_date]
+        
+        changed: dict[int, dict[int, Decimal]] = defaultdict(dict)
+        for bookmaker_id, party_id, odds in readings:
+            changed[bookmaker_id][party_id] = odds
+        
+        affected = set()
+        for bookmaker_id, party_odds in changed.items():
+            affected |= self._remove(totals, bookmaker_id)
+            totals.markets[bookmaker_id].update(party_odds)
+            affected |= self._add(totals, bookmaker_id)
+        
+        self._dirty[reading_date] |= affected
+        return affected
+    
+    def flush(self) -> int:
+        """
+        Write consensus rows for every party touched since the last flush.
+        
+        Parties no bookmaker prices any more have their row deleted.
+        
+        Returns:
+            Number of MarketConsensus rows written.
+        """
+        if self.reload:
+            for reading_date in list(self._dirty):
+                self.load(reading_date)
+        
+        rows = []
+        with transaction.atomic():
+            for reading_date, party_ids in self._dirty.items():
+                totals = self._days[reading_date]
+                timestamp = consensus_timestamp(reading_date)
+                
+                empty = [party_id for party_id in party_ids if not totals.counts[party_id]]
+                if empty:
+                    MarketConsensus.objects.filter(
+                        timestamp=timestamp, party_id__in=empty
+                    ).delete()
+                
+                rows.extend(
+                    MarketConsensus(
+                        timestamp=timestamp,
+                        party_id=party_id,
+                        **_average(
+                            totals.fair_sums[party_id],
+                            totals.odds_sums[party_id],
+                            totals.counts[party_id],
+                        ),
+                    )
+                    for party_id in sorted(party_ids)
+                    if totals.counts[party_id]
+                )
+            
+            _upsert_consensus(rows)
+        
+        self._flushed.update(self._dirty)
+        self._dirty.clear()
+        logger.info(f"Flushed {len(rows)} incremental consensus rows")
+        return len(rows)
+    
+    def verify(self, reading_date: date | None = None) -> list[str]:
+        """
+        Compare stored consensus with a full recompute.
+        
+        Args:
+            reading_date: Day to check. Defaults to every day this
+                aggregator has flushed, or today in local time if none.
+        
+        Returns:
+            One message per mismatching day and party (empty if all agree).
+        """
+        if reading_date:
+            days = [reading_date]
+        else:
+            days = sorted(self._flushed) or [timezone.localdate()]
+        
+        mismatches = []
+        for day in days:
+            mismatches.extend(self._verify_day(day))
+        return mismatches
+    
+    def _verify_day(self, reading_date: date) -> list[str]:
+        expected = calculate_consensus(_day_odds(reading_date), self.method)
+        stored = {
+            party_id: {
+                "fair_probability": fair,
+                "averaged_odds": odds,
+                "bookmaker_count": count,
+            }
+            for party_id, fair, odds, count in MarketConsensus.objects.filter(
+                timestamp=consensus_timestamp(reading_date)
+            ).values_list("party_id", "fair_probability", "averaged_odds", "bookmaker_count")
+        }
+        
+        mismatches = [
+            f"{reading_date} party {party_id}: stored {stored.get(party_id)}, expected {expected.get(party_id)}"
+            for party_id in sorted(expected.keys() | stored.keys())
+            if stored.get(party_id) != expected.get(party_id)
+        ]
+        for message in mismatches:
+            logger.warning(f"Consensus mismatch on {message}")
+        return mismatches
+    
+    def _add(self, totals: _DayTotals, bookmaker_id: int) -> set[int]:
+        market = totals.markets[bookmaker_id]
+        fair = _fair_probabilities(bookmaker_id, market, self.method)
+        totals.contributions[bookmaker_id] = fair
+        for party_id, probability in fair.items():
+            totals.fair_sums[party_id] += probability
+            totals.odds_sums[party_id] += market[party_id]
+            totals.counts[party_id] += 1
+        return set(fair)
+    
+    def _remove(self, totals: _DayTotals, bookmaker_id: int) -> set[int]:
+        market = totals.markets[bookmaker_id]
+        fair = totals.contributions.pop(bookmaker_id, {})
+        for party_id, probability in fair.items():
+            totals.fair_sums[party_id] -= probability
+            totals.odds_sums[party_id] -= market[party_id]
+            totals.counts[party_id] -= 1
+        return set(fair)
+
+
+def _day_odds(reading_date: date) -> dict[int, dict[int, Decimal]]:
+    """{bookmaker_id: {party_id: odds}} for one day's readings."""
+    odds_by_bookmaker: dict[int, dict[int, Decimal]] = defaultdict(dict)
+    readings = OddsReading.objects.filter(date=reading_date).order_by().values_list(
+        "bookmaker_id", "party_id", "odds"
+    )
+    for bookmaker_id, party_id, odds in readings:
+        odds_by_bookmaker[bookmaker_id][party_id] = odds
+    return dict(odds_by_bookmaker)
+
+
+def _upsert_consensus(rows: list[MarketConsensus]) -> None:
+    """Insert or update consensus rows on (timestamp, party) in one transaction."""
+    if not rows:
+        return
+    
+    with transaction.atomic():
+        MarketConsensus.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["timestamp", "party"],
+            update_fields=["fair_probability", "averaged_odds", "bookmaker_count"],
+            batch_size=500,
+        )
@@ -0,0 +1,104 @@
+"""
+Downsampling for chart series, so API payloads stay bounded as history grows.
+
+A series is a list of points ordered by time: (x, y, *extra), where x is a
+date or datetime, y the value being charted, and any extra columns are
+carried along with the point they belong to.
+"""
+
+from datetime import date, datetime, timedelta
+
+BUCKETS = ("raw", "day", "week")
+
+
+def bucket_series(points: list[tuple], bucket: str = "day") -> list[tuple]:
+    """
+    Keep the last point of every day or week (the bucket's "close").
+    
+    Weeks start on Monday. Output points are stamped with the bucket
+    start date, so they line up across series.
+    
+    Args:
+        points: Time-ordered (x, y, *extra) tuples.
+        bucket: "raw" (no-op), "day" or "week".
+    
+    Returns:
+        One point per non-empty bucket, still time-ordered.
+    
+    Example:
+        >>> bucket_series([(date(2026, 1, 5), 1.9), (date(2026, 1, 7), 1.8)], "week")
+        [(datetime.date(2026, 1, 5), 1.8)]
+    """
+    if bucket == "raw":
+        return list(points)
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}. Available: {', '.join(BUCKETS)}")
+    
+    closes: dict[date, tuple] = {}
+    for point in points:
+        day = point[0].date() if isinstance(point[0], datetime) else point[0]
+        if bucket == "week":
+            day -= timedelta(days=day.weekday())
+        closes[day] = (day, *point[1:])  # Later points overwrite earlier ones
+    
+    return list(closes.values())
+
+
+def lttb(points: list[tuple], threshold: int) -> list[tuple]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    
+    Picks `threshold` points that preserve the visual shape of the series
+    (peaks and troughs survive, flat stretches are thinned). The first and
+    last points are always kept.
+    
+    Args:
+        points: Time-ordered (x, y, *extra) tuples.
+        threshold: Maximum number of points to return (>= 3 to have effect).
+    
+    Returns:
+        A subset of `points`, in order.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    
+    xs = [_x_value(point[0]) for point in points]
+    ys = [float(point[1]) for point in points]
+    
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0  # Index of the previously selected point
+    
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        next_len = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_len
+        avg_y = sum(ys[next_start:next_end]) / next_len
+        
+        # Pick the point in this bucket forming the largest triangle
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a])
+                - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        
+        sampled.append(points[best])
+        a = best
+    
+    sampled.append(points[-1])
+    return sampled
+
+
+def _x_value(x) -> float:
+    """Numeric x-coordinate for a date or datetime."""
+    if isinstance(x, datetime):
+        return x.timestamp()
+    return float(x.toordinal() * 86400)
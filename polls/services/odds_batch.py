@@ -0,0 +1,325 @@
+"""
+Vectorised odds maths for batch work over many markets and dates.
+
+The functions in odds_calculator work on one small list of Decimals at a
+time, which is right for a single scrape but slow when recomputing the
+whole history. These work on NumPy float64 arrays shaped
+(dates x bookmakers x parties), with NaN marking a missing price, and only
+round when values are converted back to Decimal for storage.
+
+The Decimal functions round each implied probability to 4 dp before
+normalising, which moves longshot fair probabilities by up to ~0.002.
+`match_decimal=True` (the default) reproduces that step so batch results
+are identical to the stored values; pass False for unrounded float64 maths.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Hashable, Iterable, TypedDict
+
+import numpy as np
+
+# De-vig (overround removal) methods accepted by devig() and the
+# consensus functions. "proportional" is plain normalisation; the others
+# shift more of the margin onto longshots, where bookmakers load it.
+DEVIG_METHODS = ("proportional", "power", "shin", "odds_ratio")
+
+# Bisection halves the bracket each step, so 64 iterations always reach
+# float64 resolution - the solver cost is fixed whatever the input.
+MAX_ITERATIONS = 64
+
+
+class BatchProbabilities(TypedDict):
+    """Result of batch_odds_to_probabilities()."""
+    implied: np.ndarray    # Same shape as the odds
+    fair: np.ndarray       # Same shape as the odds
+    overround: np.ndarray  # Odds shape without the last (party) axis
+
+
+class BatchConsensus(TypedDict):
+    """Result of batch_consensus(), arrays shaped (dates x parties)."""
+    fair_probability: np.ndarray
+    averaged_odds: np.ndarray
+    bookmaker_count: np.ndarray
+
+
+class OddsMatrix(TypedDict):
+    """Dense odds array plus the labels for each axis."""
+    odds: np.ndarray  # (dates x bookmakers x parties), NaN where missing
+    dates: list[date]
+    bookmakers: list[Hashable]
+    parties: list[Hashable]
+
+
+def build_odds_matrix(
+    readings: Iterable[tuple[date, Hashable, Hashable, Decimal]],
+) -> OddsMatrix:
+    """
+    Pack (date, bookmaker, party, odds) rows into a dense NaN-padded array.
+    
+    Args:
+        readings: Rows such as OddsReading.objects.values_list(
+            "date", "bookmaker_id", "party_id", "odds").
+    
+    Returns:
+        OddsMatrix with axes sorted by date, bookmaker and party.
+    """
+    rows = list(readings)
+    dates = sorted({row[0] for row in rows})
+    bookmakers = sorted({row[1] for row in rows})
+    parties = sorted({row[2] for row in rows})
+    
+    date_index = {d: i for i, d in enumerate(dates)}
+    bookmaker_index = {b: i for i, b in enumerate(bookmakers)}
+    party_index = {p: i for i, p in enumerate(parties)}
+    
+    odds = np.full((len(dates), len(bookmakers), len(parties)), np.nan)
+    if rows:
+        d, b, p, values = zip(*rows)
+        odds[
+            [date_index[x] for x in d],
+            [bookmaker_index[x] for x in b],
+            [party_index[x] for x in p],
+        ] = np.array(values, dtype=np.float64)
+    
+    return {
+        "odds": odds,
+        "dates": dates,
+        "bookmakers": bookmakers,
+        "parties": parties,
+    }
+
+
+def batch_odds_to_probabilities(
+    odds,
+    match_decimal: bool = True,
+    method: str = "proportional",
+) -> BatchProbabilities:
+    """
+    Convert an array of decimal odds to implied and fair probabilities.
+    
+    The last axis holds the outcomes of one market; every other axis is
+    batched. NaN odds are treated as "not priced" and stay NaN.
+    
+    Args:
+        odds: Array-like of decimal odds, e.g. (dates x bookmakers x parties).
+        match_decimal: Round implied probabilities to 4 dp before summing,
+            exactly as decimal_to_probability() does, so results (after
+            round_half_up) are identical to the Decimal functions. With
+            False, nothing is rounded until the storage boundary.
+        method: De-vig method for the fair probabilities, one of
+            DEVIG_METHODS. The overround is always the raw implied sum.
+    
+    Returns:
+        BatchProbabilities with implied, fair and overround arrays.
+    
+    Example:
+        >>> batch_odds_to_probabilities([[1.85, 2.10]], match_decimal=False)["fair"]
+        array([[0.53164557, 0.46835443]])
+    """
+    odds = np.asarray(odds, dtype=np.float64)
+    if np.any(odds <= 0):
+        raise ValueError("Odds must be positive")
+    
+    implied = 1.0 / odds
+    if match_decimal:
+        implied = round_half_up(implied)
+    
+    # An all-NaN market has no overround rather than an overround of zero.
+    # np.where (not item assignment) so a single 1-D market works too.
+    overround = np.where(
+        np.all(np.isnan(implied), axis=-1), np.nan, np.nansum(implied, axis=-1)
+    )
+    
+    fair = devig(implied, method)
+    
+    return {
+        "implied": implied,
+        "fair": fair,
+        "overround": overround,
+    }
+
+
+def batch_consensus(
+    odds,
+    match_decimal: bool = True,
+    method: str = "proportional",
+) -> BatchConsensus:
+    """
+    Consensus across bookmakers for every date at once.
+    
+    Vectorised equivalent of consensus.calculate_consensus(): each
+    bookmaker's market is de-vigged on its own, bookmakers pricing fewer
+    than two parties are ignored, and fair probabilities and raw odds are
+    averaged per party over the bookmakers that price it.
+    
+    Args:
+        odds: Array-like shaped (dates x bookmakers x parties), NaN where missing.
+        match_decimal: See batch_odds_to_probabilities().
+        method: De-vig method, one of DEVIG_METHODS.
+    
+    Returns:
+        BatchConsensus arrays shaped (dates x parties). Parties with no
+        contributing bookmaker are NaN with a count of 0.
+    """
+    odds = np.array(odds, dtype=np.float64)  # Copy - masked below
+    
+    priced = ~np.isnan(odds)
+    too_few = priced.sum(axis=-1) < 2
+    odds[too_few] = np.nan
+    priced[too_few] = False
+    
+    fair = batch_odds_to_probabilities(odds, match_decimal, method)["fair"]
+    if match_decimal:
+        fair = round_half_up(fair)
+    
+    counts = priced.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fair_mean = np.nansum(fair, axis=1) / counts
+        odds_mean = np.nansum(odds, axis=1) / counts
+    
+    return {
+        "fair_probability": fair_mean,
+        "averaged_odds": odds_mean,
+        "bookmaker_count": counts,
+    }
+
+
+def devig(implied, method: str = "proportional") -> np.ndarray:
+    """
+    Remove the overround from implied probabilities.
+    
+    The last axis holds one market's outcomes; NaN entries are ignored.
+    
+    Methods:
+        proportional: fair = p / sum(p)
+        power:        fair = p ** k, solving sum(p ** k) = 1
+        odds_ratio:   fair / (1 - fair) = (p / (1 - p)) / c, solving for c
+        shin:         Shin's insider-trading model, solving for z
+    
+    The non-proportional methods solve one parameter per market with a
+    vectorised bisection (see _bisect), so a whole history of markets is
+    solved together in MAX_ITERATIONS array passes.
+    
+    Args:
+        implied: Array-like of implied probabilities (1 / odds).
+        method: One of DEVIG_METHODS.
+    
+    Returns:
+        Fair probabilities, same shape as `implied`, summing to 1 per market.
+    """
+    implied = np.asarray(implied, dtype=np.float64)
+    total = np.nansum(implied, axis=-1, keepdims=True)
+    
+    if method == "proportional":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return implied / total
+    
+    if method == "power":
+        # sum(p ** k) falls as k grows (p < 1); search over log(k)
+        log_k = _bisect(
+            lambda x: np.nansum(implied ** np.exp(x), axis=-1, keepdims=True) - 1,
+            -10.0, 10.0, total.shape,
+        )
+        fair = implied ** np.exp(log_k)
+    
+    elif method == "odds_ratio":
+        # Larger c shrinks every fair probability; search over log(c)
+        def fair_for(log_c):
+            c = np.exp(log_c)
+            return implied / (c * (1 - implied) + implied)
+        
+        log_c = _bisect(
+            lambda x: np.nansum(fair_for(x), axis=-1, keepdims=True) - 1,
+            -20.0, 20.0, total.shape,
+        )
+        fair = fair_for(log_c)
+    
+    elif method == "shin":
+        # z is the share of insider money, 0 <= z < 1. Only defined for a
+        # positive overround; other markets fall back to proportional.
+        def fair_for(z):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return (
+                    np.sqrt(z ** 2 + 4 * (1 - z) * implied ** 2 / total) - z
+                ) / (2 * (1 - z))
+        
+        z = _bisect(
+            lambda x: np.nansum(fair_for(x), axis=-1, keepdims=True) - 1,
+            0.0, 1.0 - 1e-9, total.shape,
+        )
+        z = np.where(total > 1, z, 0.0)
+        fair = np.where(total > 1, fair_for(z), implied / total)
+    
+    else:
+        raise ValueError(
+            f"Unknown de-vig method: {method}. Available: {', '.join(DEVIG_METHODS)}"
+        )
+    
+    # Absorb the solver's last-bit residual so each market sums to exactly 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return fair / np.nansum(fair, axis=-1, keepdims=True)
+
+
+def _bisect(
+    func: Callable[[np.ndarray], np.ndarray],
+    lo: float,
+    hi: float,
+    shape: tuple[int, ...],
+    max_iterations: int = MAX_ITERATIONS,
+) -> np.ndarray:
+    """
+    Find roots of a decreasing function for many markets at once.
+    
+    Every market is bisected in lock-step, so the cost is a fixed
+    `max_iterations` array evaluations. Stops early once every bracket
+    has collapsed to float64 resolution. Roots outside [lo, hi] clamp to
+    the nearest bound.
+    
+    Args:
+        func: Maps an array of parameters (shape `shape`) to residuals
+            that decrease as the parameter increases.
+        lo, hi: Bracket for the parameter.
+        shape: Shape of the parameter array (one per market).
+    """
+    lo = np.full(shape, lo)
+    hi = np.full(shape, hi)
+    
+    for _ in range(max_iterations):
+        mid = (lo + hi) / 2
+        above = func(mid) > 0
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+        if np.all(hi - lo <= np.spacing(np.abs(mid))):
+            break
+    
+    return (lo + hi) / 2
+
+
+def round_half_up(values, places: int = 4) -> np.ndarray:
+    """
+    Round to `places` decimals, halves away from zero like ROUND_HALF_UP.
+    
+    np.round() rounds halves to even, which would disagree with the
+    Decimal functions on exact ties. The small epsilon absorbs binary
+    representation error (1 / 6.4 is 0.15624999... in float64) so decimal
+    ties still round up. NaN is preserved.
+    """
+    scale = 10.0 ** places
+    values = np.asarray(values, dtype=np.float64)
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + 1e-9) / scale
+
+
+def to_decimals(values, places: int = 4) -> list:
+    """
+    Storage boundary: convert a 1-D float array to Decimals (None for NaN).
+    
+    Example:
+        >>> to_decimals(np.array([0.53164557, np.nan]))
+        [Decimal('0.5316'), None]
+    """
+    quantum = Decimal(1).scaleb(-places)
+    return [
+        None if np.isnan(value) else Decimal(repr(float(value))).quantize(quantum)
+        for value in round_half_up(values, places)
+    ]
@@ -4,6 +4,8 @@ Odds calculation utilities for converting betting odds to probabilities.
 
 from decimal import Decimal, ROUND_HALF_UP
 
+from .odds_batch import DEVIG_METHODS, devig, to_decimals
+
 
 def decimal_to_probability(odds: Decimal) -> Decimal:
     """
@@ -62,15 +64,22 @@ def normalize_probabilities(probabilities: list[Decimal]) -> list[Decimal]:
     ]
 
 
-def odds_to_fair_probability(odds_list: list[Decimal]) -> list[Decimal]:
+def odds_to_fair_probability(
+    odds_list: list[Decimal],
+    method: str = "proportional",
+) -> list[Decimal]:
     """
     Convert a list of decimal odds to fair (vig-removed) probabilities.
     
     This is a convenience function combining decimal_to_probability
-    and normalize_probabilities.
+    and normalize_probabilities (or another de-vig method).
     
     Args:
         odds_list: List of decimal odds for all outcomes in a market.
+        method: De-vig method, one of DEVIG_METHODS:
+            - proportional: scale every probability by the same factor
+            - power, shin, odds_ratio: take more of the margin off
+              longshots (e.g. OTH) than favourites
     
     Returns:
         List of fair probabilities (sum to 1.0).
@@ -81,7 +90,16 @@ def odds_to_fair_probability(odds_list: list[Decimal]) -> list[Decimal]:
         [Decimal('0.5317'), Decimal('0.4683')]
     """
     implied_probs = [decimal_to_probability(odds) for odds in odds_list]
-    return normalize_probabilities(implied_probs)
+    
+    if method == "proportional":
+        return normalize_probabilities(implied_probs)
+    
+    if method not in DEVIG_METHODS:
+        raise ValueError(
+            f"Unknown de-vig method: {method}. Available: {', '.join(DEVIG_METHODS)}"
+        )
+    
+    return to_decimals(devig([float(prob) for prob in implied_probs], method))
 
 
 def calculate_overround(odds_list: list[Decimal]) -> Decimal:
@@ -0,0 +1,267 @@
+"""
+Bulk write path for scraped odds.
+
+Most scrapes return exactly the prices already stored, so writes go
+through a LastPriceCache: only readings whose odds moved (or that start a
+new day in the daily rollup) touch the database, and moves are logged as
+IntradayOddsReading change events.
+"""
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from polls.models import Bookmaker, IntradayOddsReading, Party, OddsReading
+from .consensus import ConsensusAggregator
+from .series_store import update_series
+
+logger = logging.getLogger(__name__)
+
+
+def get_bookmakers(names: list[str]) -> dict[str, Bookmaker]:
+    """
+    Fetch bookmakers by name, creating any that don't exist yet.
+    
+    Uses one query for the lookup plus one insert for missing names,
+    instead of a get_or_create per bookmaker.
+    
+    Returns:
+        Dict mapping bookmaker name to Bookmaker instance.
+    """
+    bookmakers = Bookmaker.objects.in_bulk(names, field_name="name")
+    missing = [name for name in names if name not in bookmakers]
+    
+    if missing:
+        Bookmaker.objects.bulk_create(
+            [Bookmaker(name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        bookmakers.update(Bookmaker.objects.in_bulk(missing, field_name="name"))
+    
+    return bookmakers
+
+
+class LastPriceCache:
+    """
+    Last stored price per (bookmaker name, party code).
+    
+    Warmed from the newest daily reading of every pair (the daily row
+    always carries the latest price) and kept current by the save
+    functions once their transaction commits. Assumes this process is the
+    only writer; call warm() again if another one may have written.
+    """
+    
+    def __init__(self):
+        self._prices: dict[tuple[str, str], tuple[Decimal, date]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._prices)
+    
+    def warm(self) -> int:
+        """
+        Load the latest price of every bookmaker/party pair.
+        
+        Latest-per-group without scanning every reading: one query per
+        bookmaker walks the parties and, for each, seeks the newest
+        reading in idx_odds_latest. Every pair with a reading is loaded,
+        whether or not it has an OddsSeries row yet.
+        """
+        prices = {}
+        for bookmaker in Bookmaker.objects.order_by():
+            newest = OddsReading.objects.filter(
+                bookmaker=bookmaker, party=OuterRef("pk")
+            ).order_by("-date")
+            rows = Party.objects.annotate(
+                latest_odds=Subquery(newest.values("odds")[:1]),
+                latest_date=Subquery(newest.values("date")[:1]),
+            ).order_by().values_list("code", "latest_odds", "latest_date")
+            
+            for party, odds, reading_date in rows:
+                if reading_date is not None:
+                    prices[(bookmaker.name, party)] = (odds, reading_date)
+        
+        self._prices = prices
+        logger.info(f"Warmed price cache with {len(self._prices)} prices")
+        return len(self._prices)
+    
+    def get(self, bookmaker: str, party: str) -> Decimal | None:
+        entry = self._prices.get((bookmaker, party))
+        return entry[0] if entry else None
+    
+    def has_changed(self, bookmaker: str, party: str, odds: Decimal) -> bool:
+        """True if `odds` differs from the last stored price (or none is stored)."""
+        return self.get(bookmaker, party) != odds
+    
+    def is_stored(self, bookmaker: str, party: str, odds: Decimal, reading_date: date) -> bool:
+        """True if the daily row for `reading_date` already holds `odds`."""
+        return self._prices.get((bookmaker, party)) == (odds, reading_date)
+    
+    def set(self, bookmaker: str, party: str, odds: Decimal, reading_date: date) -> None:
+        self._prices[(bookmaker, party)] = (odds, reading_date)
+
+
+def save_odds_readings(
+    results: list[dict],
+    reading_date: date | None = None,
+    price_cache: LastPriceCache | None = None,
+    aggregator: ConsensusAggregator | None = None,
+) -> dict[str, int]:
+    """
+    Upsert one run's odds readings in a single transaction.
+    
+    All parties are resolved in one query and every reading is written
+    with one INSERT ... ON CONFLICT (date, bookmaker, party) DO UPDATE.
+    If a bookmaker returns the same party code more than once (e.g.
+    several OTH outcomes), the last one wins, as with update_or_create.
+    
+    Args:
+        results: List of {"name": bookmaker name, "data": [OddsResult, ...]}
+            dicts, as produced by the scrape_odds command.
+        reading_date: Date to store readings under. Defaults to today in
+            local time (TIME_ZONE), as save_intraday_readings() uses.
+        price_cache: If given, readings whose daily row already holds the
+            same odds are skipped, and the cache is updated on commit.
+        aggregator: If given, the written readings are applied to it on
+            commit, ready for its flush().
+    
+    Returns:
+        Dict mapping bookmaker name to the number of readings written.
+    
+    Example:
+        >>> save_odds_readings([{"name": "Betr", "data": [{"party": "ALP", "odds": Decimal("1.85")}]}])
+        {'Betr': 1}
+    """
+    reading_date = reading_date or timezone.localdate()
+    
+    prices = _latest_prices(results)
+    if price_cache is not None:
+        prices = {
+            key: odds for key, odds in prices.items()
+            if not price_cache.is_stored(*key, odds, reading_date)
+        }
+    
+    saved = {result["name"]: 0 for result in results}
+    if not prices:
+        logger.info(f"No odds changes to save for {reading_date}")
+        return saved
+    
+    party_codes = {party for _, party in prices}
+    with transaction.atomic():
+        parties = Party.objects.in_bulk(party_codes, field_name="code")
+        bookmakers = get_bookmakers(list(saved))
+        
+        readings = []
+        for (bookmaker_name, party_code), odds in prices.items():
+            party = parties.get(party_code)
+            if party is None:
+                logger.warning(f"Party not found: {party_code} - skipping")
+                continue
+            
+            readings.append(OddsReading(
+                date=reading_date,
+                bookmaker=bookmakers[bookmaker_name],
+                party=party,
+                odds=odds,
+            ))
+            saved[bookmaker_name] += 1
+        
+        if readings:
+            OddsReading.objects.bulk_create(
+                readings,
+                update_conflicts=True,
+                unique_fields=["date", "bookmaker", "party"],
+                update_fields=["odds"],
+            )
+            update_series(
+                (reading.bookmaker_id, reading.party_id, reading_date, reading.odds)
+                for reading in readings
+            )
+        
+        def on_commit():
+            if price_cache is not None:
+                for reading in readings:
+                    price_cache.set(
+                        reading.bookmaker.name, reading.party.code, reading.odds, reading_date
+                    )
+            if aggregator is not None:
+                aggregator.apply(
+                    reading_date,
+                    [(reading.bookmaker_id, reading.party_id, reading.odds) for reading in readings],
+                )
+        transaction.on_commit(on_commit)
+    
+    logger.info(f"Saved {len(readings)} odds readings for {reading_date}")
+    return saved
+
+
+def save_intraday_readings(
+    results: list[dict],
+    timestamp: datetime | None = None,
+    price_cache: LastPriceCache | None = None,
+    aggregator: ConsensusAggregator | None = None,
+) -> dict[str, int]:
+    """
+    Record price changes and roll them up into the daily table.
+    
+    A reading whose odds differ from the last stored price is logged as an
+    IntradayOddsReading change event at `timestamp`; unchanged readings
+    are not stored again. The daily OddsReading row for the local date is
+    upserted when the price moved or the pair has no row for that day yet,
+    so it always holds the latest price of the day.
+    
+    Args:
+        results: As for save_odds_readings().
+        timestamp: When the odds were scraped. Defaults to now.
+        price_cache: Last known prices. A freshly warmed cache is used if
+            None; pass a long-lived one to avoid re-reading the database.
+        aggregator: As for save_odds_readings().
+    
+    Returns:
+        Dict mapping bookmaker name to the number of daily readings
+        written (0 for every bookmaker means nothing changed).
+    """
+    timestamp = timestamp or timezone.now()
+    if price_cache is None:
+        price_cache = LastPriceCache()
+        price_cache.warm()
+    
+    changes = {
+        key: odds for key, odds in _latest_prices(results).items()
+        if price_cache.has_changed(*key, odds)
+    }
+    
+    with transaction.atomic():
+        saved = save_odds_readings(
+            results, timezone.localdate(timestamp), price_cache, aggregator
+        )
+        if not changes:
+            return saved
+        
+        parties = Party.objects.in_bulk({party for _, party in changes}, field_name="code")
+        bookmakers = get_bookmakers(list({bookmaker for bookmaker, _ in changes}))
+        IntradayOddsReading.objects.bulk_create(
+            IntradayOddsReading(
+                timestamp=timestamp,
+                bookmaker=bookmakers[bookmaker_name],
+                party=parties[party_code],
+                odds=odds,
+            )
+            for (bookmaker_name, party_code), odds in changes.items()
+            if party_code in parties  # Already warned about by save_odds_readings
+        )
+    
+    logger.info(f"Recorded {len(changes)} price changes at {timestamp}")
+    return saved
+
+
+def _latest_prices(results: list[dict]) -> dict[tuple[str, str], Decimal]:
+    """{(bookmaker name, party code): odds}, last reading wins."""
+    return {
+        (result["name"], item["party"]): item["odds"]
+        for result in results
+        for item in result["data"]
+    }
@@ -0,0 +1,419 @@
+"""
+Request-level performance metrics for the web tier.
+
+PerformanceMiddleware (polls.middleware) opens a RequestStats for each
+request. While it is open:
+    
+    - every SQL query is counted and timed by an execute_wrapper that
+      PollsConfig.ready() installs on each new database connection,
+    - template renders are timed by the TimedDjangoTemplates backend,
+    - cache gets are counted as hits or misses by MeteredFileBasedCache.
+
+When the request finishes its figures are folded into this process's
+RequestMetrics: a latency histogram and query/template/status counters
+per view. Each gunicorn worker periodically copies its totals into the
+shared file cache, and the /metrics/ view sums every worker's copy, so
+Prometheus sees the whole pool whichever worker answers the scrape.
+
+Workers come and go (gunicorn restarts them, PIDs get reused), but the
+pool totals are Prometheus counters and must never go down. Each worker
+process registers under its own id, and a worker that stops flushing is
+folded into a retained total rather than dropped.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.template.backends.django import DjangoTemplates
+
+from .run_metrics import prometheus_labels
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements kept per request for the slow request log
+MAX_CAPTURED_QUERIES = 50
+
+# How often a worker copies its totals to the shared cache, and how long
+# after its last flush a worker is presumed gone and its totals retired
+FLUSH_INTERVAL = 10  # seconds
+WORKER_TTL = 60 * 60 * 24  # seconds
+
+# Guards the read-modify-write of the worker list and retained total.
+# Held for a few cache operations, so waiters give up quickly.
+LOCK_TIMEOUT = 5  # seconds
+LOCK_WAIT = 0.5  # seconds
+LOCK_POLL_INTERVAL = 0.01  # seconds
+
+WORKERS_KEY = "betpoll:metrics:workers"
+WORKER_KEY = "betpoll:metrics:worker:{}"
+RETIRED_KEY = "betpoll:metrics:retired"
+LOCK_KEY = "betpoll:metrics:lock"
+
+
+class RequestStats:
+    """Query, template and cache figures for the request in progress."""
+    
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.captured: list[tuple[str, float]] = []  # (sql, seconds), capped
+    
+    def add_query(self, sql: str, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+        if len(self.captured) < MAX_CAPTURED_QUERIES:
+            self.captured.append((sql, seconds))
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def collect_request_stats():
+    """Open a RequestStats for the enclosed block (one request)."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_recorder(execute, sql, params, many, context):
+    """
+    execute_wrapper that times queries made during a request.
+    
+    Installed on every connection, so outside a request (management
+    commands, the broadcaster's poller) it only costs a ContextVar lookup.
+    """
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """connection_created receiver: add query_recorder once per connection."""
+    if query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_recorder)
+
+
+class TimedTemplate:
+    """Backend template wrapper that adds render time to the current request."""
+    
+    def __init__(self, template):
+        self.template = template
+    
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+    
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return self.template.render(context, request)
+        
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, with render time recorded per request.
+    
+    Only top-level renders (render(), render_to_string(), TemplateResponse)
+    go through the backend; {% include %}s are counted in their parent.
+    """
+    
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+    
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class MeteredFileBasedCache(FileBasedCache):
+    """FileBasedCache that counts gets made during a request as hits or misses."""
+    
+    _missing = object()
+    
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        stats = _current.get()
+        if stats is not None:
+            if value is self._missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is self._missing else value
+
+
+class RequestMetrics:
+    """
+    This process's request totals, keyed by view.
+    
+    Totals are plain JSON-able dicts so they can be copied to the shared
+    cache and summed across workers:
+        {"views": {view: {"buckets": [count per LATENCY_BUCKETS bound,
+                                      then +Inf],
+                          "sum": seconds, "count": requests,
+                          "queries": n, "query_seconds": seconds,
+                          "template_seconds": seconds,
+                          "status": {"2xx": n, ...}}},
+         "cache": {"hits": n, "misses": n}}
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = empty_totals()
+        self._flushed = 0.0
+        self._pid = None
+        self._worker_id = None
+    
+    def record(self, view: str, status: int, seconds: float, stats: RequestStats) -> None:
+        """Fold one finished request into the totals."""
+        with self._lock:
+            entry = self._totals["views"].get(view)
+            if entry is None:
+                entry = self._totals["views"][view] = _empty_view()
+            
+            entry["buckets"][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            entry["sum"] += seconds
+            entry["count"] += 1
+            entry["queries"] += stats.queries
+            entry["query_seconds"] += stats.query_seconds
+            entry["template_seconds"] += stats.template_seconds
+            status_class = f"{status // 100}xx"
+            entry["status"][status_class] = entry["status"].get(status_class, 0) + 1
+            
+            self._totals["cache"]["hits"] += stats.cache_hits
+            self._totals["cache"]["misses"] += stats.cache_misses
+    
+    def reset(self) -> None:
+        """Zero this process's totals."""
+        with self._lock:
+            self._totals = empty_totals()
+    
+    def snapshot(self) -> dict:
+        """A deep copy of the totals."""
+        with self._lock:
+            return merge_totals([self._totals])
+    
+    def flush_due(self) -> bool:
+        """Whether FLUSH_INTERVAL has passed since the last flush."""
+        return time.monotonic() - self._flushed >= FLUSH_INTERVAL
+    
+    def flush(self, force: bool = False) -> None:
+        """
+        Copy the totals to the shared cache, at most every FLUSH_INTERVAL.
+        
+        Blocking file I/O: async callers should run it in a thread (see
+        PerformanceMiddleware) and only when flush_due().
+        """
+        with self._lock:
+            if not force and not self.flush_due():
+                return
+            self._flushed = time.monotonic()
+        
+        worker_id = self._current_worker_id()
+        try:
+            cache.set(
+                WORKER_KEY.format(worker_id),
+                {"flushed": time.time(), "totals": self.snapshot()},
+                None,  # Retired by collect(), not expired by the cache
+            )
+            # Checked every flush, so a worker that lost the lock or was
+            # wiped from the cache registers again
+            if worker_id not in (cache.get(WORKERS_KEY) or []):
+                _update_workers(
+                    lambda workers: workers if worker_id in workers else [*workers, worker_id]
+                )
+        except Exception:
+            logger.exception("Flushing request metrics failed")
+    
+    def collect(self) -> dict:
+        """
+        Totals summed over every worker, including retired ones.
+        
+        Workers that haven't flushed within WORKER_TTL are folded into the
+        retained total and forgotten, so the sum never goes down.
+        """
+        token = _current.set(None)  # Don't count our own cache reads
+        try:
+            self.flush(force=True)
+            _update_workers(_retire_expired)
+            workers = cache.get(WORKERS_KEY) or []
+            keys = [WORKER_KEY.format(worker_id) for worker_id in workers]
+            snapshots = [entry["totals"] for entry in cache.get_many(keys).values()]
+            retired = cache.get(RETIRED_KEY) or empty_totals()
+        finally:
+            _current.reset(token)
+        return merge_totals([retired, *snapshots])
+    
+    def _current_worker_id(self) -> str:
+        """PID plus a random suffix, so a later process reusing the PID gets its own key."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._worker_id = f"{pid}-{uuid.uuid4().hex[:8]}"
+        return self._worker_id
+
+
+def _update_workers(update) -> None:
+    """
+    Apply `update` to the worker list under LOCK_KEY.
+    
+    The lock (cache.add) serialises registration and retirement across
+    workers. It is best-effort with file-based caches, like the build
+    lock in polls.services.cache; a registration that doesn't get it is
+    retried on the worker's next flush.
+    
+    Args:
+        update: Maps the current worker id list to the new one; may also
+            update other keys while the lock is held.
+    """
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            logger.warning("Timed out waiting for the request metrics lock")
+            return
+        time.sleep(LOCK_POLL_INTERVAL)
+    
+    try:
+        workers = cache.get(WORKERS_KEY) or []
+        updated = update(workers)
+        if updated != workers:
+            cache.set(WORKERS_KEY, updated, None)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _retire_expired(workers: list[str]) -> list[str]:
+    """Fold workers silent for WORKER_TTL into RETIRED_KEY; return the rest."""
+    keys = {worker_id: WORKER_KEY.format(worker_id) for worker_id in workers}
+    entries = cache.get_many(keys.values())
+    cutoff = time.time() - WORKER_TTL
+    
+    expired = [
+        worker_id for worker_id in workers
+        if keys[worker_id] not in entries or entries[keys[worker_id]]["flushed"] < cutoff
+    ]
+    if not expired:
+        return workers
+    
+    retired = merge_totals([
+        cache.get(RETIRED_KEY) or empty_totals(),
+        *(entries[keys[worker_id]]["totals"] for worker_id in expired if keys[worker_id] in entries),
+    ])
+    live = [worker_id for worker_id in workers if worker_id not in expired]
+    # Together, so a reader can't count a retired worker twice for long
+    cache.set_many({RETIRED_KEY: retired, WORKERS_KEY: live}, None)
+    cache.delete_many([keys[worker_id] for worker_id in expired])
+    logger.info(f"Retired request metrics of {len(expired)} expired worker(s)")
+    return live
+
+
+def empty_totals() -> dict:
+    return {"views": {}, "cache": {"hits": 0, "misses": 0}}
+
+
+def _empty_view() -> dict:
+    return {
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        "sum": 0.0,
+        "count": 0,
+        "queries": 0,
+        "query_seconds": 0.0,
+        "template_seconds": 0.0,
+        "status": {},
+    }
+
+
+def merge_totals(snapshots) -> dict:
+    """Sum RequestMetrics totals (e.g. one per worker) into a new dict."""
+    merged = empty_totals()
+    for snapshot in snapshots:
+        for view, entry in snapshot["views"].items():
+            target = merged["views"].setdefault(view, _empty_view())
+            target["buckets"] = [a + b for a, b in zip(target["buckets"], entry["buckets"])]
+            for field in ("sum", "count", "queries", "query_seconds", "template_seconds"):
+                target[field] += entry[field]
+            for status_class, count in entry["status"].items():
+                target["status"][status_class] = target["status"].get(status_class, 0) + count
+        for field in ("hits", "misses"):
+            merged["cache"][field] += snapshot["cache"][field]
+    return merged
+
+
+def prometheus_text(totals: dict) -> str:
+    """
+    Render request totals in the Prometheus text exposition format.
+    
+    Returns:
+        A latency histogram and counters per view, plus cache counters.
+    """
+    lines = [
+        "# HELP betpoll_http_request_duration_seconds Request latency by view.",
+        "# TYPE betpoll_http_request_duration_seconds histogram",
+    ]
+    views = sorted(totals["views"].items())
+    for view, entry in views:
+        cumulative = 0
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        for bound, count in zip(bounds, entry["buckets"]):
+            cumulative += count
+            labels = prometheus_labels({"view": view, "le": bound})
+            lines.append(f"betpoll_http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = prometheus_labels({"view": view})
+        lines.append(f"betpoll_http_request_duration_seconds_sum{labels} {entry['sum']}")
+        lines.append(f"betpoll_http_request_duration_seconds_count{labels} {entry['count']}")
+    
+    counters = {
+        "betpoll_http_db_queries_total": ("Database queries by view.", "queries"),
+        "betpoll_http_db_query_seconds_total": ("Database query time by view.", "query_seconds"),
+        "betpoll_http_template_render_seconds_total": ("Template render time by view.", "template_seconds"),
+    }
+    for metric, (help_text, field) in counters.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for view, entry in views:
+            lines.append(f"{metric}{prometheus_labels({'view': view})} {entry[field]}")
+    
+    lines.append("# HELP betpoll_http_responses_total Responses by view and status class.")
+    lines.append("# TYPE betpoll_http_responses_total counter")
+    for view, entry in views:
+        for status_class, count in sorted(entry["status"].items()):
+            labels = prometheus_labels({"view": view, "status": status_class})
+            lines.append(f"betpoll_http_responses_total{labels} {count}")
+    
+    lines.append("# HELP betpoll_cache_gets_total Cache gets made while serving requests.")
+    lines.append("# TYPE betpoll_cache_gets_total counter")
+    for result, field in (("hit", "hits"), ("miss", "misses")):
+        lines.append(f'betpoll_cache_gets_total{{result="{result}"}} {totals["cache"][field]}')
+    
+    return "\n".join(lines) + "\n"
+
+
+# One registry per process, fed by PerformanceMiddleware
+request_metrics = RequestMetrics()
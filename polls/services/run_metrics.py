@@ -0,0 +1,200 @@
+"""
+Structured timing records for scrape runs.
+
+A RunRecorder collects each scraper's PhaseTimer plus the run-level
+steps (save, consensus, snapshot), then stores the run as a ScrapeRun row
+and, if SCRAPE_METRICS_TEXTFILE is set, writes it in the Prometheus text
+format for node_exporter's textfile collector.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from polls.models import ScrapeRun
+from polls.scrapers.timing import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "betpoll_scrape"
+
+
+class RunRecorder:
+    """
+    Collect the timings of one scrape run.
+    
+    Usage:
+        recorder = RunRecorder("scrape_odds")
+        recorder.add_bookmaker(scraper.name, scraper.timings)
+        with recorder.timings.phase("save"):
+            ...
+        run = recorder.finish(rows_written=12)
+    """
+    
+    def __init__(self, command: str):
+        self.command = command
+        self.started_at = timezone.now()
+        self._started = time.perf_counter()
+        self.timings = PhaseTimer()  # Run-level phases
+        self.bookmakers: dict[str, dict] = {}
+    
+    def add_bookmaker(
+        self,
+        name: str,
+        timings: PhaseTimer,
+        error: str | None = None,
+        attempts: int = 1,
+    ) -> None:
+        """Record one scraper's outcome and the phase timings of its last attempt."""
+        self.bookmakers[name] = {
+            "status": "failed" if error else "ok",
+            "error": error,
+            "attempts": attempts,
+            "duration": round(timings.total, 4),
+            "phases": {phase: round(seconds, 4) for phase, seconds in timings.durations.items()},
+        }
+    
+    def add_skipped(self, name: str, reason: str) -> None:
+        """Record a bookmaker that wasn't scraped (e.g. its circuit is open)."""
+        self.bookmakers[name] = {
+            "status": "skipped",
+            "error": reason,
+            "attempts": 0,
+            "duration": 0.0,
+            "phases": {},
+        }
+    
+    def finish(self, rows_written: int = 0, save: bool = True) -> ScrapeRun:
+        """
+        Close the run and build its ScrapeRun record.
+        
+        Args:
+            rows_written: Daily readings the run saved.
+            save: Store the record (False for dry runs).
+        
+        Returns:
+            The ScrapeRun, saved unless `save` is False.
+        """
+        statuses = [b["status"] for b in self.bookmakers.values()]
+        run = ScrapeRun(
+            started_at=self.started_at,
+            command=self.command,
+            duration=round(time.perf_counter() - self._started, 4),
+            succeeded=statuses.count("ok"),
+            failed=statuses.count("failed"),
+            rows_written=rows_written,
+            phases={phase: round(seconds, 4) for phase, seconds in self.timings.durations.items()},
+            bookmakers=self.bookmakers,
+        )
+        if save:
+            run.save()
+        return run
+
+
+def prometheus_text(run: ScrapeRun, bookmakers: dict[str, dict] | None = None) -> str:
+    """
+    Render a run in the Prometheus text exposition format.
+    
+    Args:
+        run: The run to export.
+        bookmakers: Per-bookmaker records to export instead of
+            run.bookmakers - scrape_scheduler passes the latest record of
+            every bookmaker, since each cycle only scrapes the due ones.
+    
+    Returns:
+        Gauges for the run and for each bookmaker's phases.
+    """
+    bookmakers = run.bookmakers if bookmakers is None else bookmakers
+    started = run.started_at.timestamp()
+    
+    metrics = {
+        "last_run_timestamp_seconds": ("Start time of the last scrape run.", [({}, started)]),
+        "run_duration_seconds": ("Wall-clock duration of the last scrape run.", [({}, run.duration)]),
+        "run_phase_seconds": (
+            "Seconds spent in each run-level phase of the last scrape run.",
+            [({"phase": phase}, seconds) for phase, seconds in run.phases.items()],
+        ),
+        "rows_written": ("Daily readings written by the last scrape run.", [({}, run.rows_written)]),
+        "bookmaker_success": (
+            "1 if the bookmaker's last scrape succeeded, else 0 (failed or skipped).",
+            [({"bookmaker": name}, int(b["status"] == "ok")) for name, b in bookmakers.items()],
+        ),
+        "bookmaker_attempts": (
+            "Attempts the bookmaker's last scrape took (0 if skipped).",
+            [({"bookmaker": name}, b.get("attempts", 1)) for name, b in bookmakers.items()],
+        ),
+        "bookmaker_duration_seconds": (
+            "Total timed seconds of the bookmaker's last scrape.",
+            [({"bookmaker": name}, b["duration"]) for name, b in bookmakers.items()],
+        ),
+        "phase_seconds": (
+            "Seconds spent in each phase of the bookmaker's last scrape.",
+            [
+                ({"bookmaker": name, "phase": phase}, seconds)
+                for name, b in bookmakers.items()
+                for phase, seconds in b["phases"].items()
+            ],
+        ),
+    }
+    
+    lines = []
+    for name, (help_text, samples) in metrics.items():
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in samples:
+            lines.append(f"{metric}{prometheus_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(
+    run: ScrapeRun,
+    path: Path | str | None = None,
+    bookmakers: dict[str, dict] | None = None,
+) -> Path | None:
+    """
+    Write prometheus_text() atomically (temp file + rename), as the
+    textfile collector requires.
+    
+    Args:
+        run, bookmakers: See prometheus_text().
+        path: Output file. Defaults to the SCRAPE_METRICS_TEXTFILE setting.
+    
+    Returns:
+        The path written, or None if no path is configured.
+    """
+    path = path or getattr(settings, "SCRAPE_METRICS_TEXTFILE", None)
+    if not path:
+        return None
+    
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(prometheus_text(run, bookmakers))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    logger.debug(f"Wrote scrape metrics to {path}")
+    return path
+
+
+def prometheus_labels(labels: dict[str, str]) -> str:
+    """Format a Prometheus label set, e.g. {bookmaker="Betr",phase="wait"}."""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value (backslash, double quote and newline)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,159 @@
+"""
+Read-side queries that turn stored odds and consensus into chart series.
+
+Rows are read with values_list() and never hydrated into model instances,
+then bucketed and downsampled before they reach a response. Bookmaker
+odds come from the columnar OddsSeries store (one row per series).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from polls.models import Bookmaker, MarketConsensus, OddsReading, Party
+from .downsampling import bucket_series, lttb
+from .series_store import read_series, to_dates
+
+DEFAULT_MAX_POINTS = 500
+
+
+def party_codes(codes: list[str] | None = None) -> dict[int, str]:
+    """Map party id to code, optionally limited to `codes`."""
+    parties = Party.objects.order_by()
+    if codes:
+        parties = parties.filter(code__in=codes)
+    return dict(parties.values_list("id", "code"))
+
+
+def consensus_series(
+    start: date | None = None,
+    end: date | None = None,
+    parties: list[str] | None = None,
+    bucket: str = "day",
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> dict[str, list[tuple]]:
+    """
+    Market consensus per party over a date range.
+    
+    Args:
+        start, end: Inclusive date range (local time). Open-ended if None.
+        parties: Party codes to include. All parties if None.
+        bucket: "raw", "day" or "week" (see downsampling.bucket_series).
+        max_points: LTTB cap on points per series.
+    
+    Returns:
+        {party code: [(timestamp or bucket date, fair_probability,
+        averaged_odds, bookmaker_count), ...]}, oldest first.
+    """
+    codes = party_codes(parties)
+    
+    rows = MarketConsensus.objects.filter(party_id__in=codes).order_by("timestamp")
+    if start:
+        rows = rows.filter(timestamp__gte=_start_of_day(start))
+    if end:
+        rows = rows.filter(timestamp__lt=_start_of_day(end + timedelta(days=1)))
+    
+    series: dict[str, list[tuple]] = defaultdict(list)
+    for party_id, timestamp, fair, odds, count in rows.values_list(
+        "party_id", "timestamp", "fair_probability", "averaged_odds", "bookmaker_count"
+    ):
+        series[codes[party_id]].append(
+            (timezone.localtime(timestamp), float(fair), float(odds), count)
+        )
+    
+    return {
+        code: _downsample(points, bucket, max_points)
+        for code, points in sorted(series.items())
+    }
+
+
+def odds_series(
+    start: date | None = None,
+    end: date | None = None,
+    parties: list[str] | None = None,
+    bookmakers: list[str] | None = None,
+    bucket: str = "day",
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> dict[str, dict[str, list[tuple]]]:
+    """
+    Raw bookmaker odds per bookmaker and party over a date range.
+    
+    Args:
+        start, end: Inclusive date range. Open-ended if None.
+        parties: Party codes to include. All parties if None.
+        bookmakers: Bookmaker names to include. All bookmakers if None.
+        bucket: "raw", "day" or "week" (see downsampling.bucket_series).
+        max_points: LTTB cap on points per series.
+    
+    Returns:
+        {bookmaker name: {party code: [(date, odds), ...]}}, oldest first.
+    """
+    codes = party_codes(parties)
+    names_qs = Bookmaker.objects.order_by()
+    if bookmakers:
+        names_qs = names_qs.filter(name__in=bookmakers)
+    names = dict(names_qs.values_list("id", "name"))
+    
+    series = read_series(names, codes, start, end)
+    
+    result: dict[str, dict[str, list[tuple]]] = defaultdict(dict)
+    for (bookmaker_id, party_id), (days, odds) in sorted(series.items()):
+        points = list(zip(to_dates(days), (odds / 100).tolist()))
+        result[names[bookmaker_id]][codes[party_id]] = _downsample(
+            points, bucket, max_points
+        )
+    return dict(result)
+
+
+def latest_market() -> dict:
+    """
+    The most recent consensus and per-bookmaker odds.
+    
+    Returns:
+        {"consensus_timestamp": datetime | None,
+         "consensus": {party code: {"fair_probability", "averaged_odds",
+                                    "bookmaker_count"}},
+         "odds_date": date | None,
+         "odds": {bookmaker name: {party code: odds}}}
+    """
+    codes = party_codes()
+    
+    latest_timestamp = MarketConsensus.objects.aggregate(latest=Max("timestamp"))["latest"]
+    consensus = {}
+    if latest_timestamp:
+        for party_id, fair, odds, count in MarketConsensus.objects.filter(
+            timestamp=latest_timestamp
+        ).values_list("party_id", "fair_probability", "averaged_odds", "bookmaker_count"):
+            consensus[codes[party_id]] = {
+                "fair_probability": float(fair),
+                "averaged_odds": float(odds),
+                "bookmaker_count": count,
+            }
+    
+    latest_date = OddsReading.objects.aggregate(latest=Max("date"))["latest"]
+    odds = {}
+    if latest_date:
+        names = dict(Bookmaker.objects.values_list("id", "name"))
+        for bookmaker_id, party_id, value in OddsReading.objects.filter(
+            date=latest_date
+        ).values_list("bookmaker_id", "party_id", "odds"):
+            odds.setdefault(names[bookmaker_id], {})[codes[party_id]] = float(value)
+    
+    return {
+        "consensus_timestamp": latest_timestamp,
+        "consensus": dict(sorted(consensus.items())),
+        "odds_date": latest_date,
+        "odds": dict(sorted(odds.items())),
+    }
+
+
+def _downsample(points: list[tuple], bucket: str, max_points: int) -> list[tuple]:
+    """Bucket, then LTTB down to max_points."""
+    return lttb(bucket_series(points, bucket), max_points)
+
+
+def _start_of_day(day: date) -> datetime:
+    """Aware datetime at local midnight of `day`."""
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -0,0 +1,191 @@
+"""
+Columnar odds history: one OddsSeries row per bookmaker/party holding the
+whole daily series as two packed int32 arrays.
+
+Reads are zero-copy - np.frombuffer() views the blobs the database driver
+returns - so a chart never hydrates a row (let alone a model instance)
+per day. The write path keeps the store in step with OddsReading inside
+the same transaction.
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+
+import numpy as np
+from django.db import transaction
+
+from polls.models import OddsReading, OddsSeries
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+DAY_DTYPE = np.dtype("<i4")   # Days since EPOCH
+ODDS_DTYPE = np.dtype("<i4")  # Odds in hundredths
+
+
+def to_day(value: date) -> int:
+    """Day offset of a date from EPOCH."""
+    return (value - EPOCH).days
+
+
+def to_hundredths(odds: Decimal) -> int:
+    """Decimal odds (2 dp, as stored in OddsReading) as integer hundredths."""
+    return int((Decimal(odds) * 100).to_integral_value())
+
+
+def unpack(days: bytes | memoryview, odds: bytes | memoryview) -> tuple[np.ndarray, np.ndarray]:
+    """
+    View a stored series as (day offsets, odds in hundredths) arrays.
+    
+    The arrays share memory with the blobs (no copy) and are read-only.
+    """
+    return np.frombuffer(days, dtype=DAY_DTYPE), np.frombuffer(odds, dtype=ODDS_DTYPE)
+
+
+def pack(days: np.ndarray, odds: np.ndarray) -> tuple[bytes, bytes]:
+    """Serialise arrays for OddsSeries.days / OddsSeries.odds."""
+    return days.astype(DAY_DTYPE).tobytes(), odds.astype(ODDS_DTYPE).tobytes()
+
+
+def merge_points(
+    days: np.ndarray,
+    odds: np.ndarray,
+    new_days: np.ndarray,
+    new_odds: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Insert or overwrite points in a sorted series.
+    
+    New points replace existing ones on the same day; the result stays in
+    day order. Stored points before the first new day are copied as they
+    are, so the common case - today's price appended after the last stored
+    day - is a plain concatenation, and updating the last day re-sorts
+    one point. Only a backfill pays for merging the overlapping tail.
+    
+    Example:
+        >>> merge_points(np.array([1, 2]), np.array([185, 190]), np.array([2, 3]), np.array([195, 200]))
+        (array([1, 2, 3]), array([185, 195, 200]))
+    """
+    new_days, index = np.unique(new_days[::-1], return_index=True)  # Last one wins
+    new_odds = new_odds[::-1][index]
+    if not len(new_days):
+        return days, odds
+    
+    cut = np.searchsorted(days, new_days[0])
+    if cut == len(days):  # Everything is after the last stored day
+        return np.concatenate([days, new_days]), np.concatenate([odds, new_odds])
+    
+    tail_days, tail_odds = days[cut:], odds[cut:]
+    keep = ~np.isin(tail_days, new_days)
+    merged_days = np.concatenate([tail_days[keep], new_days])
+    merged_odds = np.concatenate([tail_odds[keep], new_odds])
+    
+    order = np.argsort(merged_days, kind="stable")
+    return (
+        np.concatenate([days[:cut], merged_days[order]]),
+        np.concatenate([odds[:cut], merged_odds[order]]),
+    )
+
+
+def update_series(readings: Iterable[tuple[int, int, date, Decimal]]) -> int:
+    """
+    Fold written OddsReadings into their OddsSeries rows.
+    
+    Call inside the transaction that wrote the readings, so the store and
+    the daily table commit (or roll back) together.
+    
+    Args:
+        readings: (bookmaker_id, party_id, date, odds) tuples.
+    
+    Returns:
+        Number of series rewritten.
+    """
+    points: dict[tuple[int, int], list[tuple[int, int]]] = {}
+    for bookmaker_id, party_id, reading_date, odds in readings:
+        points.setdefault((bookmaker_id, party_id), []).append(
+            (to_day(reading_date), to_hundredths(odds))
+        )
+    if not points:
+        return 0
+    
+    existing = {
+        (series.bookmaker_id, series.party_id): series
+        for series in OddsSeries.objects.filter(
+            bookmaker_id__in={key[0] for key in points},
+            party_id__in={key[1] for key in points},
+        )
+    }
+    
+    rows = []
+    for (bookmaker_id, party_id), new_points in points.items():
+        series = existing.get((bookmaker_id, party_id))
+        if series is None:
+            series = OddsSeries(bookmaker_id=bookmaker_id, party_id=party_id)
+        
+        new = np.array(new_points, dtype=np.int64)
+        days, odds = merge_points(*unpack(series.days, series.odds), new[:, 0], new[:, 1])
+        series.days, series.odds = pack(days, odds)
+        rows.append(series)
+    
+    OddsSeries.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["bookmaker", "party"],
+        update_fields=["days", "odds"],
+    )
+    return len(rows)
+
+
+def rebuild_series() -> int:
+    """
+    Regenerate every OddsSeries from OddsReading.
+    
+    Returns:
+        Number of series written.
+    """
+    readings = OddsReading.objects.order_by("bookmaker_id", "party_id", "date").values_list(
+        "bookmaker_id", "party_id", "date", "odds"
+    )
+    
+    with transaction.atomic():
+        OddsSeries.objects.all().delete()
+        count = update_series(readings.iterator(chunk_size=5000))
+    logger.info(f"Rebuilt {count} odds series")
+    return count
+
+
+def read_series(
+    bookmaker_ids: Iterable[int],
+    party_ids: Iterable[int],
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[tuple[int, int], tuple[np.ndarray, np.ndarray]]:
+    """
+    Load series as arrays, optionally cut to a date range.
+    
+    Args:
+        bookmaker_ids, party_ids: Series to load (all combinations).
+        start, end: Inclusive date range. Open-ended if None.
+    
+    Returns:
+        {(bookmaker_id, party_id): (day offsets, odds in hundredths)}
+    """
+    rows = OddsSeries.objects.filter(
+        bookmaker_id__in=bookmaker_ids, party_id__in=party_ids
+    ).values_list("bookmaker_id", "party_id", "days", "odds")
+    
+    result = {}
+    for bookmaker_id, party_id, days_blob, odds_blob in rows:
+        days, odds = unpack(days_blob, odds_blob)
+        lo = np.searchsorted(days, to_day(start)) if start else 0
+        hi = np.searchsorted(days, to_day(end), side="right") if end else len(days)
+        if hi > lo:
+            result[(bookmaker_id, party_id)] = (days[lo:hi], odds[lo:hi])
+    return result
+
+
+def to_dates(days: np.ndarray) -> list[date]:
+    """Day offsets back to date objects."""
+    return (np.datetime64(EPOCH, "D") + days.astype("timedelta64[D]")).astype(date).tolist()
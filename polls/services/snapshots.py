@@ -0,0 +1,119 @@
+"""
+Static snapshot export of the dashboard data.
+
+Writes the latest consensus, latest per-bookmaker odds and chart series as
+JSON files under STATIC_ROOT, each with pre-compressed .gz (and .br, if
+Brotli is installed) siblings. nginx can serve these directly with
+`gzip_static on;` / `brotli_static on;`, so the read path never touches
+Python or the database.
+"""
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .series import consensus_series, latest_market, odds_series
+
+try:
+    import brotli
+except ImportError:  # Optional - only gzip files are written without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Chart series in the snapshot are capped like the API defaults
+SNAPSHOT_MAX_POINTS = 1000
+
+
+def snapshot_dir() -> Path:
+    """Directory snapshots are written to (SNAPSHOT_DIR setting)."""
+    return Path(getattr(settings, "SNAPSHOT_DIR", Path(settings.STATIC_ROOT) / "data"))
+
+
+def build_snapshot() -> dict[str, dict]:
+    """
+    Build every snapshot document.
+    
+    The series documents carry the same fields and series as the
+    /api/consensus/ and /api/odds/ responses (with points=SNAPSHOT_MAX_POINTS),
+    so clients can read either.
+    
+    Returns:
+        {filename: JSON-serialisable payload}
+    """
+    generated = timezone.now()
+    
+    return {
+        "latest.json": {
+            "generated": generated,
+            **latest_market(),
+        },
+        "consensus.json": {
+            "generated": generated,
+            "fields": ["timestamp", "fair_probability", "averaged_odds", "bookmaker_count"],
+            "series": consensus_series(max_points=SNAPSHOT_MAX_POINTS),
+        },
+        "odds.json": {
+            "generated": generated,
+            "fields": ["date", "odds"],
+            "series": odds_series(max_points=SNAPSHOT_MAX_POINTS),
+        },
+    }
+
+
+def export_snapshot(directory: Path | None = None) -> list[Path]:
+    """
+    Build the snapshot and write it, with compressed copies, to disk.
+    
+    Each file is written to a temp file and renamed into place, so the
+    static server never sees a half-written document.
+    
+    Args:
+        directory: Output directory. Defaults to snapshot_dir().
+    
+    Returns:
+        Paths of every file written.
+    """
+    directory = Path(directory or snapshot_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    
+    written = []
+    for filename, payload in build_snapshot().items():
+        body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+        
+        encodings = {
+            filename: body,
+            f"{filename}.gz": gzip.compress(body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            encodings[f"{filename}.br"] = brotli.compress(body, quality=11)
+        
+        for name, data in encodings.items():
+            path = directory / name
+            _atomic_write(path, data)
+            written.append(path)
+    
+    if brotli is None:
+        logger.warning("Brotli not installed - wrote gzip snapshots only")
+    logger.info(f"Exported {len(written)} snapshot files to {directory}")
+    return written
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write bytes to `path` via a temp file + rename."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
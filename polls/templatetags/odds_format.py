@@ -0,0 +1,22 @@
+"""
+Template filters for displaying odds and probabilities.
+"""
+
+from django import template
+from django.template.defaultfilters import floatformat
+
+register = template.Library()
+
+
+@register.filter
+def percent(value, places: int = 1) -> str:
+    """
+    Format a probability (0-1) as a percentage.
+    
+    Example:
+        {{ 0.5384|percent }} -> "53.8%"
+        {{ 0.5384|percent:2 }} -> "53.84%"
+    """
+    if value in (None, ""):
+        return ""
+    return f"{floatformat(float(value) * 100, places)}%"
@@ -1,3 +1,2095 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import hashlib
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from bs4 import BeautifulSoup
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import Max
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from polls.management.commands.scrape_odds import Command as ScrapeOddsCommand
+from polls.middleware import PerformanceMiddleware
+from polls.models import (
+    Bookmaker,
+    CircuitBreaker,
+    IntradayOddsReading,
+    MarketConsensus,
+    OddsReading,
+    OddsSeries,
+    Party,
+    ScrapeRun,
+)
+from polls.routers import REPLICA_DB_ALIAS, PrimaryReplicaRouter, pin_primary
+from polls.scrapers import (
+    ALL_SCRAPERS,
+    BaseScraper,
+    BetrScraper,
+    BrowserPool,
+    PointsBetScraper,
+    get_scrapers,
+)
+from polls.scrapers.base import STABLE_OUTCOMES_JS, WAIT_STRATEGIES
+from polls.scrapers.replay import fixture_paths
+from polls.scrapers.scheduler import RETRY_MAX_DELAY, ScrapeSchedule, retry_delay
+from polls.scrapers.timing import PhaseTimer
+from polls.services import cache as response_cache, circuit_breaker, request_metrics as request_metrics_module
+from polls.services.broadcaster import OddsBroadcaster, format_sse
+from polls.services.consensus import (
+    ConsensusAggregator,
+    calculate_consensus,
+    consensus_timestamp,
+    rebuild_market_consensus,
+    update_market_consensus,
+)
+from polls.services.downsampling import lttb
+from polls.services.odds_batch import (
+    DEVIG_METHODS,
+    MAX_ITERATIONS,
+    _bisect,
+    batch_consensus,
+    batch_odds_to_probabilities,
+    build_odds_matrix,
+    devig,
+    to_decimals,
+)
+from polls.services.odds_calculator import odds_to_fair_probability
+from polls.services.odds_writer import LastPriceCache, save_intraday_readings, save_odds_readings
+from polls.services.request_metrics import RequestMetrics, RequestStats, request_metrics
+from polls.services.run_metrics import RunRecorder, prometheus_text, write_textfile
+from polls.services.series import consensus_series, latest_market
+from polls.services.series_store import merge_points, unpack
+from polls.services.snapshots import SNAPSHOT_MAX_POINTS, brotli, export_snapshot
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class RunScrapersTests(SimpleTestCase):
+    """scrape_odds runs scrapers side by side, isolated and bounded by --concurrency."""
+    
+    def test_failure_is_isolated_and_concurrency_bounded(self):
+        gauge = [0, 0]
+        scrapers = [
+            _flaky_scraper(0, "A", delay=0.02, gauge=gauge),
+            _flaky_scraper(99, "Broken", delay=0.01, gauge=gauge),
+            _flaky_scraper(0, "C", delay=0.02, gauge=gauge),
+            _flaky_scraper(0, "D", delay=0.02, gauge=gauge),
+        ]
+        command = ScrapeOddsCommand(stdout=StringIO())
+        command._recorder = RunRecorder("scrape_odds")
+        
+        with self.assertLogs("polls.management.commands.scrape_odds", "ERROR"):
+            results = asyncio.run(command._run_scrapers(scrapers, concurrency=2))
+        
+        self.assertEqual([r["name"] for r in results["success"]], ["A", "C", "D"])
+        self.assertEqual(results["failed"], [{"name": "Broken", "error": "Timeout 1"}])
+        self.assertEqual(gauge, [0, 2])
+
+
+def _flaky_scraper(
+    failures: int,
+    name: str = "Flaky",
+    delay: float = 0.0,
+    gauge: list[int] | None = None,
+) -> type[BaseScraper]:
+    """
+    A browserless scraper that fails its first `failures` scrapes.
+    
+    Each scrape takes `delay` seconds; `gauge` ([running, peak]) tracks
+    how many scrapes are in flight at once.
+    """
+    calls = []
+    
+    class FlakyScraper(BaseScraper):
+        async def __aenter__(self):
+            return self
+        
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            return False
+        
+        async def scrape(self):
+            calls.append(1)
+            attempt = len(calls)
+            if gauge is not None:
+                gauge[0] += 1
+                gauge[1] = max(gauge)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                if gauge is not None:
+                    gauge[0] -= 1
+            if attempt <= failures:
+                raise TimeoutError(f"Timeout {attempt}")
+            return [{"party": "ALP", "odds": Decimal("1.85")}]
+    
+    FlakyScraper.name = name
+    return FlakyScraper
+
+
+class BrowserPoolTests(SimpleTestCase):
+    """BrowserPool caps live contexts and relaunches Chromium once idle, against a fake browser."""
+    
+    def setUp(self):
+        self.browsers = []
+        
+        class FakeContext:
+            async def close(self):
+                pass
+        
+        test = self
+        
+        class FakeBrowser:
+            def __init__(self):
+                self.connected = True
+                test.browsers.append(self)
+            
+            def is_connected(self):
+                return self.connected
+            
+            async def new_context(self, **options):
+                return FakeContext()
+            
+            async def close(self):
+                self.connected = False
+        
+        self.launch = mock.AsyncMock(side_effect=lambda headless: FakeBrowser())
+        playwright = mock.Mock(chromium=mock.Mock(launch=self.launch), stop=mock.AsyncMock())
+        patcher = mock.patch(
+            "polls.scrapers.browser_pool.async_playwright",
+            return_value=mock.Mock(start=mock.AsyncMock(return_value=playwright)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_contexts_are_capped(self):
+        async def run():
+            async with BrowserPool(max_contexts=2) as pool:
+                first = await pool.acquire()
+                await pool.acquire()
+                waiting = asyncio.create_task(pool.acquire())
+                await asyncio.sleep(0.01)
+                self.assertFalse(waiting.done())
+                self.assertEqual(pool.live_contexts, 2)
+                
+                await pool.release(first)
+                await asyncio.wait_for(waiting, 1)
+                self.assertEqual(pool.live_contexts, 2)
+        
+        with self.assertLogs("polls.scrapers.browser_pool", "INFO"):
+            asyncio.run(run())
+        self.assertEqual(len(self.browsers), 1)
+    
+    def test_recycles_when_idle(self):
+        async def run():
+            async with BrowserPool(max_contexts=3, recycle_after=2) as pool:
+                async with pool.context(), pool.context():
+                    # Due for recycling, but not while contexts are live
+                    async with pool.context():
+                        self.assertEqual(len(self.browsers), 1)
+                
+                async with pool.context():
+                    self.assertEqual(len(self.browsers), 2)
+                self.assertFalse(self.browsers[0].connected)
+        
+        with self.assertLogs("polls.scrapers.browser_pool", "INFO") as logs:
+            asyncio.run(run())
+        self.assertIn("Recycling browser after 3 contexts", "\n".join(logs.output))
+    
+    def test_failed_launch_frees_the_slot(self):
+        launch = self.launch.side_effect
+        attempts = []
+        
+        def launch_once_broken(headless):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("no chromium")
+            return launch(headless)
+        
+        self.launch.side_effect = launch_once_broken
+        
+        async def run():
+            async with BrowserPool(max_contexts=1) as pool:
+                with self.assertRaises(RuntimeError):
+                    await pool.acquire()
+                await asyncio.wait_for(pool.acquire(), 1)
+        
+        with self.assertLogs("polls.scrapers.browser_pool", "INFO"):
+            asyncio.run(run())
+
+
+class ResourceBlockingTests(SimpleTestCase):
+    """Scrapers abort trackers and heavy resources, and count what they blocked."""
+    
+    def test_block_reason(self):
+        scraper = PointsBetScraper()
+        cases = [
+            ("https://www.google-analytics.com/collect", "script", "tracker"),
+            ("https://cdn.segment.io/analytics.js", "script", "tracker"),
+            ("https://notfacebook.com/pixel.js", "script", None),  # Not a subdomain
+            ("https://pointsbet.com.au/logo.png", "image", "image"),
+            ("https://pointsbet.com.au/fonts/a.woff2", "font", "font"),
+            ("https://pointsbet.com.au/api/mes/v3/events/2306240", "xhr", None),
+            ("https://pointsbet.com.au/app.css", "stylesheet", None),
+        ]
+        for url, resource_type, reason in cases:
+            self.assertEqual(scraper.block_reason(url, resource_type), reason, url)
+        
+        with mock.patch.object(PointsBetScraper, "ALLOWED_HOSTS", ("sentry.io",)):
+            self.assertIsNone(scraper.block_reason("https://o1.sentry.io/api/", "xhr"))
+    
+    def test_route_request_counts(self):
+        scraper = PointsBetScraper()
+        routes = [
+            mock.Mock(request=mock.Mock(url=url, resource_type=resource_type),
+                      abort=mock.AsyncMock(), continue_=mock.AsyncMock())
+            for url, resource_type in (
+                ("https://pointsbet.com.au/logo.png", "image"),
+                ("https://www.googletagmanager.com/gtm.js", "script"),
+                ("https://pointsbet.com.au/", "document"),
+            )
+        ]
+        
+        async def route_all():
+            for route in routes:
+                await scraper._route_request(route)
+        
+        asyncio.run(route_all())
+        
+        self.assertEqual(dict(scraper.request_stats.blocked), {"image": 1, "tracker": 1})
+        self.assertEqual(scraper.request_stats.allowed, 1)
+        self.assertEqual([route.abort.await_count for route in routes], [1, 1, 0])
+        self.assertEqual(routes[2].continue_.await_count, 1)
+
+
+class NetworkCaptureTests(SimpleTestCase):
+    """Odds come from the SPA's own API response, falling back to the DOM without it."""
+    
+    PAYLOAD = {"fixedOddsMarkets": [
+        {"eventName": "Labor Seats Won", "outcomes": [{"name": "Over 75.5", "price": 1.8}]},
+        {"eventName": "Next Federal Government", "outcomes": [
+            {"name": "Labor", "price": 1.3},
+            {"name": "Coalition"},            # Suspended - no price
+            {"price": 9.0},                   # No name
+            {"name": "Any Other", "price": 101},
+        ]},
+        {"outcomes": [{"name": "Labor", "price": 1.25}]},  # Unnamed market
+    ]}
+    
+    def _navigate(self, page: "_FakePage"):
+        return asyncio.run(PointsBetScraper().navigate(page))
+    
+    def test_parse_api_payload_keeps_only_the_market(self):
+        results = PointsBetScraper().parse_api_payload(self.PAYLOAD)
+        self.assertEqual(
+            [(r["party"], r["odds"]) for r in results],
+            [("ALP", Decimal("1.3")), ("OTH", Decimal("101"))],
+        )
+        self.assertEqual(PointsBetScraper().parse_api_payload({}), [])
+    
+    def test_market_name_matches_loosely(self):
+        scraper = PointsBetScraper()
+        payload = {"fixedOddsMarkets": [
+            {"eventName": "NEXT FEDERAL GOVERNMENT - Winner", "outcomes": [
+                {"name": "Labor", "price": 1.3},
+            ]},
+        ]}
+        self.assertEqual([r["party"] for r in scraper.parse_api_payload(payload)], ["ALP"])
+        self.assertEqual(
+            scraper.split_outcome_attribute("next federal government - Winner - Coalition - 3.35"),
+            ("Coalition", "3.35"),
+        )
+    
+    def test_missing_market_is_logged(self):
+        payload = {"fixedOddsMarkets": self.PAYLOAD["fixedOddsMarkets"][:1]}
+        with self.assertLogs("polls.scrapers.pointsbet", "WARNING") as logs:
+            self.assertEqual(PointsBetScraper().parse_api_payload(payload), [])
+        self.assertIn("Labor Seats Won", logs.output[0])
+    
+    def test_captured_payload_skips_page_load(self):
+        page = _FakePage(payload=self.PAYLOAD)
+        results = self._navigate(page)
+        
+        self.assertEqual(len(results), 2)
+        self.assertEqual(page.calls, [("goto", "commit")])
+    
+    def test_capture_timeout_falls_back_to_dom(self):
+        page = _FakePage(capture_error=PlaywrightTimeoutError("no API"))
+        with self.assertLogs("polls.scrapers.base", "WARNING"):
+            self.assertIsNone(self._navigate(page))
+        self.assertEqual(page.calls, [("goto", "commit"), ("load_state", "domcontentloaded")])
+    
+    def test_payload_without_odds_falls_back_to_dom(self):
+        page = _FakePage(payload={"fixedOddsMarkets": []})
+        with self.assertLogs("polls.scrapers.base", "WARNING"):
+            self.assertIsNone(self._navigate(page))
+        self.assertEqual(page.calls, [("goto", "commit"), ("load_state", "domcontentloaded")])
+
+
+class OutcomeExtractionTests(SimpleTestCase):
+    """The DOM path pulls every outcome in one page evaluation, then parses the pairs."""
+    
+    def test_split_outcome_attribute(self):
+        scraper = PointsBetScraper()
+        self.assertEqual(
+            scraper.split_outcome_attribute("Next Federal Government - Any Other - 51"),
+            ("Any Other", "51"),
+        )
+        self.assertIsNone(scraper.split_outcome_attribute("Labor Seats Won - Over 75.5 - 1.80"))
+        with self.assertLogs("polls.scrapers.pointsbet", "WARNING"):
+            self.assertIsNone(scraper.split_outcome_attribute("Labor 1.30"))
+    
+    def test_parse_outcomes(self):
+        with self.assertLogs("polls.scrapers.base", "WARNING"):
+            results = PointsBetScraper().parse_outcomes(
+                [("Labor", "$1.85"), ("Coalition", "SUSP"), ("Any Other", " 51 ")]
+            )
+        self.assertEqual(
+            [(r["party"], r["odds"]) for r in results],
+            [("ALP", Decimal("1.85")), ("OTH", Decimal("51"))],
+        )
+    
+    def test_dom_fallback_extracts_in_one_evaluation(self):
+        page = _FakePage(
+            [
+                ["Next Federal Government - Labor - 1.30", None],
+                ["Labor Seats Won - Over 75.5 - 1.80", None],
+                ["Next Federal Government - Coalition - 3.35", None],
+                [None, None],
+            ],
+            capture_error=PlaywrightTimeoutError("no API"),
+        )
+        scraper = PointsBetScraper()
+        with mock.patch.object(scraper, "get_page", mock.AsyncMock(return_value=page)), \
+                self.assertLogs("polls.scrapers.base", "WARNING"):
+            results = asyncio.run(scraper.scrape())
+        
+        self.assertEqual(
+            [(r["party"], r["odds"]) for r in results],
+            [("ALP", Decimal("1.30")), ("LNP", Decimal("3.35"))],
+        )
+        self.assertEqual([call[0] for call in page.calls].count("extract"), 1)
+
+
+class _FakePage:
+    """Just enough of a Playwright Page for BaseScraper.scrape(); records each call."""
+    
+    def __init__(self, outcomes=(), payload=None, capture_error=None, wait_error=None):
+        self.outcomes = [list(outcome) for outcome in outcomes]
+        self.payload = payload
+        self.capture_error = capture_error
+        self.wait_error = wait_error
+        self.calls = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+    
+    async def goto(self, url, wait_until):
+        self.calls.append(("goto", wait_until))
+    
+    async def wait_for_load_state(self, state):
+        self.calls.append(("load_state", state))
+    
+    def expect_response(self, predicate, timeout):
+        page = self
+        
+        class ExpectResponse:
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, exc_type, exc_val, exc_tb):
+                if page.capture_error:
+                    raise page.capture_error
+                return False
+            
+            @property
+            async def value(self):
+                return mock.Mock(json=mock.AsyncMock(return_value=page.payload))
+        
+        return ExpectResponse()
+    
+    async def wait_for_function(self, expression, arg, polling, timeout):
+        self.calls.append(("function", expression, arg))
+        if self.wait_error:
+            raise self.wait_error
+    
+    async def wait_for_selector(self, selector, timeout):
+        self.calls.append(("selector", selector))
+        if self.wait_error:
+            raise self.wait_error
+    
+    async def eval_on_selector_all(self, selector, expression, arg):
+        self.calls.append(("extract", selector))
+        return self.outcomes
+
+
+class DailyWriteTests(TestCase):
+    """save_odds_readings() upserts one row per date, bookmaker and party."""
+    
+    DAY = date(2026, 3, 10)
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP", "OTH"):
+            Party.objects.create(code=code, name=code)
+    
+    def _save(self, *outcomes: tuple[str, str], price_cache=None) -> dict:
+        results = [{"name": "Betr", "data": [
+            {"party": party, "odds": Decimal(odds)} for party, odds in outcomes
+        ]}]
+        with self.captureOnCommitCallbacks(execute=True):
+            return save_odds_readings(results, self.DAY, price_cache)
+    
+    def _stored(self) -> dict[str, Decimal]:
+        return dict(OddsReading.objects.values_list("party__code", "odds"))
+    
+    def test_rerun_same_day_updates(self):
+        self._save(("ALP", "1.85"), ("LNP", "2.10"))
+        ids = set(OddsReading.objects.values_list("id", flat=True))
+        
+        saved = self._save(("ALP", "1.80"), ("LNP", "2.10"))
+        
+        self.assertEqual(saved, {"Betr": 2})
+        self.assertEqual(set(OddsReading.objects.values_list("id", flat=True)), ids)
+        self.assertEqual(self._stored(), {"ALP": Decimal("1.80"), "LNP": Decimal("2.10")})
+        
+        series = OddsSeries.objects.get(party__code="ALP")
+        self.assertEqual(unpack(series.days, series.odds)[1].tolist(), [180])
+    
+    def test_rerun_with_price_cache_skips_stored_prices(self):
+        price_cache = LastPriceCache()
+        self._save(("ALP", "1.85"), ("LNP", "2.10"), price_cache=price_cache)
+        
+        saved = self._save(("ALP", "1.80"), ("LNP", "2.10"), price_cache=price_cache)
+        
+        self.assertEqual(saved, {"Betr": 1})
+        self.assertEqual(self._stored(), {"ALP": Decimal("1.80"), "LNP": Decimal("2.10")})
+    
+    def test_duplicate_outcomes_last_wins(self):
+        saved = self._save(("ALP", "1.85"), ("OTH", "51.00"), ("OTH", "41.00"))
+        
+        self.assertEqual(saved, {"Betr": 2})
+        self.assertEqual(self._stored(), {"ALP": Decimal("1.85"), "OTH": Decimal("41.00")})
+    
+    def test_unknown_party_skipped(self):
+        with self.assertLogs("polls.services.odds_writer", "WARNING"):
+            saved = self._save(("ALP", "1.85"), ("XYZ", "9.00"))
+        
+        self.assertEqual(saved, {"Betr": 1})
+        self.assertEqual(self._stored(), {"ALP": Decimal("1.85")})
+
+
+class MarketConsensusTests(TestCase):
+    """Consensus de-vigs each bookmaker separately and upserts one row per party per day."""
+    
+    DAY = date(2026, 3, 10)
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+    
+    def test_calculate_consensus_averages_fair_probabilities(self):
+        consensus = calculate_consensus({
+            "Betr": {"ALP": Decimal("1.85"), "LNP": Decimal("2.10")},
+            "Ladbrokes": {"ALP": Decimal("1.80"), "LNP": Decimal("2.15")},
+            "Sportsbet": {"ALP": Decimal("1.50")},
+        })
+        
+        self.assertEqual(consensus["ALP"], {
+            "fair_probability": Decimal("0.5380"),
+            "averaged_odds": Decimal("1.8250"),
+            "bookmaker_count": 2,
+        })
+        self.assertAlmostEqual(
+            consensus["ALP"]["fair_probability"] + consensus["LNP"]["fair_probability"],
+            Decimal("1"),
+            delta=Decimal("0.0002"),
+        )
+    
+    def test_update_replaces_same_day_rows(self):
+        save_odds_readings([
+            {"name": "Betr", "data": [
+                {"party": "ALP", "odds": Decimal("1.85")},
+                {"party": "LNP", "odds": Decimal("2.10")},
+            ]},
+        ], self.DAY)
+        self.assertEqual(update_market_consensus(self.DAY), 2)
+        
+        OddsReading.objects.filter(party__code="ALP").update(odds=Decimal("1.50"))
+        self.assertEqual(update_market_consensus(self.DAY), 2)
+        
+        self.assertEqual(MarketConsensus.objects.count(), 2)
+        row = MarketConsensus.objects.get(party__code="ALP")
+        self.assertEqual(row.averaged_odds, Decimal("1.5000"))
+        self.assertEqual(row.bookmaker_count, 1)
+        self.assertEqual(Bookmaker.objects.count(), 1)
+    
+    def test_no_readings_writes_nothing(self):
+        with self.assertLogs("polls.services.consensus", "INFO"):
+            self.assertEqual(update_market_consensus(self.DAY), 0)
+        self.assertFalse(MarketConsensus.objects.exists())
+
+
+class OddsBatchTests(SimpleTestCase):
+    """The NumPy batch engine gives the same 4 dp results as the Decimal functions."""
+    
+    # One {bookmaker: {party: odds}} market per day
+    MARKETS = [
+        {},
+        {"Betr": {"ALP": "1.50"}},  # One party - can't be de-vigged
+        {"Betr": {"ALP": "1.00", "LNP": "0.95"}},  # Odds <= 1
+        {"Betr": {"ALP": "6.40", "LNP": "1.20"}},  # 1 / 6.4 = 0.15625, a rounding tie
+        {
+            "Betr": {"ALP": "1.85", "LNP": "2.10", "OTH": "21.00"},
+            "Ladbrokes": {"ALP": "1.80", "LNP": "2.15"},
+            "PointsBet": {"ALP": "1.83", "LNP": "2.05", "OTH": "26.00", "GRN": "101.00"},
+            "Sportsbet": {"GRN": "81.00"},
+        },
+    ]
+    
+    def _markets(self) -> list[dict]:
+        return [
+            {
+                bookmaker: {party: Decimal(odds) for party, odds in party_odds.items()}
+                for bookmaker, party_odds in market.items()
+            }
+            for market in self.MARKETS
+        ]
+    
+    def test_probabilities_match_decimal(self):
+        for market in self._markets():
+            for party_odds in market.values():
+                odds = list(party_odds.values())
+                fair = batch_odds_to_probabilities([float(o) for o in odds])["fair"]
+                self.assertEqual(to_decimals(fair), odds_to_fair_probability(odds), odds)
+        
+        self.assertEqual(to_decimals(batch_odds_to_probabilities([])["fair"]), [])
+        self.assertEqual(odds_to_fair_probability([]), [])
+        self.assertEqual(
+            batch_odds_to_probabilities([6.4, 1.2])["implied"].tolist(), [0.1563, 0.8333]
+        )
+    
+    def test_consensus_matches_decimal(self):
+        days = [date(2026, 1, 1) + timedelta(days=i) for i in range(len(self.MARKETS))]
+        markets = dict(zip(days, self._markets()))
+        matrix = build_odds_matrix(
+            (day, bookmaker, party, odds)
+            for day, market in markets.items()
+            for bookmaker, party_odds in market.items()
+            for party, odds in party_odds.items()
+        )
+        consensus = batch_consensus(matrix["odds"])
+        
+        batched = {day: {} for day in days}
+        for i, day in enumerate(matrix["dates"]):
+            fair = to_decimals(consensus["fair_probability"][i])
+            odds = to_decimals(consensus["averaged_odds"][i])
+            for j, party in enumerate(matrix["parties"]):
+                count = int(consensus["bookmaker_count"][i][j])
+                if count:
+                    batched[day][party] = {
+                        "fair_probability": fair[j],
+                        "averaged_odds": odds[j],
+                        "bookmaker_count": count,
+                    }
+        
+        for day, market in markets.items():
+            self.assertEqual(batched[day], calculate_consensus(market), market)
+    
+    def test_non_positive_odds_rejected(self):
+        with self.assertRaises(ValueError):
+            batch_odds_to_probabilities([1.85, 0.0])
+        with self.assertRaises(ValueError):
+            odds_to_fair_probability([Decimal("1.85"), Decimal("0")])
+
+
+class DevigMethodTests(SimpleTestCase):
+    """The power, Shin and odds-ratio de-vig methods."""
+    
+    # Favourite, second favourite and a longshot (OTH)
+    ODDS = [Decimal("1.85"), Decimal("2.10"), Decimal("21.00")]
+    
+    def _implied(self, odds) -> np.ndarray:
+        return 1 / np.array([float(o) for o in odds])
+    
+    def test_each_method_sums_to_one(self):
+        markets = np.array([
+            [1 / 1.85, 1 / 2.10, 1 / 21.0],
+            [1 / 1.01, 1 / 501.0, 1 / 1001.0],
+            [1 / 1.50, 1 / 2.50, np.nan],  # Unpriced party
+        ])
+        for method in DEVIG_METHODS:
+            fair = devig(markets, method)
+            np.testing.assert_allclose(np.nansum(fair, axis=-1), 1.0, err_msg=method)
+            self.assertTrue(np.isnan(fair[2, 2]), method)
+            
+            stored = odds_to_fair_probability(self.ODDS, method=method)
+            self.assertAlmostEqual(float(sum(stored)), 1.0, delta=0.0002, msg=method)
+    
+    def test_longshot_shrinks_more_than_proportional(self):
+        implied = self._implied(self.ODDS)
+        proportional = devig(implied, "proportional")
+        for method in ("power", "shin", "odds_ratio"):
+            fair = devig(implied, method)
+            self.assertLess(fair[2], proportional[2], method)
+            self.assertGreater(fair[0], proportional[0], method)
+    
+    def test_shin_falls_back_without_overround(self):
+        for implied in ([0.45, 0.45], [0.5, 0.5]):  # Overround below and at 1
+            np.testing.assert_allclose(
+                devig(implied, "shin"), devig(implied, "proportional")
+            )
+    
+    def test_unknown_method_rejected(self):
+        with self.assertRaises(ValueError):
+            devig([0.55, 0.5], "multiplicative")
+        with self.assertRaises(ValueError):
+            odds_to_fair_probability(self.ODDS, method="multiplicative")
+    
+    def test_bisect_converges_on_extreme_books(self):
+        implied = np.array([
+            [1 / 1.001, 1 / 5001.0],  # Near-certain favourite
+            [0.9, 0.9],                # 80% overround
+            [1 / 1.5, 1 / 1.5],
+        ])
+        calls = []
+        
+        def residual(log_k):
+            calls.append(log_k)
+            return np.nansum(implied ** np.exp(log_k), axis=-1, keepdims=True) - 1
+        
+        log_k = _bisect(residual, -10.0, 10.0, (3, 1))
+        
+        self.assertLessEqual(len(calls), MAX_ITERATIONS)
+        np.testing.assert_allclose(residual(log_k), 0.0, atol=1e-12)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=LOCMEM_CACHE)
+class SeriesDownsamplingTests(TestCase):
+    """Chart series are bucketed in local time, capped by LTTB, and validated."""
+    
+    def test_lttb_keeps_endpoints_and_count(self):
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        points = [
+            (start + timedelta(hours=i), float(np.sin(i / 20)), i) for i in range(1000)
+        ]
+        for threshold in (3, 10, 500, 999):
+            sampled = lttb(points, threshold)
+            self.assertEqual(len(sampled), threshold)
+            self.assertEqual((sampled[0], sampled[-1]), (points[0], points[-1]))
+            self.assertEqual(sampled, sorted(sampled, key=lambda point: point[2]))
+        self.assertEqual(lttb(points, 1000), points)
+    
+    def _consensus_at(self, *utc_times: datetime) -> None:
+        party = Party.objects.create(code="ALP", name="Labor")
+        for utc_time in utc_times:
+            MarketConsensus.objects.create(
+                timestamp=utc_time.replace(tzinfo=dt_timezone.utc), party=party,
+                fair_probability=Decimal("0.6"), averaged_odds=Decimal("1.6"), bookmaker_count=2,
+            )
+    
+    def test_buckets_align_to_local_time(self):
+        # Sydney is UTC+11 in March: 12:30 UTC is 23:30 local, 13:30 UTC
+        # is 00:30 the next local day. 2026-03-15 is a Sunday.
+        self._consensus_at(
+            datetime(2026, 3, 10, 12, 30), datetime(2026, 3, 10, 13, 30),
+            datetime(2026, 3, 15, 12, 30), datetime(2026, 3, 15, 13, 30),
+        )
+        
+        days = [point[0] for point in consensus_series(bucket="day")["ALP"]]
+        self.assertEqual(days, [date(2026, 3, 10), date(2026, 3, 11), date(2026, 3, 15), date(2026, 3, 16)])
+        
+        weeks = [point[0] for point in consensus_series(bucket="week")["ALP"]]
+        self.assertEqual(weeks, [date(2026, 3, 9), date(2026, 3, 16)])
+        
+        # The date range filter uses the same local days
+        local_day = consensus_series(start=date(2026, 3, 11), end=date(2026, 3, 11), bucket="raw")
+        self.assertEqual(len(local_day["ALP"]), 1)
+    
+    def test_invalid_params_are_rejected(self):
+        for query in ("points=abc", "points=2", "start=2026-13-01", "bucket=month",
+                      "start=2026-03-02&end=2026-03-01"):
+            for endpoint in ("/api/consensus/", "/api/odds/"):
+                response = self.client.get(f"{endpoint}?{query}", secure=True)
+                self.assertEqual(response.status_code, 400, f"{endpoint}?{query}")
+                self.assertIn("error", response.json())
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=LOCMEM_CACHE)
+class SeriesApiTests(TestCase):
+    """/api/consensus/ and /api/odds/ return filtered, bucketed and capped series."""
+    
+    START = date(2026, 3, 2)  # A Monday
+    DAYS = 21
+    
+    def setUp(self):
+        response_cache.cache.clear()
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(self.DAYS):
+                alp = Decimal("1.50") + Decimal("0.01") * i
+                save_odds_readings([
+                    {"name": "Betr", "data": [
+                        {"party": "ALP", "odds": alp},
+                        {"party": "LNP", "odds": Decimal("2.50")},
+                    ]},
+                    {"name": "Ladbrokes", "data": [
+                        {"party": "ALP", "odds": alp + Decimal("0.05")},
+                        {"party": "LNP", "odds": Decimal("2.40")},
+                    ]},
+                ], self.START + timedelta(days=i))
+        rebuild_market_consensus()
+    
+    def _get(self, endpoint: str, query: str = "") -> dict:
+        response = self.client.get(f"{endpoint}?{query}", secure=True)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+    
+    def test_consensus_shape_and_party_filter(self):
+        body = self._get("/api/consensus/")
+        
+        self.assertEqual(
+            body["fields"], ["timestamp", "fair_probability", "averaged_odds", "bookmaker_count"]
+        )
+        self.assertEqual((body["start"], body["end"], body["bucket"]), (None, None, "day"))
+        self.assertEqual(sorted(body["series"]), ["ALP", "LNP"])
+        
+        first = body["series"]["ALP"][0]
+        self.assertEqual(first[0], "2026-03-02")
+        self.assertEqual(first[2:], [1.525, 2])
+        self.assertEqual(len(body["series"]["ALP"]), self.DAYS)
+        
+        body = self._get("/api/consensus/", "party=LNP&start=2026-03-10&end=2026-03-12")
+        self.assertEqual(list(body["series"]), ["LNP"])
+        self.assertEqual(
+            [point[0] for point in body["series"]["LNP"]],
+            ["2026-03-10", "2026-03-11", "2026-03-12"],
+        )
+        self.assertEqual((body["start"], body["end"]), ("2026-03-10", "2026-03-12"))
+    
+    def test_odds_shape_and_filters(self):
+        body = self._get("/api/odds/")
+        self.assertEqual(body["fields"], ["date", "odds"])
+        self.assertEqual(sorted(body["series"]), ["Betr", "Ladbrokes"])
+        self.assertEqual(
+            body["series"]["Betr"]["ALP"][:2], [["2026-03-02", 1.5], ["2026-03-03", 1.51]]
+        )
+        
+        body = self._get("/api/odds/", "bookmaker=Ladbrokes&party=ALP")
+        self.assertEqual(list(body["series"]), ["Ladbrokes"])
+        self.assertEqual(list(body["series"]["Ladbrokes"]), ["ALP"])
+        self.assertEqual(body["series"]["Ladbrokes"]["ALP"][-1], ["2026-03-22", 1.75])
+    
+    def test_week_bucket_keeps_each_weeks_close(self):
+        body = self._get("/api/odds/", "bucket=week&bookmaker=Betr&party=ALP")
+        self.assertEqual(body["bucket"], "week")
+        self.assertEqual(
+            body["series"]["Betr"]["ALP"],
+            [["2026-03-02", 1.56], ["2026-03-09", 1.63], ["2026-03-16", 1.7]],
+        )
+        
+        body = self._get("/api/consensus/", "bucket=week&party=ALP")
+        self.assertEqual(
+            [point[0] for point in body["series"]["ALP"]],
+            ["2026-03-02", "2026-03-09", "2026-03-16"],
+        )
+    
+    def test_points_caps_each_series(self):
+        body = self._get("/api/consensus/", "points=5")
+        for code, points in body["series"].items():
+            self.assertEqual(len(points), 5, code)
+            self.assertEqual((points[0][0], points[-1][0]), ("2026-03-02", "2026-03-22"))
+        
+        body = self._get("/api/odds/", "points=4&bookmaker=Betr")
+        self.assertEqual([len(points) for points in body["series"]["Betr"].values()], [4, 4])
+
+class ConsensusTableTests(SimpleTestCase):
+    """The consensus table shows fair probabilities to one decimal place."""
+    
+    def test_percentages_keep_a_decimal(self):
+        html = render_to_string("partials/consensus_table.html", {"market": {
+            "consensus_timestamp": timezone.now(),
+            "consensus": {
+                "ALP": {"fair_probability": 0.5384, "averaged_odds": 1.825, "bookmaker_count": 2},
+                "OTH": {"fair_probability": 0.0049, "averaged_odds": 101.0, "bookmaker_count": 1},
+            },
+        }})
+        self.assertInHTML("<td>53.8%</td>", html)
+        self.assertInHTML("<td>0.5%</td>", html)
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=LOCMEM_CACHE)
+class VersionedCacheTests(TestCase):
+    """API responses are cached and tagged per data version; errors never are."""
+    
+    def setUp(self):
+        response_cache.cache.clear()
+    
+    def _get(self, path: str, **headers):
+        return self.client.get(path, secure=True, headers=headers)
+    
+    def test_etag_revalidates_until_version_bump(self):
+        response = self._get("/api/consensus/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertIn("must-revalidate", response["Cache-Control"])
+        
+        self.assertEqual(self._get("/api/consensus/", If_None_Match=etag).status_code, 304)
+        
+        response_cache.bump_data_version()
+        response = self._get("/api/consensus/", If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+    
+    def test_cached_until_version_bump(self):
+        with mock.patch("polls.views.consensus_series", return_value={}) as series:
+            self._get("/api/consensus/")
+            self._get("/api/consensus/")
+            self.assertEqual(series.call_count, 1)
+            
+            response_cache.bump_data_version()
+            self._get("/api/consensus/")
+            self.assertEqual(series.call_count, 2)
+    
+    def test_errors_are_not_cached_or_tagged(self):
+        for _ in range(2):
+            response = self._get("/api/odds/?start=2026-13-01")
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.has_header("ETag"))
+            self.assertNotIn("public", response.get("Cache-Control", ""))
+        
+        path_hash = hashlib.md5(b"/api/odds/?start=2026-13-01").hexdigest()
+        version = response_cache.get_data_version()
+        self.assertIsNone(response_cache.cache.get(f"betpoll:view:{version}:{path_hash}"))
+        self.assertIsNone(response_cache.cache.get(f"betpoll:view:latest:{path_hash}"))
+    
+    def test_stale_response_served_during_rebuild(self):
+        etag = self._get("/api/consensus/")["ETag"]
+        version = response_cache.bump_data_version()
+        
+        # Another worker is rendering the new version
+        path_hash = hashlib.md5(b"/api/consensus/").hexdigest()
+        response_cache.cache.add(f"betpoll:view:{version}:{path_hash}:lock", 1)
+        
+        with mock.patch("polls.views.consensus_series") as series:
+            response = self._get("/api/consensus/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], etag)
+        series.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GetOrBuildTests(SimpleTestCase):
+    """get_or_build's dogpile guard never lets a request wait long."""
+    
+    def setUp(self):
+        response_cache.cache.clear()
+    
+    def test_concurrent_misses_build_once(self):
+        builds = []
+        results = []
+        barrier = threading.Barrier(8)
+        
+        def builder():
+            builds.append(1)
+            time.sleep(0.2)
+            return "value"
+        
+        def request():
+            barrier.wait()
+            results.append(response_cache.get_or_build("key", builder))
+        
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, ["value"] * 8)
+    
+    def test_contended_miss_serves_stale_without_waiting(self):
+        response_cache.cache.set("stale", "old")
+        response_cache.cache.add("key:lock", 1)
+        builder = mock.Mock(return_value="new")
+        
+        with mock.patch("polls.services.cache.time.sleep") as sleep:
+            value = response_cache.get_or_build("key", builder, stale_key="stale")
+        
+        self.assertEqual(value, "old")
+        builder.assert_not_called()
+        sleep.assert_not_called()
+    
+    def test_contended_miss_wait_is_capped(self):
+        response_cache.cache.add("key:lock", 1)  # Builder that never finishes
+        builder = mock.Mock(return_value="new")
+        
+        with mock.patch.object(response_cache, "BUILD_WAIT_TIMEOUT", 0.1):
+            started = time.monotonic()
+            with self.assertLogs("polls.services.cache", "WARNING"):
+                value = response_cache.get_or_build("key", builder)
+        
+        self.assertEqual(value, "new")
+        self.assertLess(time.monotonic() - started, 1)
+        builder.assert_called_once()
+    
+    def test_released_lock_ends_wait(self):
+        response_cache.cache.add("key:lock", 1)
+        builder = mock.Mock(return_value="new")
+        
+        def release(seconds):
+            response_cache.cache.delete("key:lock")  # Builder failed
+        
+        with mock.patch("polls.services.cache.time.sleep", side_effect=release) as sleep:
+            self.assertEqual(response_cache.get_or_build("key", builder), "new")
+        self.assertEqual(sleep.call_count, 1)
+    
+    def test_uncacheable_value_not_stored(self):
+        value = response_cache.get_or_build(
+            "key", lambda: {"status": 400}, cacheable=lambda v: v["status"] == 200
+        )
+        self.assertEqual(value, {"status": 400})
+        self.assertIsNone(response_cache.cache.get("key"))
+        self.assertIsNone(response_cache.cache.get("key:lock"))
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=LOCMEM_CACHE)
+class SnapshotExportTests(TestCase):
+    """export_snapshot() writes each document, and its compressed copies, atomically."""
+    
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+        with self.captureOnCommitCallbacks(execute=True):
+            for day, alp in ((date(2026, 3, 9), "1.85"), (date(2026, 3, 10), "1.80")):
+                save_odds_readings([{"name": "Betr", "data": [
+                    {"party": "ALP", "odds": Decimal(alp)},
+                    {"party": "LNP", "odds": Decimal("2.10")},
+                ]}], day)
+        rebuild_market_consensus()
+    
+    def _read(self, name: str) -> dict:
+        return json.loads((self.directory / name).read_bytes())
+    
+    def test_files_match_the_api(self):
+        with self.assertLogs("polls.services.snapshots", "INFO"):
+            written = export_snapshot(self.directory)
+        
+        documents = ("latest.json", "consensus.json", "odds.json")
+        suffixes = ("", ".gz", ".br") if brotli is not None else ("", ".gz")
+        self.assertCountEqual(
+            [path.name for path in written], [doc + suffix for doc in documents for suffix in suffixes]
+        )
+        self.assertEqual(sorted(p.name for p in self.directory.iterdir()), sorted(p.name for p in written))
+        
+        for document in documents:
+            body = (self.directory / document).read_bytes()
+            self.assertEqual(gzip.decompress((self.directory / f"{document}.gz").read_bytes()), body)
+            if brotli is not None:
+                self.assertEqual(brotli.decompress((self.directory / f"{document}.br").read_bytes()), body)
+            self.assertEqual((self.directory / document).stat().st_mode & 0o777, 0o644)
+        
+        for document, endpoint in (("consensus.json", "/api/consensus/"), ("odds.json", "/api/odds/")):
+            api = self.client.get(f"{endpoint}?points={SNAPSHOT_MAX_POINTS}", secure=True).json()
+            snapshot = self._read(document)
+            self.assertTrue(snapshot["series"], document)
+            self.assertEqual((snapshot["fields"], snapshot["series"]), (api["fields"], api["series"]))
+        
+        latest = self._read("latest.json")
+        self.assertEqual(latest["odds_date"], "2026-03-10")
+        self.assertEqual(latest["odds"], {"Betr": {"ALP": 1.8, "LNP": 2.1}})
+    
+    def test_failed_write_keeps_the_previous_file(self):
+        with self.assertLogs("polls.services.snapshots", "INFO"):
+            export_snapshot(self.directory)
+        before = {path.name: path.read_bytes() for path in self.directory.iterdir()}
+        
+        with mock.patch("polls.services.snapshots.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                export_snapshot(self.directory)
+        
+        after = {path.name: path.read_bytes() for path in self.directory.iterdir()}
+        self.assertEqual(after, before)  # No temp files left, nothing half-written
+
+
+class BroadcasterTests(TestCase):
+    """The SSE broadcaster sends only the odds that moved, framed per the spec."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+    
+    def _save(self, name: str, alp: str, lnp: str = "2.10") -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            save_odds_readings([{"name": name, "data": [
+                {"party": "ALP", "odds": Decimal(alp)},
+                {"party": "LNP", "odds": Decimal(lnp)},
+            ]}], date(2026, 3, 10))
+    
+    def _odds_event(self, events: list[tuple[str, str]]) -> dict | None:
+        self.assertEqual(events[0][0], "consensus")
+        odds = [json.loads(data) for event, data in events if event == "odds"]
+        return odds[0] if odds else None
+    
+    def test_delta_holds_only_changed_odds(self):
+        broadcaster = OddsBroadcaster()
+        self._save("Betr", "1.85")
+        self.assertEqual(
+            self._odds_event(broadcaster._load_events()), {"Betr": {"ALP": 1.85, "LNP": 2.1}}
+        )
+        
+        self._save("Betr", "1.80")
+        self._save("Ladbrokes", "1.90")
+        self.assertEqual(
+            self._odds_event(broadcaster._load_events()),
+            {"Betr": {"ALP": 1.8}, "Ladbrokes": {"ALP": 1.9, "LNP": 2.1}},
+        )
+        
+        # Nothing moved: the consensus table is still sent, no odds event
+        self.assertIsNone(self._odds_event(broadcaster._load_events()))
+        
+        # A new subscriber starts from the full state, not the last delta
+        async def subscribe():
+            with mock.patch.object(broadcaster, "_run", mock.AsyncMock()):
+                queue = broadcaster.subscribe()
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+        
+        self.assertEqual(
+            self._odds_event(asyncio.run(subscribe())),
+            {"Betr": {"ALP": 1.8, "LNP": 2.1}, "Ladbrokes": {"ALP": 1.9, "LNP": 2.1}},
+        )
+    
+    def test_slow_subscriber_drops_oldest(self):
+        broadcaster = OddsBroadcaster(queue_size=2)
+        
+        async def publish():
+            with mock.patch.object(broadcaster, "_run", mock.AsyncMock()):
+                queue = broadcaster.subscribe()
+            for i in range(3):
+                broadcaster.publish("odds", str(i))
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+        
+        self.assertEqual(asyncio.run(publish()), [("odds", "1"), ("odds", "2")])
+    
+    def test_format_sse(self):
+        self.assertEqual(format_sse("odds", '{"a":1}'), 'event: odds\ndata: {"a":1}\n\n')
+        self.assertEqual(
+            format_sse("consensus", "<table>\n<tr></tr>\n</table>"),
+            "event: consensus\ndata: <table>\ndata: <tr></tr>\ndata: </table>\n\n",
+        )
+        self.assertEqual(format_sse("odds", ""), "event: odds\ndata: \n\n")
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], CACHES=LOCMEM_CACHE)
+class OddsStreamTests(TestCase):
+    """The SSE stream is only offered under ASGI; WSGI gets a prompt 204."""
+    
+    def setUp(self):
+        response_cache.cache.clear()
+    
+    def test_wsgi_returns_promptly_without_stream(self):
+        responses = []
+        thread = threading.Thread(
+            target=lambda: responses.append(self.client.get("/stream/odds/", secure=True))
+        )
+        thread.start()
+        thread.join(timeout=5)
+        
+        self.assertFalse(thread.is_alive(), "stream held the WSGI request open")
+        self.assertEqual(responses[0].status_code, 204)
+        self.assertFalse(responses[0].streaming)
+        self.assertNotContains(self.client.get("/", secure=True), "data-stream-url")
+    
+    async def test_asgi_streams(self):
+        home = await self.async_client.get("/", secure=True)
+        self.assertContains(home, 'data-stream-url="/stream/odds/"')
+        
+        response = await self.async_client.get("/stream/odds/", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        await stream.aclose()
+
+class ScrapeScheduleTests(SimpleTestCase):
+    """Quiet or failing bookmakers back off up to the cap; moving prices reset them."""
+    
+    def setUp(self):
+        self.now = 1000.0
+        self.schedule = ScrapeSchedule(
+            {"Betr": 300, "PointsBet": 600}, backoff=2, max_interval=1800, clock=lambda: self.now
+        )
+    
+    def _success(self, odds: str) -> bool:
+        return self.schedule.record_success("Betr", [{"party": "ALP", "odds": Decimal(odds)}])
+    
+    def _interval(self) -> float:
+        return self.schedule.bookmakers["Betr"].interval
+    
+    def test_unchanged_prices_back_off_to_the_cap(self):
+        self.assertEqual(self.schedule.due(), ["Betr", "PointsBet"])
+        self.assertTrue(self._success("1.85"))
+        self.assertEqual(self._interval(), 300)
+        
+        intervals = []
+        for _ in range(4):
+            self.assertFalse(self._success("1.85"))
+            intervals.append(self._interval())
+        self.assertEqual(intervals, [600, 1200, 1800, 1800])
+        self.assertEqual(self.schedule.bookmakers["Betr"].next_run, self.now + 1800)
+        
+        self.assertTrue(self._success("1.80"))
+        self.assertEqual(self._interval(), 300)
+    
+    def test_failures_back_off_and_reset_on_success(self):
+        self._success("1.85")
+        self.assertEqual([self.schedule.record_failure("Betr") for _ in range(3)], [1, 2, 3])
+        self.assertEqual(self._interval(), 1800)
+        
+        self.assertTrue(self._success("1.90"))
+        self.assertEqual((self._interval(), self.schedule.bookmakers["Betr"].failures), (300, 0))
+        self.assertEqual(self.schedule.record_failure("Betr"), 1)
+    
+    def test_due_and_defer(self):
+        self._success("1.85")
+        self.schedule.record_success("PointsBet", [])
+        self.assertEqual(self.schedule.due(), [])
+        self.assertEqual(self.schedule.seconds_until_due(), 300)
+        
+        self.schedule.defer("Betr", 900)
+        self.now += 600
+        self.assertEqual(self.schedule.due(), ["PointsBet"])
+        self.assertEqual(self.schedule.seconds_until_due(), 0)
+        self.now += 300
+        self.assertEqual(self.schedule.due(), ["Betr", "PointsBet"])
+    
+    def test_retry_delay(self):
+        lowest = mock.Mock(uniform=lambda a, b: a)
+        highest = mock.Mock(uniform=lambda a, b: b)
+        for attempt, (low, high) in enumerate([(1, 2), (2, 4), (4, 8), (8, 16), (15, 30), (15, 30)], 1):
+            self.assertEqual(retry_delay(attempt, rng=lowest), low, attempt)
+            self.assertEqual(retry_delay(attempt, rng=highest), high, attempt)
+        
+        delays = [retry_delay(10) for _ in range(100)]
+        self.assertTrue(all(RETRY_MAX_DELAY / 2 <= delay <= RETRY_MAX_DELAY for delay in delays))
+        self.assertEqual(retry_delay(3, base=1, cap=100, rng=highest), 4)
+
+
+class IntradayWriteTests(TestCase):
+    """Intraday scrapes only write prices that moved."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+    
+    def _results(self, alp: str, lnp: str = "2.10") -> list[dict]:
+        return [{"name": "Betr", "data": [
+            {"party": "ALP", "odds": Decimal(alp)},
+            {"party": "LNP", "odds": Decimal(lnp)},
+        ]}]
+    
+    def _save(self, results: list[dict], timestamp, price_cache: LastPriceCache) -> dict:
+        # The price cache is updated once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return save_intraday_readings(results, timestamp, price_cache)
+    
+    def test_unchanged_price_writes_nothing(self):
+        price_cache = LastPriceCache()
+        now = timezone.now()
+        self._save(self._results("1.85"), now, price_cache)
+        
+        with CaptureQueriesContext(connection) as queries:
+            saved = self._save(self._results("1.85"), now + timedelta(minutes=5), price_cache)
+        
+        self.assertEqual(saved, {"Betr": 0})
+        self.assertEqual(IntradayOddsReading.objects.count(), 2)
+        self.assertFalse([q for q in queries.captured_queries if "INSERT" in q["sql"]])
+    
+    def test_changed_price_writes_one_row(self):
+        price_cache = LastPriceCache()
+        now = timezone.now()
+        self._save(self._results("1.85"), now, price_cache)
+        
+        later = now + timedelta(minutes=5)
+        saved = self._save(self._results("1.80"), later, price_cache)
+        
+        self.assertEqual(saved, {"Betr": 1})
+        moved = IntradayOddsReading.objects.filter(timestamp=later)
+        self.assertEqual(
+            list(moved.values_list("party__code", "odds")), [("ALP", Decimal("1.80"))]
+        )
+        self.assertEqual(
+            OddsReading.objects.get(party__code="ALP", date=timezone.localdate(later)).odds,
+            Decimal("1.80"),
+        )
+    
+    def test_cold_cache_warms_from_readings(self):
+        now = timezone.now()
+        save_odds_readings(self._results("1.85"), timezone.localdate(now))
+        OddsSeries.objects.all().delete()  # Pairs missing from the series store
+        
+        price_cache = LastPriceCache()
+        self.assertEqual(price_cache.warm(), 2)
+        self.assertEqual(price_cache.get("Betr", "ALP"), Decimal("1.85"))
+        self.assertIsNone(price_cache.get("Ladbrokes", "ALP"))
+        
+        saved = save_intraday_readings(self._results("1.85"), now)  # Warms its own cache
+        self.assertEqual(saved, {"Betr": 0})
+        self.assertFalse(IntradayOddsReading.objects.exists())
+
+
+class ConsensusAggregatorTests(TestCase):
+    """Incremental consensus matches a full rebuild."""
+    
+    DAY = date(2026, 1, 5)
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP", "OTH"):
+            Party.objects.create(code=code, name=code)
+        save_odds_readings(
+            [
+                cls._result("Betr", "1.85", "2.10", "21.00"),
+                cls._result("Ladbrokes", "1.80", "2.15"),
+            ],
+            cls.DAY,
+        )
+        update_market_consensus(cls.DAY)
+    
+    @staticmethod
+    def _result(bookmaker: str, *odds: str) -> dict:
+        return {"name": bookmaker, "data": [
+            {"party": party, "odds": Decimal(price)}
+            for party, price in zip(("ALP", "LNP", "OTH"), odds)
+        ]}
+    
+    def _save(self, results: list[dict], aggregator: ConsensusAggregator | None = None) -> None:
+        # The aggregator is fed once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            save_odds_readings(results, self.DAY, aggregator=aggregator)
+    
+    def _consensus(self) -> list[tuple]:
+        return list(MarketConsensus.objects.order_by("party__code").values_list(
+            "party__code", "fair_probability", "averaged_odds", "bookmaker_count"
+        ))
+    
+    def _assert_matches_rebuild(self):
+        incremental = self._consensus()
+        rebuild_market_consensus()
+        self.assertEqual(incremental, self._consensus())
+    
+    def test_apply_and_flush_match_rebuild(self):
+        aggregator = ConsensusAggregator()
+        self._save([self._result("Betr", "1.80", "2.20", "26.00")], aggregator)
+        
+        self.assertEqual(aggregator.flush(), 3)
+        self.assertEqual(aggregator.verify(self.DAY), [])
+        self._assert_matches_rebuild()
+    
+    def test_new_bookmaker_and_party(self):
+        aggregator = ConsensusAggregator()
+        self._save([self._result("PointsBet", "1.83", "2.05", "31.00")], aggregator)
+        self._save([self._result("Ladbrokes", "1.80", "2.15", "17.00")], aggregator)
+        
+        aggregator.flush()
+        self._assert_matches_rebuild()
+        self.assertEqual(self._consensus()[2][3], 3)  # OTH priced by all three
+    
+    def test_reload_catches_other_writers(self):
+        aggregator = ConsensusAggregator(reload=True)
+        self._save([self._result("Betr", "1.80", "2.20", "26.00")], aggregator)
+        aggregator.flush()
+        
+        # scrape_odds moves Ladbrokes behind the long-lived aggregator's back
+        self._save([self._result("Ladbrokes", "1.70", "2.30")])
+        update_market_consensus(self.DAY)
+        
+        self._save([self._result("Betr", "1.75", "2.25", "26.00")], aggregator)
+        aggregator.flush()
+        self.assertEqual(aggregator.verify(self.DAY), [])
+        self._assert_matches_rebuild()
+    
+    def test_verify_defaults_to_flushed_days(self):
+        aggregator = ConsensusAggregator()
+        self.assertEqual(aggregator.verify(), [])  # Nothing flushed: checks today
+        
+        self._save([self._result("Betr", "1.80", "2.20", "26.00")], aggregator)
+        aggregator.flush()
+        MarketConsensus.objects.filter(party__code="ALP").update(bookmaker_count=9)
+        
+        with self.assertLogs("polls.services.consensus", "WARNING"):
+            mismatches = aggregator.verify()
+        self.assertEqual(len(mismatches), 1)
+        self.assertTrue(mismatches[0].startswith("2026-01-05 party"), mismatches[0])
+    
+    def test_defaults_use_the_local_date(self):
+        # 14:00 UTC on 10 March is 01:00 on 11 March in Sydney (UTC+11)
+        now = datetime(2026, 3, 10, 14, 0, tzinfo=dt_timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            save_odds_readings([self._result("Betr", "1.85", "2.10")])
+            update_market_consensus()
+        
+        local_day = date(2026, 3, 11)
+        self.assertEqual(
+            set(OddsReading.objects.exclude(date=self.DAY).values_list("date", flat=True)),
+            {local_day},
+        )
+        self.assertTrue(
+            MarketConsensus.objects.filter(timestamp=consensus_timestamp(local_day)).exists()
+        )
+
+
+class SQLiteConcurrencyTests(SimpleTestCase):
+    """
+    The production SQLite settings (WAL, busy_timeout, IMMEDIATE
+    transactions) let one writer run alongside many readers without
+    "database is locked" errors.
+    
+    Runs against a temporary on-disk database, since the in-memory test
+    database can't be shared between connections.
+    """
+    
+    READERS = 8
+    WRITES = 200
+    ROWS_PER_WRITE = 10
+    
+    def setUp(self):
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.settings_dict = {
+            **connections["default"].settings_dict,
+            "NAME": self.tmpdir / "concurrency.sqlite3",
+        }
+        
+        connection = self._connect("setup")
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE reading (id INTEGER PRIMARY KEY, odds REAL)")
+        connection.close()
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+    
+    def _connect(self, alias: str) -> DatabaseWrapper:
+        return DatabaseWrapper(self.settings_dict, alias=alias)
+    
+    def test_pragmas_applied_on_connect(self):
+        connection = self._connect("pragmas")
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], "wal")
+                cursor.execute("PRAGMA busy_timeout")
+                self.assertGreater(cursor.fetchone()[0], 0)
+                cursor.execute("PRAGMA synchronous")
+                self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        finally:
+            connection.close()
+    
+    def test_writer_alongside_readers(self):
+        errors = []
+        reads = [0] * self.READERS
+        writer_done = threading.Event()
+        
+        def writer():
+            connection = self._connect("writer")
+            try:
+                for i in range(self.WRITES):
+                    connection.set_autocommit(False)
+                    with connection.cursor() as cursor:
+                        cursor.executemany(
+                            "INSERT INTO reading (odds) VALUES (%s)",
+                            [(1.5 + i / 100,)] * self.ROWS_PER_WRITE,
+                        )
+                    connection.commit()
+                    connection.set_autocommit(True)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                writer_done.set()
+                connection.close()
+        
+        def reader(n):
+            connection = self._connect(f"reader-{n}")
+            try:
+                while True:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT COUNT(*), MAX(odds) FROM reading")
+                        cursor.fetchone()
+                    reads[n] += 1
+                    if writer_done.is_set():
+                        break
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(self.READERS)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        
+        self.assertEqual(errors, [])
+        
+        connection = self._connect("check")
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM reading")
+                self.assertEqual(cursor.fetchone()[0], self.WRITES * self.ROWS_PER_WRITE)
+        finally:
+            connection.close()
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Reads use the replica unless pinned or inside a write transaction."""
+    
+    databases = {"default"}
+    
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        # Tests run with the replica as a MIRROR of the primary, which the
+        # router treats as "no replica"; give it a database of its own
+        replica = connections[REPLICA_DB_ALIAS].settings_dict
+        patcher = mock.patch.dict(replica, {"NAME": f"{replica['NAME']}-replica"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_reads_use_replica_outside_atomic(self):
+        self.assertEqual(self.router.db_for_read(Party), REPLICA_DB_ALIAS)
+        self.assertEqual(self.router.db_for_write(Party), DEFAULT_DB_ALIAS)
+    
+    def test_pin_and_atomic_keep_reads_on_primary(self):
+        with pin_primary():
+            self.assertEqual(self.router.db_for_read(Party), DEFAULT_DB_ALIAS)
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Party), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Party), REPLICA_DB_ALIAS)
+    
+    def test_pin_follows_sync_to_async(self):
+        async def read_alias():
+            return await sync_to_async(self.router.db_for_read)(Party)
+        
+        with pin_primary():
+            self.assertEqual(asyncio.run(read_alias()), DEFAULT_DB_ALIAS)
+        self.assertEqual(asyncio.run(read_alias()), REPLICA_DB_ALIAS)
+    
+    def test_commands_pin_primary(self):
+        seen = []
+        
+        def rebuild(*args):
+            seen.append(self.router.db_for_read(Party))
+            return 0
+        
+        for command, service in (
+            ("rebuild_odds_series", "rebuild_series"),
+            ("rebuild_consensus", "rebuild_market_consensus"),
+        ):
+            seen.clear()
+            module = f"polls.management.commands.{command}"
+            with mock.patch(f"{module}.{service}", side_effect=rebuild), \
+                    mock.patch(f"{module}.bump_data_version"):
+                call_command(command, stdout=StringIO())
+            self.assertEqual(seen, [DEFAULT_DB_ALIAS], command)
+    
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, "polls"))
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB_ALIAS, "polls"))
+
+class MergePointsTests(SimpleTestCase):
+    """merge_points() appends without merging, and merges the tail on a backfill."""
+    
+    DAYS = np.array([10, 11, 12], dtype=np.int32)
+    ODDS = np.array([185, 190, 195], dtype=np.int32)
+    
+    def _merge(self, new_days, new_odds):
+        days, odds = merge_points(self.DAYS, self.ODDS, np.array(new_days), np.array(new_odds))
+        return days.tolist(), odds.tolist()
+    
+    def test_append(self):
+        self.assertEqual(self._merge([13], [200]), ([10, 11, 12, 13], [185, 190, 195, 200]))
+    
+    def test_update_last_day(self):
+        self.assertEqual(self._merge([12, 13], [198, 200]), ([10, 11, 12, 13], [185, 190, 198, 200]))
+    
+    def test_backfill(self):
+        self.assertEqual(
+            self._merge([11, 9, 12], [191, 180, 196]),
+            ([9, 10, 11, 12], [180, 185, 191, 196]),
+        )
+    
+    def test_duplicates_last_wins(self):
+        self.assertEqual(self._merge([13, 13], [200, 205]), ([10, 11, 12, 13], [185, 190, 195, 205]))
+    
+    def test_empty(self):
+        empty = np.array([], dtype=np.int32)
+        self.assertEqual(self._merge([], []), (self.DAYS.tolist(), self.ODDS.tolist()))
+        days, odds = merge_points(empty, empty, np.array([5, 3]), np.array([150, 130]))
+        self.assertEqual((days.tolist(), odds.tolist()), ([3, 5], [130, 150]))
+    
+    def test_matches_full_merge(self):
+        rng = np.random.default_rng(7)
+        for _ in range(200):
+            days = np.unique(rng.integers(0, 40, rng.integers(0, 20)))
+            odds = rng.integers(101, 1000, len(days))
+            new_days = rng.integers(0, 50, rng.integers(1, 6))
+            new_odds = rng.integers(101, 1000, len(new_days))
+            
+            expected = dict(zip(days.tolist(), odds.tolist()))
+            expected.update(zip(new_days.tolist(), new_odds.tolist()))
+            merged_days, merged_odds = merge_points(days, odds, new_days, new_odds)
+            self.assertEqual(merged_days.tolist(), sorted(expected))
+            self.assertEqual(merged_odds.tolist(), [expected[day] for day in sorted(expected)])
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot read queries are answered from indexes, never a full table
+    scan. Asserts on EXPLAIN QUERY PLAN, so dropping or reordering an
+    index in a model change fails here rather than in production.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        for code in ("ALP", "LNP"):
+            Party.objects.create(code=code, name=code)
+        save_odds_readings(
+            [
+                {"name": "Betr", "data": [
+                    {"party": "ALP", "odds": Decimal("1.85")},
+                    {"party": "LNP", "odds": Decimal("2.10")},
+                ]},
+            ],
+            date(2026, 1, 5),
+        )
+        update_market_consensus(date(2026, 1, 5))
+    
+    def _plans(self, func, table: str) -> list[str]:
+        """Run `func` and return the query plan of each query against `table`."""
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        
+        plans = []
+        for query in queries.captured_queries:
+            if f'FROM "{table}"' not in query["sql"]:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append("\n".join(row[-1] for row in cursor.fetchall()))
+        
+        self.assertTrue(plans, f"no query against {table}")
+        return plans
+    
+    def assertNoTableScan(self, plan: str, table: str):
+        for line in plan.splitlines():
+            if f"SCAN {table}" in line and "COVERING INDEX" not in line:
+                self.fail(f"full table scan of {table}:\n{plan}")
+    
+    def test_day_readings_use_covering_index(self):
+        for plan in self._plans(lambda: update_market_consensus(date(2026, 1, 5)), "polls_oddsreading"):
+            self.assertIn("COVERING INDEX idx_odds_day", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+    
+    def test_latest_price_per_pair_seeks_index(self):
+        for plan in self._plans(lambda: LastPriceCache().warm(), "polls_oddsreading"):
+            self.assertNoTableScan(plan, "polls_oddsreading")
+            self.assertIn("COVERING INDEX idx_odds_latest", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+    
+    def test_latest_reading_date_uses_index(self):
+        for plan in self._plans(
+            lambda: OddsReading.objects.aggregate(Max("date")), "polls_oddsreading"
+        ):
+            self.assertNoTableScan(plan, "polls_oddsreading")
+            self.assertIn("INDEX", plan)
+    
+    def test_consensus_series_uses_covering_index(self):
+        for plan in self._plans(
+            lambda: consensus_series(start=date(2026, 1, 1), end=date(2026, 1, 31)),
+            "polls_marketconsensus",
+        ):
+            self.assertNoTableScan(plan, "polls_marketconsensus")
+            self.assertIn("COVERING INDEX idx_consensus_series", plan)
+    
+    def test_latest_market_avoids_table_scans(self):
+        self.assertEqual(latest_market()["odds"], {"Betr": {"ALP": 1.85, "LNP": 2.10}})
+        for table in ("polls_oddsreading", "polls_marketconsensus"):
+            for plan in self._plans(latest_market, table):
+                self.assertNoTableScan(plan, table)
+
+
+class ScraperFixtureTests(SimpleTestCase):
+    """
+    The synthetic bookmaker pages parse, and replay through the real scrapers.
+    
+    End-to-end runs need Chromium (`playwright install chromium`) and are
+    skipped without it; the fixtures are always parsed with the scrapers'
+    own selectors and parsers.
+    """
+    
+    EXPECTED = {
+        "Betr": {"ALP": Decimal("1.30"), "LNP": Decimal("3.40"), "OTH": Decimal("51.00")},
+        "PointsBet": {"ALP": Decimal("1.30"), "LNP": Decimal("3.35"), "OTH": Decimal("51")},
+        "Ladbrokes": {"ALP": Decimal("1.28"), "LNP": Decimal("3.50"), "OTH": Decimal("41.00")},
+    }
+    
+    def test_every_scraper_has_a_fixture(self):
+        for scraper_class in ALL_SCRAPERS:
+            page_path, _ = fixture_paths(scraper_class)
+            self.assertTrue(page_path.exists(), f"missing {page_path}")
+    
+    def test_page_fixtures_parse(self):
+        for scraper_class in ALL_SCRAPERS:
+            scraper = scraper_class()
+            results = scraper.parse_outcomes(_fixture_outcomes(scraper))
+            self.assertEqual(
+                {r["party"]: r["odds"] for r in results},
+                self.EXPECTED[scraper.name],
+                scraper.name,
+            )
+    
+    def test_bookmaker_filter(self):
+        self.assertEqual(get_scrapers(), ALL_SCRAPERS)
+        self.assertEqual(get_scrapers("BET"), [BetrScraper, PointsBetScraper])
+        with self.assertRaisesRegex(ValueError, "Available: Betr, PointsBet, Ladbrokes"):
+            get_scrapers("tab")
+        
+        for command in ("scrape_odds", "bench_scrapers"):
+            with self.assertRaisesRegex(CommandError, "Unknown bookmaker: tab"):
+                call_command(command, bookmaker="tab", stdout=StringIO())
+    
+    def test_api_fixture_parses(self):
+        _, api_path = fixture_paths(PointsBetScraper)
+        results = PointsBetScraper().parse_api_payload(json.loads(api_path.read_text()))
+        self.assertEqual([r["party"] for r in results], ["ALP", "LNP", "OTH"])
+        self.assertEqual({r["party"]: r["odds"] for r in results}, self.EXPECTED["PointsBet"])
+    
+    def test_wait_strategy_is_validated(self):
+        for scraper_class in ALL_SCRAPERS:
+            self.assertIn(scraper_class().wait_strategy, WAIT_STRATEGIES)
+        self.assertEqual(PointsBetScraper(wait_strategy="networkidle").wait_strategy, "networkidle")
+        with self.assertRaises(ValueError):
+            PointsBetScraper(wait_strategy="load")
+    
+    def test_bench_scrapers_replays_fixtures(self):
+        if not _chromium_available():
+            raise unittest.SkipTest("Chromium not installed")
+        
+        out = StringIO()
+        for strategy in WAIT_STRATEGIES:
+            out = StringIO()
+            call_command(
+                "bench_scrapers", runs=1, warm=True, json=True, wait_strategy=strategy, stdout=out
+            )
+            report = json.loads(out.getvalue())
+            
+            for result in report["results"]:
+                self.assertEqual(result["failures"], [])
+                self.assertEqual(result["outcomes"], 3, result["bookmaker"])
+                for phase in ("context", "navigate", "parse", "total"):
+                    self.assertIn(phase, result["phases"])
+
+
+def _fixture_outcomes(scraper: BaseScraper) -> list[tuple[str, str]]:
+    """
+    (name, odds text) pairs from a scraper's page fixture, found with its
+    own selectors - a browserless stand-in for extract_outcomes().
+    """
+    page_path, _ = fixture_paths(type(scraper))
+    soup = BeautifulSoup(page_path.read_text(), "html.parser")
+    
+    pairs = []
+    for outcome in soup.select(scraper.OUTCOME_SELECTOR):
+        if scraper.OUTCOME_ATTRIBUTE:
+            pair = scraper.split_outcome_attribute(outcome[scraper.OUTCOME_ATTRIBUTE])
+        else:
+            name = outcome.select_one(scraper.NAME_SELECTOR)
+            odds = outcome.select_one(scraper.ODDS_SELECTOR)
+            pair = (name.get_text(strip=True), odds.get_text(strip=True)) if name and odds else None
+        if pair:
+            pairs.append(pair)
+    return pairs
+
+
+def _chromium_available() -> bool:
+    """True if Playwright can launch its Chromium here."""
+    from playwright.sync_api import sync_playwright
+    
+    try:
+        with sync_playwright() as playwright:
+            playwright.chromium.launch().close()
+    except Exception:
+        return False
+    return True
+
+
+class ScrapeRunMetricsTests(TestCase):
+    """Scrape runs are stored with per-bookmaker phase timings and exported for Prometheus."""
+    
+    def _recorder(self) -> RunRecorder:
+        recorder = RunRecorder("scrape_odds")
+        
+        betr = PhaseTimer()
+        betr.durations = {"navigate": 1.5, "wait": 0.25}
+        recorder.add_bookmaker("Betr", betr)
+        recorder.add_bookmaker("Lad\"brokes", PhaseTimer(), error="Timeout")
+        
+        with recorder.timings.phase("save"):
+            pass
+        return recorder
+    
+    def test_finish_stores_run(self):
+        self._recorder().finish(rows_written=3)
+        
+        run = ScrapeRun.objects.get()
+        self.assertEqual((run.succeeded, run.failed, run.rows_written), (1, 1, 3))
+        self.assertEqual(run.bookmakers["Betr"]["phases"], {"navigate": 1.5, "wait": 0.25})
+        self.assertEqual(run.bookmakers["Betr"]["duration"], 1.75)
+        self.assertEqual(run.bookmakers['Lad"brokes']["error"], "Timeout")
+        self.assertIn("save", run.phases)
+    
+    def test_prometheus_text(self):
+        text = prometheus_text(self._recorder().finish(save=False))
+        
+        self.assertIn('betpoll_scrape_phase_seconds{bookmaker="Betr",phase="navigate"} 1.5\n', text)
+        self.assertIn('betpoll_scrape_bookmaker_success{bookmaker="Lad\\"brokes"} 0\n', text)
+        self.assertIn("# TYPE betpoll_scrape_run_duration_seconds gauge\n", text)
+        self.assertIn("betpoll_scrape_rows_written 0\n", text)
+        self.assertFalse(ScrapeRun.objects.exists())
+    
+    def test_write_textfile(self):
+        run = self._recorder().finish(save=False)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = write_textfile(run, Path(tmpdir) / "betpoll.prom")
+            self.assertEqual(path.read_text(), prometheus_text(run))
+        
+        with self.settings(SCRAPE_METRICS_TEXTFILE=None):
+            self.assertIsNone(write_textfile(run))
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"], METRICS_TOKEN="s3cret")
+class RequestMetricsTests(TestCase):
+    """PerformanceMiddleware accounts each request's time to queries, templates and cache."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        cache_settings = override_settings(CACHES={"default": {
+            "BACKEND": "polls.services.request_metrics.MeteredFileBasedCache",
+            "LOCATION": self.tmpdir,
+        }})
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+        request_metrics.reset()
+    
+    def _metrics(self, **headers) -> str:
+        response = self.client.get("/metrics/", secure=True, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+    
+    def test_request_is_timed(self):
+        response = self.client.get("/", secure=True)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=')
+        
+        home = request_metrics.snapshot()["views"]["polls:home"]
+        self.assertEqual(home["count"], 1)
+        self.assertGreater(home["queries"], 0)
+        self.assertGreater(home["template_seconds"], 0)
+        self.assertEqual(home["status"], {"2xx": 1})
+    
+    def test_cache_hits_and_misses(self):
+        self.client.get("/", secure=True)
+        misses = request_metrics.snapshot()["cache"]["misses"]
+        self.assertGreater(misses, 0)
+        
+        self.client.get("/", secure=True)  # Served from the response cache
+        totals = request_metrics.snapshot()
+        self.assertEqual(totals["cache"]["misses"], misses)
+        self.assertGreater(totals["cache"]["hits"], 0)
+        self.assertEqual(totals["views"]["polls:home"]["count"], 2)
+    
+    def test_metrics_endpoint_requires_token_or_staff(self):
+        self.assertEqual(self.client.get("/metrics/", secure=True).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                "/metrics/", secure=True, headers={"Authorization": "Bearer wrong"}
+            ).status_code,
+            403,
+        )
+        
+        self.client.get("/about/", secure=True)
+        text = self._metrics(Authorization="Bearer s3cret")
+        self.assertIn('betpoll_http_request_duration_seconds_bucket{view="polls:about",le="+Inf"} 1\n', text)
+        self.assertIn('betpoll_http_responses_total{view="polls:about",status="2xx"} 1\n', text)
+        self.assertIn('betpoll_cache_gets_total{result="miss"}', text)
+        
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self._metrics()
+    
+    def test_slow_request_logged_with_sql(self):
+        with self.settings(SLOW_REQUEST_THRESHOLD=0), self.assertLogs("polls.middleware", "WARNING") as logs:
+            self.client.get("/", secure=True)
+        
+        self.assertIn("Slow request GET / (polls:home)", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+    
+    def _worker(self, requests: int) -> RequestMetrics:
+        """Another worker's registry (a fresh instance gets its own worker id)."""
+        worker = RequestMetrics()
+        for _ in range(requests):
+            worker.record("polls:home", 200, 0.01, RequestStats())
+        worker.flush(force=True)
+        return worker
+    
+    def test_expired_workers_are_retained(self):
+        self._worker(3)
+        self.assertEqual(request_metrics.collect()["views"]["polls:home"]["count"], 3)
+        
+        later = time.time() + request_metrics_module.WORKER_TTL + 1
+        with mock.patch.object(request_metrics_module.time, "time", return_value=later):
+            with self.assertLogs("polls.services.request_metrics", "INFO"):
+                totals = request_metrics.collect()
+            self.assertEqual(totals["views"]["polls:home"]["count"], 3)
+            self.assertEqual(len(response_cache.cache.get(request_metrics_module.WORKERS_KEY)), 1)
+            
+            self._worker(2)  # A replacement worker, maybe with the same PID
+            self.assertEqual(request_metrics.collect()["views"]["polls:home"]["count"], 5)
+    
+    def test_concurrent_registration(self):
+        with self.settings(CACHES=LOCMEM_CACHE):
+            barrier = threading.Barrier(8)
+            workers = [RequestMetrics() for _ in range(8)]
+            
+            def flush(worker):
+                barrier.wait()
+                worker.flush(force=True)
+            
+            threads = [threading.Thread(target=flush, args=(worker,)) for worker in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            registered = response_cache.cache.get(request_metrics_module.WORKERS_KEY)
+            self.assertCountEqual(registered, [worker._worker_id for worker in workers])
+    
+    def test_async_flush_runs_off_the_event_loop(self):
+        async def get_response(request):
+            return HttpResponse("ok")
+        
+        middleware = PerformanceMiddleware(get_response)
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        flush_threads = []
+        
+        async def call():
+            await middleware(request)
+            return threading.get_ident()
+        
+        with mock.patch.object(
+            request_metrics, "flush", side_effect=lambda: flush_threads.append(threading.get_ident())
+        ):
+            request_metrics._flushed = 0.0  # Due
+            loop_thread = asyncio.run(call())
+            request_metrics._flushed = time.monotonic()  # Not due
+            asyncio.run(call())
+        
+        self.assertEqual(len(flush_threads), 1)
+        self.assertNotEqual(flush_threads[0], loop_thread)
+
+
+class CircuitBreakerTests(TestCase):
+    """A bookmaker that keeps failing is skipped, then probed once its cooldown passes."""
+    
+    def _fail(self, times: int, now=None):
+        for _ in range(times):
+            retry_at = circuit_breaker.record_failure("Betr", "Timeout", now=now)
+        return retry_at
+    
+    def test_opens_at_threshold(self):
+        self.assertIsNone(self._fail(circuit_breaker.FAILURE_THRESHOLD - 1))
+        self.assertEqual(circuit_breaker.check_circuits(["Betr"]), ({}, set()))
+        
+        retry_at = self._fail(1)
+        self.assertIsNotNone(retry_at)
+        self.assertEqual(circuit_breaker.check_circuits(["Betr", "Sportsbet"]), ({"Betr": retry_at}, set()))
+    
+    def test_probe_closes_or_reopens(self):
+        retry_at = self._fail(circuit_breaker.FAILURE_THRESHOLD)
+        later = retry_at + timedelta(seconds=1)
+        
+        self.assertEqual(circuit_breaker.check_circuits(["Betr"], now=later), ({}, {"Betr"}))
+        self.assertEqual(CircuitBreaker.objects.get().state, CircuitBreaker.HALF_OPEN)
+        
+        # A failed probe re-opens with a longer cooldown
+        reopened = circuit_breaker.record_failure("Betr", "Timeout", now=later)
+        self.assertEqual(reopened - later, timedelta(seconds=circuit_breaker.OPEN_SECONDS * 2))
+        
+        circuit_breaker.check_circuits(["Betr"], now=reopened)
+        circuit_breaker.record_success("Betr")
+        circuit = CircuitBreaker.objects.get()
+        self.assertEqual((circuit.state, circuit.failures, circuit.retry_at), (CircuitBreaker.CLOSED, 0, None))
+    
+    def test_success_resets_failure_count(self):
+        self._fail(circuit_breaker.FAILURE_THRESHOLD - 1)
+        circuit_breaker.record_success("Betr")
+        self.assertIsNone(self._fail(circuit_breaker.FAILURE_THRESHOLD - 1))
+
+
+class ScraperRetryTests(SimpleTestCase):
+    """Failed scrapes are retried with backoff, without holding a concurrency slot."""
+    
+    def _run(self, scraper_class, attempts: int) -> tuple[dict, dict]:
+        command = ScrapeOddsCommand(stdout=StringIO())
+        command._recorder = RunRecorder("scrape_odds")
+        results = {"success": [], "failed": []}
+        
+        async def run():
+            with mock.patch("polls.management.commands.scrape_odds.retry_delay", return_value=0):
+                await command._run_scraper(scraper_class, None, results, attempts=attempts)
+        
+        asyncio.run(run())
+        return results, command._recorder.bookmakers[scraper_class.name]
+    
+    def test_retries_until_success(self):
+        results, record = self._run(_flaky_scraper(failures=2), attempts=3)
+        self.assertEqual([r["name"] for r in results["success"]], ["Flaky"])
+        self.assertEqual(record["attempts"], 3)
+    
+    def test_gives_up_after_attempts(self):
+        results, record = self._run(_flaky_scraper(failures=5), attempts=2)
+        self.assertEqual(results["failed"], [{"name": "Flaky", "error": "Timeout 2"}])
+        self.assertEqual((record["status"], record["attempts"]), ("failed", 2))
+
+
+class WaitStrategyTests(SimpleTestCase):
+    """BaseScraper.scrape() picks its navigation and wait per strategy, with a fake page."""
+    
+    BETR_OUTCOMES = [["Labor", "1.30"], ["Coalition", "3.40"]]
+    POINTSBET_OUTCOMES = [
+        ["Next Federal Government - Labor - 1.30", None],
+        ["Next Federal Government - Coalition - 3.35", None],
+    ]
+    
+    def _scrape(self, scraper: BaseScraper, page: "_FakePage"):
+        with mock.patch.object(scraper, "get_page", mock.AsyncMock(return_value=page)):
+            return asyncio.run(scraper.scrape())
+    
+    def test_stable_waits_for_settled_outcomes(self):
+        page = _FakePage(self.BETR_OUTCOMES)
+        results = self._scrape(BetrScraper(), page)
+        
+        self.assertEqual([r["party"] for r in results], ["ALP", "LNP"])
+        self.assertEqual(page.calls, [
+            ("goto", "domcontentloaded"),
+            ("function", STABLE_OUTCOMES_JS, [BetrScraper.OUTCOME_SELECTOR, None, 500]),
+            ("extract", BetrScraper.OUTCOME_SELECTOR),
+        ])
+    
+    def test_selector_and_networkidle(self):
+        for strategy, load_state in (("selector", "domcontentloaded"), ("networkidle", "networkidle")):
+            page = _FakePage(self.BETR_OUTCOMES)
+            self._scrape(BetrScraper(wait_strategy=strategy), page)
+            self.assertEqual(page.calls, [
+                ("goto", load_state),
+                ("selector", BetrScraper.CONTAINER_SELECTOR),
+                ("extract", BetrScraper.OUTCOME_SELECTOR),
+            ], strategy)
+    
+    def test_captured_payload_skips_dom(self):
+        _, api_path = fixture_paths(PointsBetScraper)
+        page = _FakePage(payload=json.loads(api_path.read_text()))
+        results = self._scrape(PointsBetScraper(), page)
+        
+        self.assertEqual(len(results), 3)
+        self.assertEqual(page.calls, [("goto", "commit")])
+    
+    def test_capture_timeout_falls_back_to_dom(self):
+        page = _FakePage(self.POINTSBET_OUTCOMES, capture_error=PlaywrightTimeoutError("no API"))
+        with self.assertLogs("polls.scrapers.base", "WARNING"):
+            results = self._scrape(PointsBetScraper(), page)
+        
+        self.assertEqual([r["odds"] for r in results], [Decimal("1.30"), Decimal("3.35")])
+        self.assertEqual(page.calls, [
+            ("goto", "commit"),
+            ("load_state", "domcontentloaded"),
+            ("function", STABLE_OUTCOMES_JS, [
+                PointsBetScraper.OUTCOME_SELECTOR, PointsBetScraper.OUTCOME_ATTRIBUTE, 500,
+            ]),
+            ("extract", PointsBetScraper.OUTCOME_SELECTOR),
+        ])
+    
+    def test_wait_timeout_fails_scrape(self):
+        scraper = BetrScraper()
+        page = _FakePage(self.BETR_OUTCOMES, wait_error=PlaywrightTimeoutError("never settled"))
+        with self.assertLogs("polls.scrapers.base", "ERROR"), self.assertRaises(PlaywrightTimeoutError):
+            self._scrape(scraper, page)
+        
+        self.assertNotIn("extract", [call[0] for call in page.calls])
+        self.assertIn("wait", scraper.timings.durations)
+    
+    def test_no_outcomes_fails_scrape(self):
+        with self.assertRaisesRegex(ValueError, "No odds data scraped"):
+            self._scrape(BetrScraper(), _FakePage([]))
+    
+    @unittest.skipUnless(shutil.which("node"), "Node.js not installed")
+    def test_stable_outcomes_js(self):
+        # (time in ms, outcome texts) per poll, against a stubbed DOM
+        polls = [
+            (0, []),                # Nothing rendered yet
+            (100, ["1.85"]),        # First sighting starts the window
+            (400, ["1.85"]),
+            (650, ["1.90"]),        # Price changed - window restarts
+            (1100, ["1.90"]),
+            (1150, ["1.90"]),       # Unchanged for 500ms
+        ]
+        script = """
+            const check = eval(process.argv[1]);
+            let now = 0, outcomes = [];
+            global.window = {};
+            global.performance = {now: () => now};
+            global.document = {querySelectorAll: () => outcomes};
+            console.log(JSON.stringify(JSON.parse(process.argv[2]).map(([time, texts]) => {
+                now = time;
+                outcomes = texts.map((text) => ({innerText: text}));
+                return check(["li", null, 500]);
+            })));
+        """
+        output = subprocess.run(
+            ["node", "-e", script, STABLE_OUTCOMES_JS, json.dumps(polls)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        self.assertEqual(json.loads(output), [False, False, False, False, False, True])
@@ -6,5 +6,9 @@ app_name = "polls"
 urlpatterns = [
     path("", views.home, name="home"),
     path("about/", views.about, name="about"),
+    path("api/consensus/", views.api_consensus, name="api_consensus"),
+    path("api/odds/", views.api_odds, name="api_odds"),
+    path("stream/odds/", views.odds_stream, name="odds_stream"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
 
@@ -1,11 +1,207 @@
+import asyncio
+from datetime import date
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from polls.services.broadcaster import broadcaster, format_sse
+from polls.services.cache import versioned_cache
+from polls.services.downsampling import BUCKETS
+from polls.services.request_metrics import prometheus_text, request_metrics
+from polls.services.series import (
+    DEFAULT_MAX_POINTS,
+    consensus_series,
+    latest_market,
+    odds_series,
+)
+
+# Upper bound on ?points= so a client can't ask for the whole history
+MAX_POINTS_LIMIT = 2000
 
+# SSE: comment line sent when idle so proxies don't close the connection,
+# and the reconnect delay suggested to clients
+STREAM_KEEPALIVE = 15  # seconds
+STREAM_RETRY = 5000  # milliseconds
 
+
+@versioned_cache
 def home(request):
     """Home page displaying charts and odds tables."""
-    return render(request, "polls/home.html")
+    # Only point the page at the live stream when it can be served
+    stream_url = reverse("polls:odds_stream") if _streaming_supported(request) else None
+    return render(request, "home.html", {"market": latest_market(), "stream_url": stream_url})
 
 
 def about(request):
     """About page with information about BetPoll."""
-    return render(request, "polls/about.html")
+    return render(request, "about.html")
+
+
+@require_GET
+async def odds_stream(request):
+    """
+    Server-Sent Events stream of live odds updates.
+    
+    Sends the current consensus table on connect, then "consensus" and
+    "odds" events whenever a scrape bumps the data version. Needs ASGI,
+    where each open connection is one suspended coroutine. Under WSGI an
+    endless stream would hold a worker for as long as the page is open,
+    so it answers 204, which also tells EventSource not to reconnect.
+    """
+    if not _streaming_supported(request):
+        return HttpResponse(status=204)
+    
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            yield f"retry: {STREAM_RETRY}\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broadcaster.unsubscribe(queue)
+    
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Disable nginx response buffering
+    return response
+
+
+@require_GET
+@versioned_cache
+def api_consensus(request):
+    """
+    Market consensus series per party.
+    
+    Query params: start, end (YYYY-MM-DD), party (comma-separated codes),
+    bucket (raw|day|week), points (max points per series).
+    """
+    try:
+        params = _series_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    series = consensus_series(
+        params["start"], params["end"], params["parties"],
+        params["bucket"], params["max_points"],
+    )
+    return JsonResponse({
+        **_echo(params),
+        "fields": ["timestamp", "fair_probability", "averaged_odds", "bookmaker_count"],
+        "series": series,
+    })
+
+
+@require_GET
+@versioned_cache
+def api_odds(request):
+    """
+    Bookmaker odds series per bookmaker and party.
+    
+    Query params: as api_consensus, plus bookmaker (comma-separated names).
+    """
+    try:
+        params = _series_params(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    series = odds_series(
+        params["start"], params["end"], params["parties"],
+        _csv_param(request, "bookmaker"), params["bucket"], params["max_points"],
+    )
+    return JsonResponse({
+        **_echo(params),
+        "fields": ["date", "odds"],
+        "series": series,
+    })
+
+
+@require_GET
+@never_cache
+def metrics(request):
+    """
+    Web tier request metrics (all workers) in the Prometheus text format.
+    
+    Served to staff users, or with "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    if not _metrics_authorized(request):
+        return HttpResponseForbidden("Forbidden")
+    
+    return HttpResponse(
+        prometheus_text(request_metrics.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _streaming_supported(request) -> bool:
+    """True if the request came in over ASGI, so a long-lived stream is cheap."""
+    return isinstance(request, ASGIRequest)
+
+
+def _metrics_authorized(request) -> bool:
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    return bool(token) and constant_time_compare(header, f"Bearer {token}")
+
+
+def _series_params(request) -> dict:
+    """Parse and validate the query params shared by the series endpoints."""
+    start = _date_param(request, "start")
+    end = _date_param(request, "end")
+    if start and end and start > end:
+        raise ValueError("start must not be after end")
+    
+    bucket = request.GET.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    
+    try:
+        max_points = int(request.GET.get("points", DEFAULT_MAX_POINTS))
+    except ValueError:
+        raise ValueError("points must be an integer")
+    if not 3 <= max_points <= MAX_POINTS_LIMIT:
+        raise ValueError(f"points must be between 3 and {MAX_POINTS_LIMIT}")
+    
+    return {
+        "start": start,
+        "end": end,
+        "parties": _csv_param(request, "party"),
+        "bucket": bucket,
+        "max_points": max_points,
+    }
+
+
+def _date_param(request, name: str) -> date | None:
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def _csv_param(request, name: str) -> list[str] | None:
+    value = request.GET.get(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()] or None
+
+
+def _echo(params: dict) -> dict:
+    """Request parameters as returned in the response body."""
+    return {
+        "start": params["start"],
+        "end": params["end"],
+        "bucket": params["bucket"],
+    }
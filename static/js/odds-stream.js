@@ -0,0 +1,32 @@
+/*
+ * Live odds updates over Server-Sent Events.
+ *
+ * Listens on the element's data-stream-url and swaps each "consensus"
+ * event (a rendered HTML fragment) into the element with htmx, so it is
+ * processed like any other htmx swap. "odds" events carry a JSON delta of
+ * changed bookmaker prices and are re-dispatched as a DOM event for
+ * anything on the page that shows per-bookmaker odds.
+ *
+ * htmx 2 moved SSE support out of core into an extension; this covers the
+ * one stream the dashboard needs without vendoring it. EventSource
+ * reconnects by itself using the server's retry: hint.
+ *
+ * The server only renders data-stream-url when it runs under ASGI, so
+ * under WSGI nothing connects and the table stays as rendered.
+ */
+(function () {
+    document.querySelectorAll("[data-stream-url]").forEach(function (target) {
+        var source = new EventSource(target.dataset.streamUrl);
+
+        source.addEventListener("consensus", function (event) {
+            htmx.swap(target, event.data, { swapStyle: "innerHTML" });
+        });
+
+        source.addEventListener("odds", function (event) {
+            target.dispatchEvent(new CustomEvent("odds:update", {
+                bubbles: true,
+                detail: JSON.parse(event.data),
+            }));
+        });
+    });
+})();